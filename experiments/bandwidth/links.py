@@ -0,0 +1,164 @@
+"""
+Per-link traffic matrix
+
+Captures the traffic between every pair of nodes on the mesh's bridge
+while all nodes publish, to see which links carry it and whether the
+bootstrap nodes of the star topology are hot spots.
+
+Design Decisions:
+-----------------------
+Q: Why capture packets instead of using the metrics?
+
+A: `libp2p_network_bytes_total` only has per-node totals: it can't say
+   who a node talks to. Every frame between two nodes crosses the
+   bridge, so sniffing it on the host sees every link without changing
+   the nodes.
+
+Q: Isn't a packet capture expensive?
+
+A: The kernel truncates every frame to its headers before it reaches
+   the harness (the sizes come from the IP header), and the frames are
+   summed into per-link totals per second as they arrive. No pcap is
+   written, the archived matrix is all that is kept.
+
+Q: How do we know the capture saw everything?
+
+A: libp2p counts the bytes it sends and receives on its connections,
+   i.e.: the TCP payload of the captured frames. Both are compared per
+   node (`link_check` table): a ratio far from 1 means the capture
+   dropped frames or the counters miss something.
+"""
+
+import logging
+from typing import Dict
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from analysis.links import cross_check, link_matrix
+from archive.archive import save_run
+from harness.lifecycle import PUBSUB_TOPIC, WAKU_IMAGE_NAME, run_experiment_lifecycle
+from harness.traffic import publish_at_rate
+from mesh.profiling import Profiler
+from nwaku import client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Experiment config
+NUM_NODES = 20
+BOOTSTRAPPERS_NUM = 2
+CONTENT_TOPIC = "links-content-topic"
+PAYLOAD_SIZE = 10 * 1024  # 10 KB
+PUBLISH_RATE = 10  # msg/s over the whole mesh
+PUBLISH_DURATION_S = 30
+
+
+def publish_from_all_nodes(waku_clients: Dict[str, client.WakuClient]):
+    """The scenario: every node publishes in turn, at a steady rate."""
+    payload = "a" * PAYLOAD_SIZE  # `a` == 1 byte
+    node_ids = list(waku_clients)
+
+    def _publish(i: int):
+        message = client.create_waku_message(payload, CONTENT_TOPIC)
+        waku_clients[node_ids[i % len(node_ids)]].publish_message(
+            PUBSUB_TOPIC, message, attempts=1
+        )
+
+    result = publish_at_rate(_publish, PUBLISH_RATE, PUBLISH_DURATION_S)
+    logger.info(
+        f"Published {result.published} messages ({result.failed} failed) "
+        f"at {result.achieved_rate:.2f} msg/s"
+    )
+
+
+def plot_link_matrix(matrix: pd.DataFrame, filename: str):
+    logger.info(f"Plotting link matrix to {filename}...")
+    sns.set_theme(style="white")
+    fig, ax = plt.subplots(figsize=(14, 12))
+    sns.heatmap(
+        matrix / 1024 / 1024,
+        cmap="viridis",
+        square=True,
+        cbar_kws={"label": "MB sent"},
+        ax=ax,
+    )
+    ax.set_title(
+        f"Traffic per Link ({NUM_NODES} nodes, {PUBLISH_RATE} msg/s "
+        f"of {PAYLOAD_SIZE / 1024:g} KB)",
+        fontsize=16,
+    )
+    ax.set_xlabel("Receiver", fontsize=12)
+    ax.set_ylabel("Sender", fontsize=12)
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    logger.info("Starting 'Per-Link Traffic' experiment session.")
+
+    link_records: list[dict] = []
+    profiler = Profiler()
+    bandwidth_df = run_experiment_lifecycle(
+        NUM_NODES,
+        BOOTSTRAPPERS_NUM,
+        publish_from_all_nodes,
+        profiler=profiler,
+        link_records=link_records,
+    )
+    if not link_records:
+        logger.warning("No link traffic captured.")
+        return
+
+    links_df = pd.DataFrame(link_records)
+    matrix = link_matrix(links_df)
+    check_df = cross_check(links_df, bandwidth_df)
+
+    # share of all the traffic sent or received by the bootstrap nodes
+    bootstrap_ids = [f"bootstrap-node-{i}" for i in range(BOOTSTRAPPERS_NUM)]
+    on_bootstrap = links_df["src"].isin(bootstrap_ids) | links_df["dst"].isin(
+        bootstrap_ids
+    )
+    bootstrap_share = links_df.loc[on_bootstrap, "bytes"].sum() / max(
+        links_df["bytes"].sum(), 1
+    )
+    median_ratio = check_df["payload_ratio"].median()
+    logger.info(
+        f"Bootstrap nodes are on {bootstrap_share:.1%} of the captured traffic, "
+        f"capture / libp2p payload ratio median {median_ratio:.3f} "
+        f"(min {check_df['payload_ratio'].min():.3f}, "
+        f"max {check_df['payload_ratio'].max():.3f})"
+    )
+
+    plot_link_matrix(matrix, "results/link_matrix.png")
+
+    save_run(
+        "link_traffic",
+        params={
+            "image": WAKU_IMAGE_NAME,
+            "num_nodes": NUM_NODES,
+            "bootstrappers_num": BOOTSTRAPPERS_NUM,
+            "payload_size_bytes": PAYLOAD_SIZE,
+            "rate_msgs_per_s": PUBLISH_RATE,
+            "publish_duration_s": PUBLISH_DURATION_S,
+        },
+        tables={
+            "links": links_df,
+            "link_matrix": matrix.reset_index(),
+            "link_check": check_df,
+            "bandwidth": bandwidth_df,
+            "spans": profiler.to_dataframe(),
+        },
+        summary={
+            "bootstrap_traffic_share": bootstrap_share,
+            "median_payload_ratio": median_ratio,
+        },
+    )
+    logger.info("Experiment session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -22,6 +22,7 @@ A: By setting up a fresh, clean network for each set of parameters
 
 from dataclasses import dataclass
 import logging
+import os
 from typing import Dict
 
 import pandas as pd
@@ -29,8 +30,20 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from concurrent.futures import ThreadPoolExecutor
 
+from archive.archive import save_run
 from nwaku import client
-from common import run_experiment_lifecycle, PUBSUB_TOPIC
+from nwaku.logs import events_df
+from analysis.live import LiveAggregator, default_abort_rules
+from analysis.timeseries import TimeSeriesPlot, phase_window, render_plots
+from harness.lifecycle import (
+    ExperimentAborted,
+    run_experiment_lifecycle,
+    PUBSUB_TOPIC,
+    WAKU_IMAGE_NAME,
+)
+from harness.live_view import TerminalLiveView
+from harness.sampling import AdaptiveSampling
+from mesh.profiling import Profiler
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -44,6 +57,8 @@ CONTENT_TOPIC = "num-vs-bw-content-topic"
 class ExperimentInfo:
     num_messages: int
     df: pd.DataFrame
+    # lifecycle phases (`Profiler` spans), to mark publish and baseline
+    spans: pd.DataFrame
 
 
 def publish_by_number(
@@ -135,8 +150,27 @@ def analyze_and_plot_aggregate(
 
 
 def plot_time_series(experiments: list[ExperimentInfo], filename: str):
-    # TODO
-    pass
+    """
+    Plots the per-node and network bandwidth rate over time of every
+    experiment, with the publish moment and the baseline window marked.
+
+    One figure per experiment (`filename` suffixed with its number of
+    messages), rendered in parallel.
+    """
+    base, ext = os.path.splitext(filename)
+    plots = []
+    for experiment in experiments:
+        scenario = phase_window(experiment.spans, "scenario")
+        plots.append(
+            TimeSeriesPlot(
+                df=experiment.df,
+                title=f"{experiment.num_messages} Messages",
+                filename=f"{base}_{experiment.num_messages}{ext}",
+                publish_times=[scenario[0]] if scenario else [],
+                baseline=phase_window(experiment.spans, "baseline"),
+            )
+        )
+    render_plots(plots)
 
 
 def main():
@@ -152,6 +186,9 @@ def main():
         # ignoring fluctuations on the y-axis inherited to external factors
         # (e.g.: host machine running the experiment using more CPU, and for
         # some reason nim-libp2p starts to decrease bandwidth usage and increase delay)
+        # The host's share of that noise can be cut by pinning the nodes and the
+        # harness (`resources=ResourcePlan(...)`) and by recording `host_load` to
+        # flag contended runs (`analysis.noise`), see the regression check.
         #
         # To implement this, we just have to uncomment the following line:
         # Note: the overall experiment would take longer obviously.
@@ -160,14 +197,47 @@ def main():
 
         scenario = lambda clients: publish_by_number(clients, msg_count)
         # TODO: bootstrap nodes proporitonal to num of nodes
-        raw_df = run_experiment_lifecycle(NUM_NODES, 2, scenario)
+        log_events = []
+        profiler = Profiler()
+        live = LiveAggregator(abort_rules=default_abort_rules())
+        try:
+            with TerminalLiveView(live):
+                raw_df = run_experiment_lifecycle(
+                    NUM_NODES,
+                    2,
+                    scenario,
+                    log_events=log_events,
+                    profiler=profiler,
+                    live=live,
+                    sampling=AdaptiveSampling(),
+                )
+        except ExperimentAborted as e:
+            logger.warning(f"Skipping {msg_count} msgs/node run: {e}")
+            continue
 
         if raw_df.empty:
             logger.warning(f"No data for {msg_count} msgs/node run.")
             continue
 
         total_messages = msg_count * NUM_NODES
-        all_experiments.append(ExperimentInfo(total_messages, raw_df))
+        spans_df = profiler.to_dataframe()
+        save_run(
+            "num_vs_bandwidth",
+            params={
+                "image": WAKU_IMAGE_NAME,
+                "num_nodes": NUM_NODES,
+                "bootstrappers_num": 2,
+                "messages_per_node": msg_count,
+                "num_messages": total_messages,
+                "payload_size_bytes": 1,
+            },
+            tables={
+                "bandwidth": raw_df,
+                "log_events": events_df(log_events),
+                "spans": spans_df,
+            },
+        )
+        all_experiments.append(ExperimentInfo(total_messages, raw_df, spans_df))
 
     if all_experiments:
         plot_time_series(all_experiments, "results/num_vs_bandwidth_time_series.png")
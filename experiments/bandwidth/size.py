@@ -28,8 +28,19 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from concurrent.futures import ThreadPoolExecutor
 
+from archive.archive import save_run
 from nwaku import client
-from common import run_experiment_lifecycle, PUBSUB_TOPIC
+from nwaku.logs import events_df
+from analysis.live import LiveAggregator, default_abort_rules
+from harness.lifecycle import (
+    ExperimentAborted,
+    run_experiment_lifecycle,
+    PUBSUB_TOPIC,
+    WAKU_IMAGE_NAME,
+)
+from harness.live_view import TerminalLiveView
+from harness.sampling import AdaptiveSampling
+from mesh.profiling import Profiler
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -153,6 +164,9 @@ def main():
         # ignoring fluctuations on the y-axis inherited to external factors
         # (e.g.: host machine running the experiment using more CPU, and for
         # some reason nim-libp2p starts to decrease bandwidth usage and increase delay)
+        # The host's share of that noise can be cut by pinning the nodes and the
+        # harness (`resources=ResourcePlan(...)`) and by recording `host_load` to
+        # flag contended runs (`analysis.noise`), see the regression check.
         #
         # To implement this, we just have to uncomment the following line:
         # Note: the overall experiment would take longer obviously.
@@ -162,7 +176,23 @@ def main():
             clients, size_bytes, NUM_MESSAGES_PER_RUN
         )
         # TODO: bootstrap nodes proporitonal to num of nodes
-        raw_df = run_experiment_lifecycle(NUM_NODES, 2, action)
+        log_events = []
+        profiler = Profiler()
+        live = LiveAggregator(abort_rules=default_abort_rules())
+        try:
+            with TerminalLiveView(live):
+                raw_df = run_experiment_lifecycle(
+                    NUM_NODES,
+                    2,
+                    action,
+                    log_events=log_events,
+                    profiler=profiler,
+                    live=live,
+                    sampling=AdaptiveSampling(),
+                )
+        except ExperimentAborted as e:
+            logger.warning(f"Skipping {size_bytes} byte run: {e}")
+            continue
 
         if raw_df.empty:
             logger.warning(f"No data for {size_bytes} byte run.")
@@ -171,6 +201,21 @@ def main():
         # analysis should consider the sum of all messages published
         # in one experiment
         total_payload_size = size_bytes * NUM_MESSAGES_PER_RUN
+        save_run(
+            "size_vs_bandwidth",
+            params={
+                "image": WAKU_IMAGE_NAME,
+                "num_nodes": NUM_NODES,
+                "bootstrappers_num": 2,
+                "num_messages": NUM_MESSAGES_PER_RUN,
+                "payload_size_bytes": size_bytes,
+            },
+            tables={
+                "bandwidth": raw_df,
+                "log_events": events_df(log_events),
+                "spans": profiler.to_dataframe(),
+            },
+        )
         all_experiments.append(ExperimentInfo(total_payload_size, raw_df))
 
     if all_experiments:
@@ -0,0 +1,279 @@
+"""
+Capacity search
+
+Finds the highest message rate an N-node mesh sustains, for each
+payload size and node count, while every subscriber still receives
+(almost) every message in time. The result is a capacity curve.
+
+Design Decisions:
+-----------------------
+Q: What does "sustains" mean?
+
+A: A probe publishes at a fixed rate (open loop, spread over all nodes)
+   for `PROBE_DURATION_S`, then waits for the deliveries. It passes if:
+   - the delivery ratio is at least `MIN_DELIVERY_RATIO`, i.e.: all
+     subscribers actually received all messages (the "validating
+     scenarios" idea of the README), and
+   - the p99 delivery delay is under `P99_DELAY_LIMIT_S`, and
+   - every publish was accepted at the offered rate.
+
+Q: Why exponential then binary search?
+
+A: The capacity can be anywhere between a few and thousands of
+   messages per second. Doubling the rate finds the order of magnitude
+   in a few probes, bisection then narrows it down to
+   `REL_TOLERANCE`.
+
+Q: Why probe all the payload sizes on the same mesh?
+
+A: Bringing a mesh up takes longer than a probe. Probes are separated
+   by a cooldown so queues drain, and each one only tracks its own
+   messages.
+
+Q: Why raise the REST relay cache capacity?
+
+A: Deliveries are tracked by polling `GET /relay/v1/messages`, which
+   only returns the last messages of nwaku's cache. A small cache would
+   drop messages between two polls at high rates, and look like lost
+   deliveries.
+"""
+
+import dataclasses
+import logging
+import time
+from typing import Dict
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from requests.adapters import HTTPAdapter
+
+from analysis.search import capacity_search
+from archive.archive import save_run
+from harness.lifecycle import PUBSUB_TOPIC, WAKU_IMAGE_NAME, run_experiment_lifecycle
+from harness.traffic import PUBLISH_MAX_WORKERS, publish_at_rate
+from mesh.runtime import NWAKU_APP
+from nwaku import client
+from nwaku.delivery import DeliveryTracker
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Experiment config
+NODE_COUNTS = [10, 25, 50]
+NODES_PER_BOOTSTRAP = 10
+CONTENT_TOPIC = "capacity-content-topic"
+PAYLOAD_SIZES = [
+    1 * 1024,  # 1 KB
+    16 * 1024,  # 16 KB
+    128 * 1024,  # 128 KB
+]
+
+# Search config (rates in messages per second)
+START_RATE = 5
+MAX_RATE = 2000
+REL_TOLERANCE = 0.1
+MAX_PROBES = 15
+
+# Probe config
+PROBE_DURATION_S = 10
+DELIVERY_TIMEOUT_S = 10
+COOLDOWN_S = 5
+MIN_DELIVERY_RATIO = 0.999
+P99_DELAY_LIMIT_S = 1.0
+# Below this ratio of the target rate the publishers didn't keep up
+MIN_ACHIEVED_RATE_RATIO = 0.95
+
+RELAY_CACHE_CAPACITY = 10_000
+CAPACITY_APP = dataclasses.replace(
+    NWAKU_APP,
+    args=NWAKU_APP.args + [f"--rest-relay-cache-capacity={RELAY_CACHE_CAPACITY}"],
+)
+
+
+def probe_rate(
+    waku_clients: Dict[str, client.WakuClient], rate: float, payload_size: int
+) -> tuple[bool, dict]:
+    """Publishes at `rate` msg/s for a while and checks every delivery."""
+    payload = "a" * payload_size  # `a` == 1 byte
+    node_ids = list(waku_clients)
+
+    logger.info(f"Probing {rate:.1f} msg/s with {payload_size} byte payloads...")
+    window_start = time.time()
+    with DeliveryTracker(waku_clients, PUBSUB_TOPIC) as tracker:
+        traffic = publish_at_rate(
+            # a failed publish isn't retried: it would be late anyway
+            lambda i: tracker.publish(
+                node_ids[i % len(node_ids)], payload, CONTENT_TOPIC, attempts=1
+            ),
+            rate,
+            PROBE_DURATION_S,
+        )
+        all_delivered = tracker.wait_for_delivery(DELIVERY_TIMEOUT_S)
+    window_end = time.time()
+
+    delays_df = tracker.delays_df()
+    # undelivered messages have no delay
+    delays = (
+        delays_df["delay_s"].to_numpy(dtype=float)
+        if "delay_s" in delays_df
+        else np.array([])
+    )
+    delays = delays[~np.isnan(delays)]
+    details = {
+        **dataclasses.asdict(traffic),
+        "payload_size_bytes": payload_size,
+        "all_delivered": all_delivered,
+        "delivery_ratio": tracker.delivery_ratio(),
+        "delay_p50_s": float(np.quantile(delays, 0.5)) if len(delays) else np.nan,
+        "delay_p99_s": float(np.quantile(delays, 0.99)) if len(delays) else np.nan,
+        # to attribute the polled bandwidth to each probe (cost model)
+        "window_start": window_start,
+        "window_end": window_end,
+    }
+
+    if traffic.failed > 0:
+        reason = "publish_failed"
+    elif traffic.achieved_rate < MIN_ACHIEVED_RATE_RATIO * rate:
+        reason = "rate_not_reached"
+    elif details["delivery_ratio"] < MIN_DELIVERY_RATIO:
+        reason = "messages_lost"
+    elif not details["delay_p99_s"] <= P99_DELAY_LIMIT_S:
+        reason = "p99_delay_exceeded"
+    else:
+        reason = None
+    details["fail_reason"] = reason
+
+    logger.info(
+        f"{rate:.1f} msg/s: {'PASS' if reason is None else f'FAIL ({reason})'}, "
+        f"delivery ratio {details['delivery_ratio']:.4f}, "
+        f"p99 delay {details['delay_p99_s']:.3f}s"
+    )
+    time.sleep(COOLDOWN_S)
+    return reason is None, details
+
+
+def search_all_payloads(
+    waku_clients: Dict[str, client.WakuClient],
+    num_nodes: int,
+    capacities: list[dict],
+    probes: list[dict],
+):
+    """The scenario: one capacity search per payload size, on the same mesh."""
+    for waku_client in waku_clients.values():
+        waku_client.session.mount(
+            "http://", HTTPAdapter(pool_maxsize=PUBLISH_MAX_WORKERS)
+        )
+
+    for payload_size in PAYLOAD_SIZES:
+        result = capacity_search(
+            lambda rate: probe_rate(waku_clients, rate, payload_size),
+            start_rate=START_RATE,
+            max_rate=MAX_RATE,
+            rel_tolerance=REL_TOLERANCE,
+            max_probes=MAX_PROBES,
+        )
+        capacity = result.capacity or 0.0
+        logger.info(
+            f"{num_nodes} nodes, {payload_size} bytes: capacity {capacity:.1f} msg/s "
+            f"({'converged' if result.converged else 'NOT converged'} after "
+            f"{len(result.probes)} probes)"
+        )
+        capacities.append(
+            {
+                "num_nodes": num_nodes,
+                "payload_size_bytes": payload_size,
+                "capacity_msgs_per_s": capacity,
+                "capacity_bytes_per_s": capacity * payload_size,
+                "first_failing_msgs_per_s": result.first_failing,
+                "converged": result.converged,
+                "num_probes": len(result.probes),
+            }
+        )
+        for i, probe in enumerate(result.probes):
+            probes.append(
+                {
+                    "num_nodes": num_nodes,
+                    "probe": i,
+                    "rate": probe.rate,
+                    "passed": probe.passed,
+                    **probe.details,
+                }
+            )
+
+
+def plot_capacity_curve(capacity_df: pd.DataFrame, filename: str):
+    logger.info(f"Plotting capacity curve to {filename}...")
+    sns.set_theme(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.lineplot(
+        data=capacity_df,
+        x="payload_size_bytes",
+        y="capacity_msgs_per_s",
+        hue="num_nodes",
+        marker="o",
+        palette="viridis",
+        ax=ax,
+    )
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_title(
+        f"Max Sustainable Rate (delivery >= {MIN_DELIVERY_RATIO:.1%}, "
+        f"p99 <= {P99_DELAY_LIMIT_S}s)",
+        fontsize=16,
+    )
+    ax.set_xlabel("Payload Size (bytes)", fontsize=12)
+    ax.set_ylabel("Capacity (msg/s)", fontsize=12)
+    ax.legend(title="Nodes")
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    logger.info("Starting 'Capacity Search' experiment session.")
+
+    all_capacities = []
+    for num_nodes in NODE_COUNTS:
+        bootstrappers_num = max(1, num_nodes // NODES_PER_BOOTSTRAP)
+        capacities: list[dict] = []
+        probes: list[dict] = []
+        bandwidth_df = run_experiment_lifecycle(
+            num_nodes,
+            bootstrappers_num,
+            lambda clients: search_all_payloads(clients, num_nodes, capacities, probes),
+            app=CAPACITY_APP,
+        )
+
+        save_run(
+            "capacity_search",
+            params={
+                "image": WAKU_IMAGE_NAME,
+                "num_nodes": num_nodes,
+                "bootstrappers_num": bootstrappers_num,
+                "payload_sizes_bytes": PAYLOAD_SIZES,
+                "min_delivery_ratio": MIN_DELIVERY_RATIO,
+                "p99_delay_limit_s": P99_DELAY_LIMIT_S,
+                "probe_duration_s": PROBE_DURATION_S,
+                "rel_tolerance": REL_TOLERANCE,
+            },
+            tables={
+                "capacity": pd.DataFrame(capacities),
+                "probes": pd.DataFrame(probes),
+                "bandwidth": bandwidth_df,
+            },
+        )
+        all_capacities.extend(capacities)
+
+    if all_capacities:
+        capacity_df = pd.DataFrame(all_capacities)
+        logger.info(f"Capacity curve:\n{capacity_df}")
+        plot_capacity_curve(capacity_df, "results/capacity_curve.png")
+
+    logger.info("Experiment session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,174 @@
+"""
+Node runtime comparison
+
+Compares the bring-up time and per-node memory overhead of running the
+nodes as Docker containers (`DockerRuntime`) vs. as plain processes in
+network namespaces (`ProcessRuntime`), for growing mesh sizes.
+
+Design Decisions:
+-----------------------
+Q: How is the per-node memory overhead measured?
+
+A: As the host memory used per node (drop of `MemAvailable` in
+   /proc/meminfo between before starting and after all nodes are
+   ready) minus the memory of the node itself (its cgroup usage for
+   Docker, its RSS for a process). What is left is what the runtime
+   costs per node: containerd shims, cgroups, docker-proxy processes,
+   namespaces...
+
+Q: Is the same app run by both runtimes?
+
+A: It should be the same nwaku version: the Docker image tag and the
+   local `wakunode2` binary are configured separately, so make sure
+   they match before comparing.
+"""
+
+import logging
+import time
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from archive.archive import save_run
+from harness.gateway import MetricsGateway
+from harness.lifecycle import WAKU_IMAGE_NAME
+from harness.readiness import wait_for_ready
+from mesh.mesh import Mesh
+from mesh.netns import NWAKU_BINARY, ProcessRuntime
+from mesh.profiling import Profiler
+from mesh.runtime import DockerRuntime, NodeRuntime
+from nwaku import client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+NODE_COUNTS = [10, 50, 100, 250]
+NODES_PER_BOOTSTRAP = 25
+READY_TIMEOUT_S = 300
+# Let memory usage settle after the nodes are ready
+SETTLE_S = 10
+
+RUNTIMES = {
+    "docker": lambda: DockerRuntime(WAKU_IMAGE_NAME),
+    "process": lambda: ProcessRuntime(NWAKU_BINARY),
+}
+
+
+def host_available_memory_bytes() -> int:
+    with open("/proc/meminfo") as f:
+        for line in f:
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("MemAvailable not found in /proc/meminfo")
+
+
+def measure_runtime(runtime_name: str, num_nodes: int) -> tuple[dict, Profiler]:
+    runtime: NodeRuntime = RUNTIMES[runtime_name]()
+    profiler = Profiler()
+    bootstrappers_num = max(1, num_nodes // NODES_PER_BOOTSTRAP)
+    mesh = Mesh(num_nodes, bootstrappers_num, runtime=runtime, profiler=profiler)
+    waku_clients: dict[str, client.WakuClient] = {}
+    gateway = MetricsGateway()
+
+    available_before = host_available_memory_bytes()
+    try:
+        start = time.time()
+        mesh.start()
+        for node in mesh.all_nodes:
+            waku_clients[node.id] = client.WakuClient(
+                ip_address=node.api_host,
+                rest_port=node.rest_port,
+                metrics_port=node.metrics_port,
+            )
+            gateway.add_node(node.id, waku_clients[node.id])
+        ready_times = wait_for_ready(waku_clients, gateway, READY_TIMEOUT_S, profiler)
+        ready = [t for t in ready_times.values() if t is not None]
+        time_to_ready_s = (max(ready) - start) if ready else float("nan")
+
+        time.sleep(SETTLE_S)
+        host_memory_per_node = (
+            available_before - host_available_memory_bytes()
+        ) / num_nodes
+        node_memory = [runtime.memory_bytes(node) for node in mesh.all_nodes]
+        node_memory_per_node = sum(node_memory) / len(node_memory)
+    finally:
+        for waku_client in waku_clients.values():
+            waku_client.close()
+        mesh.stop()
+
+    result = {
+        "runtime": runtime_name,
+        "num_nodes": num_nodes,
+        "nodes_ready": len(ready),
+        "time_to_ready_s": time_to_ready_s,
+        "host_memory_per_node_mb": host_memory_per_node / 1024**2,
+        "node_memory_per_node_mb": node_memory_per_node / 1024**2,
+        "overhead_per_node_mb": (host_memory_per_node - node_memory_per_node) / 1024**2,
+    }
+    return result, profiler
+
+
+def plot_comparison(results_df: pd.DataFrame, filename: str):
+    logger.info(f"Plotting runtime comparison to {filename}...")
+    sns.set_theme(style="whitegrid")
+    fig, (ax_time, ax_mem) = plt.subplots(1, 2, figsize=(16, 7))
+    sns.lineplot(
+        data=results_df,
+        x="num_nodes",
+        y="time_to_ready_s",
+        hue="runtime",
+        marker="o",
+        ax=ax_time,
+    )
+    ax_time.set_title("Time to Ready vs. Number of Nodes", fontsize=14)
+    ax_time.set_xlabel("Number of Nodes", fontsize=12)
+    ax_time.set_ylabel("Time to Ready (s)", fontsize=12)
+
+    sns.lineplot(
+        data=results_df,
+        x="num_nodes",
+        y="overhead_per_node_mb",
+        hue="runtime",
+        marker="o",
+        ax=ax_mem,
+    )
+    ax_mem.set_title("Runtime Memory Overhead per Node", fontsize=14)
+    ax_mem.set_xlabel("Number of Nodes", fontsize=12)
+    ax_mem.set_ylabel("Overhead per Node (MB)", fontsize=12)
+
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    logger.info("Starting 'Node Runtime Comparison' benchmark session.")
+
+    results = []
+    for num_nodes in NODE_COUNTS:
+        for runtime_name in RUNTIMES:
+            logger.info(f"Measuring {runtime_name} runtime with {num_nodes} nodes...")
+            result, profiler = measure_runtime(runtime_name, num_nodes)
+            logger.info(
+                f"{runtime_name}: {result['nodes_ready']}/{num_nodes} ready after "
+                f"{result['time_to_ready_s']:.1f}s, "
+                f"{result['overhead_per_node_mb']:.1f} MB overhead per node"
+            )
+            save_run(
+                "node_runtimes",
+                params={"image": WAKU_IMAGE_NAME, "binary": NWAKU_BINARY, **result},
+                tables={"spans": profiler.to_dataframe()},
+                summary=result,
+            )
+            results.append(result)
+
+    results_df = pd.DataFrame(results)
+    logger.info(f"Results:\n{results_df.round(2)}")
+    plot_comparison(results_df, "results/node_runtimes.png")
+    logger.info("Benchmark session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
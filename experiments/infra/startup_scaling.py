@@ -0,0 +1,191 @@
+"""
+Mesh startup scaling
+
+Measures how long it takes to bring up an N-node mesh until every node
+is ready, for growing N, and breaks it down into setup phases to find
+which part of the bring-up is superlinear.
+
+Design Decisions:
+-----------------------
+Q: What does "ready" mean?
+
+A: The node answers both its REST API and its metrics endpoint. nwaku
+   starts the metrics server last, so that is the end of its setup.
+
+Q: How is superlinear scaling detected?
+
+A: Each phase's duration is fitted as `duration ~ c * N^k` over all the
+   N values. `k ~ 1` is linear, `k > 1` superlinear (e.g.: a phase that
+   takes 4x longer when N doubles has `k = 2`).
+"""
+
+import logging
+import os
+import time
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from analysis.stats import scaling_exponent
+from archive.archive import save_run
+from harness.gateway import MetricsGateway
+from harness.lifecycle import WAKU_IMAGE_NAME
+from harness.readiness import wait_for_ready
+from mesh.mesh import Mesh
+from mesh.profiling import Profiler
+from nwaku import client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+NODE_COUNTS = [10, 25, 50, 100, 250, 500]
+# One bootstrap node per this many nodes
+NODES_PER_BOOTSTRAP = 25
+READY_TIMEOUT_S = 300
+# Phases fitted with an exponent above this are reported as superlinear
+SUPERLINEAR_EXPONENT = 1.2
+
+# Phases reported in the breakdown, in bring-up order
+MESH_PHASES = [
+    "get_image",
+    "create_network",
+    "allocate_ports",
+    "start_bootstrap_nodes",
+    "fetch_multiaddrs",
+    "start_regular_nodes",
+]
+
+
+def measure_startup(num_nodes: int) -> tuple[Profiler, dict]:
+    """
+    Starts a mesh of `num_nodes` and waits for all nodes to be ready.
+
+    Returns the recorded spans, and the time-to-ready of the mesh.
+    """
+    profiler = Profiler()
+    bootstrappers_num = max(1, num_nodes // NODES_PER_BOOTSTRAP)
+    mesh = Mesh(num_nodes, bootstrappers_num, WAKU_IMAGE_NAME, profiler=profiler)
+    waku_clients: dict[str, client.WakuClient] = {}
+    gateway = MetricsGateway()
+    try:
+        start = time.time()
+        mesh.start()
+        for node in mesh.all_nodes:
+            waku_clients[node.id] = client.WakuClient(
+                ip_address=node.api_host,
+                rest_port=node.rest_port,
+                metrics_port=node.metrics_port,
+            )
+            gateway.add_node(node.id, waku_clients[node.id])
+
+        with profiler.span("wait_ready", "mesh"):
+            ready_times = wait_for_ready(
+                waku_clients, gateway, READY_TIMEOUT_S, profiler
+            )
+        ready = [t for t in ready_times.values() if t is not None]
+        result = {
+            "num_nodes": num_nodes,
+            "bootstrappers_num": bootstrappers_num,
+            "nodes_ready": len(ready),
+            "time_to_ready_s": (max(ready) - start) if ready else float("nan"),
+        }
+    finally:
+        for waku_client in waku_clients.values():
+            waku_client.close()
+        mesh.stop()
+
+    return profiler, result
+
+
+def phase_breakdown(spans_df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the duration of each mesh phase per N (one column per phase)."""
+    phases = spans_df.loc[spans_df["name"].isin(MESH_PHASES + ["wait_ready"])]
+    phases = phases.loc[phases["category"] == "mesh"]
+    breakdown = phases.pivot_table(
+        index="num_nodes", columns="name", values="duration_s", aggfunc="sum"
+    )
+    ordered = [p for p in MESH_PHASES + ["wait_ready"] if p in breakdown.columns]
+    return breakdown.loc[:, ordered]
+
+
+def fit_exponents(breakdown: pd.DataFrame, results_df: pd.DataFrame) -> pd.DataFrame:
+    rows = []
+    for phase in breakdown.columns:
+        rows.append(
+            {
+                "phase": phase,
+                "exponent": scaling_exponent(breakdown.index, breakdown[phase]),
+            }
+        )
+    rows.append(
+        {
+            "phase": "time_to_ready",
+            "exponent": scaling_exponent(
+                results_df["num_nodes"], results_df["time_to_ready_s"]
+            ),
+        }
+    )
+    exponents = pd.DataFrame(rows)
+    exponents["superlinear"] = exponents["exponent"] > SUPERLINEAR_EXPONENT
+    return exponents
+
+
+def plot_breakdown(breakdown: pd.DataFrame, filename: str):
+    logger.info(f"Plotting startup phase breakdown to {filename}...")
+    sns.set_theme(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(12, 8))
+    for phase in breakdown.columns:
+        ax.plot(breakdown.index, breakdown[phase], marker="o", label=phase)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_title("Mesh Startup Phase Duration vs. Number of Nodes", fontsize=16)
+    ax.set_xlabel("Number of Nodes", fontsize=12)
+    ax.set_ylabel("Duration (s)", fontsize=12)
+    ax.legend()
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    logger.info("Starting 'Mesh Startup Scaling' benchmark session.")
+
+    all_spans = []
+    results = []
+    for num_nodes in NODE_COUNTS:
+        logger.info(f"Measuring startup of {num_nodes} nodes...")
+        profiler, result = measure_startup(num_nodes)
+        logger.info(
+            f"{result['nodes_ready']}/{num_nodes} nodes ready after "
+            f"{result['time_to_ready_s']:.1f}s"
+        )
+
+        spans_df = profiler.to_dataframe()
+        path = save_run(
+            "startup_scaling",
+            params={"image": WAKU_IMAGE_NAME, **result},
+            tables={"spans": spans_df},
+            summary=result,
+        )
+        profiler.save_chrome_trace(os.path.join(path, "trace.json"))
+
+        all_spans.append(spans_df.assign(num_nodes=num_nodes))
+        results.append(result)
+
+    results_df = pd.DataFrame(results)
+    breakdown = phase_breakdown(pd.concat(all_spans, ignore_index=True))
+    exponents = fit_exponents(breakdown, results_df)
+
+    logger.info(f"Phase durations (s) per number of nodes:\n{breakdown.round(2)}")
+    for row in exponents.to_dict("records"):
+        flag = " <- superlinear" if row["superlinear"] else ""
+        logger.info(f"{row['phase']}: N^{row['exponent']:.2f}{flag}")
+
+    plot_breakdown(breakdown, "results/startup_scaling.png")
+    logger.info("Benchmark session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,149 @@
+"""
+Mesh teardown benchmark
+
+Measures how long tearing a mesh down takes for growing mesh sizes,
+with a graceful stop (stop, then remove each container) vs. killing and
+force-removing the containers in bulk, and with how many containers
+are torn down at the same time.
+
+Design Decisions:
+-----------------------
+Q: Why wait for the nodes to be ready before tearing them down?
+
+A: A container that is still starting doesn't stop like a running
+   node: nwaku only handles SIGTERM once it is up. Measuring the
+   teardown of ready nodes is what happens at the end of a run.
+
+Q: What is measured?
+
+A: The `mesh_stop` span of the mesh: removing every node and the
+   network. The host is left with no containers of the mesh afterwards
+   (checked with the session label), otherwise the run is reported as
+   leaking.
+"""
+
+import logging
+import time
+
+import docker
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from archive.archive import save_run
+from harness.gateway import MetricsGateway
+from harness.lifecycle import WAKU_IMAGE_NAME
+from harness.readiness import wait_for_ready
+from mesh.mesh import Mesh
+from mesh.profiling import Profiler
+from mesh.runtime import SESSION_LABEL, DockerRuntime, Teardown
+from nwaku import client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+NODE_COUNTS = [10, 50, 100, 250]
+NODES_PER_BOOTSTRAP = 25
+READY_TIMEOUT_S = 300
+
+TEARDOWNS = {
+    "graceful": Teardown(graceful=True),
+    "kill_8_workers": Teardown(max_workers=8),
+    "kill_32_workers": Teardown(max_workers=32),
+    "kill_128_workers": Teardown(max_workers=128),
+}
+
+
+def measure_teardown(teardown_name: str, num_nodes: int) -> tuple[dict, Profiler]:
+    profiler = Profiler()
+    bootstrappers_num = max(1, num_nodes // NODES_PER_BOOTSTRAP)
+    mesh = Mesh(
+        num_nodes,
+        bootstrappers_num,
+        runtime=DockerRuntime(WAKU_IMAGE_NAME),
+        profiler=profiler,
+        teardown=TEARDOWNS[teardown_name],
+    )
+    waku_clients: dict[str, client.WakuClient] = {}
+    gateway = MetricsGateway()
+    try:
+        mesh.start()
+        for node in mesh.all_nodes:
+            waku_clients[node.id] = client.WakuClient(
+                ip_address=node.api_host,
+                rest_port=node.rest_port,
+                metrics_port=node.metrics_port,
+            )
+            gateway.add_node(node.id, waku_clients[node.id])
+        ready_times = wait_for_ready(waku_clients, gateway, READY_TIMEOUT_S, profiler)
+    finally:
+        for waku_client in waku_clients.values():
+            waku_client.close()
+        mesh.stop()
+
+    stop_span = next(span for span in profiler.spans if span.name == "mesh_stop")
+    leftovers = docker.from_env().containers.list(
+        all=True, filters={"label": f"{SESSION_LABEL}={mesh.session_id}"}
+    )
+    result = {
+        "teardown": teardown_name,
+        "num_nodes": num_nodes,
+        "nodes_ready": sum(t is not None for t in ready_times.values()),
+        "teardown_s": stop_span.duration_s,
+        "leftover_containers": len(leftovers),
+    }
+    return result, profiler
+
+
+def plot_teardown(results_df: pd.DataFrame, filename: str):
+    logger.info(f"Plotting teardown times to {filename}...")
+    sns.set_theme(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.lineplot(
+        data=results_df,
+        x="num_nodes",
+        y="teardown_s",
+        hue="teardown",
+        marker="o",
+        ax=ax,
+    )
+    ax.set_title("Mesh Teardown Time vs. Number of Nodes", fontsize=16)
+    ax.set_xlabel("Number of Nodes", fontsize=12)
+    ax.set_ylabel("Teardown Time (s)", fontsize=12)
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    logger.info("Starting 'Mesh Teardown' benchmark session.")
+
+    results = []
+    for num_nodes in NODE_COUNTS:
+        for teardown_name in TEARDOWNS:
+            logger.info(f"Measuring {teardown_name} teardown of {num_nodes} nodes...")
+            result, profiler = measure_teardown(teardown_name, num_nodes)
+            logger.info(
+                f"{teardown_name}: {num_nodes} nodes torn down in "
+                f"{result['teardown_s']:.1f}s, "
+                f"{result['leftover_containers']} containers left"
+            )
+            save_run(
+                "mesh_teardown",
+                params={"image": WAKU_IMAGE_NAME, **result},
+                tables={"spans": profiler.to_dataframe()},
+                summary=result,
+            )
+            results.append(result)
+            # let the Docker daemon settle between runs
+            time.sleep(5)
+
+    results_df = pd.DataFrame(results)
+    logger.info(f"Results:\n{results_df.round(2)}")
+    plot_teardown(results_df, "results/mesh_teardown.png")
+    logger.info("Benchmark session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
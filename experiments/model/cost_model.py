@@ -0,0 +1,216 @@
+"""
+Bandwidth cost model
+
+Fits a model of the egress bytes per message as a function of the
+payload size, node count, mesh degree and publish rate over all the
+archived runs, answers "what if" questions outside of what was run
+(e.g.: per-node egress at N = 1000, 10 KB, 50 msg/s) and suggests the
+next configurations to run.
+
+Design Decisions:
+-----------------------
+Q: Why a log-linear model?
+
+A: Gossipsub's cost is roughly multiplicative: every node forwards each
+   message to its D mesh peers, so bytes per message ~ N * D *
+   (payload + overhead). In log space that is linear, and the fitted
+   coefficients read as scaling exponents that can be checked against
+   this expectation. The overhead is picked by model evidence.
+
+Q: Why Bayesian?
+
+A: The runs mostly sweep one variable with the others fixed (e.g.: N =
+   20), so some coefficients are barely (or not at all, like the mesh
+   degree) constrained by the data. A prior centred on the expected
+   scaling keeps the fit sane, and the predictive intervals say how
+   much to trust an extrapolation.
+
+Q: How is the next configuration chosen?
+
+A: The candidate whose prediction has the most parameter uncertainty,
+   per node-second it would cost to run. Several suggestions are
+   picked greedily, each one assuming the previous ones were run, so
+   they don't all land on the same spot.
+"""
+
+import logging
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from analysis.cost_model import (
+    CostModel,
+    DEFAULT_MESH_DEGREE,
+    candidate_grid,
+    observations_from_runs,
+)
+from archive.archive import ArchivedRun, list_runs, load_run, save_run
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Only the tables the model uses are loaded (skips e.g.: log events)
+MODEL_TABLES = ["bandwidth", "spans", "probes"]
+
+# "What would it cost" questions (per-node egress)
+QUERIES = [
+    {"num_nodes": 1000, "payload_size_bytes": 10 * 1024, "rate_msgs_per_s": 50},
+    {"num_nodes": 1000, "payload_size_bytes": 1024, "rate_msgs_per_s": 10},
+    {"num_nodes": 200, "payload_size_bytes": 100 * 1024, "rate_msgs_per_s": 1},
+]
+
+# Configurations that could be run next
+CANDIDATE_NODE_COUNTS = [10, 20, 50, 100, 200]
+CANDIDATE_PAYLOAD_SIZES = [64, 1024, 16 * 1024, 128 * 1024]
+CANDIDATE_RATES = [1, 10, 50, 200]
+CANDIDATE_MESH_DEGREES = (4, DEFAULT_MESH_DEGREE, 8, 12)
+NUM_SUGGESTIONS = 5
+# Seconds a candidate run takes, to weigh its cost in node-seconds
+CANDIDATE_RUN_S = 60
+
+# Extrapolation plot
+PLOT_NODE_COUNTS = np.geomspace(10, 2000, 40).round().astype(int)
+PLOT_PAYLOAD_SIZES = [1024, 10 * 1024, 100 * 1024]
+PLOT_RATE = 50
+
+
+def load_model_runs() -> list[ArchivedRun]:
+    runs = []
+    for path in list_runs():
+        tables = [
+            name
+            for name in MODEL_TABLES
+            if os.path.isfile(os.path.join(path, f"{name}.csv"))
+        ]
+        runs.append(load_run(path, tables=tables))
+    return runs
+
+
+def plot_model(model: CostModel, observations: pd.DataFrame, filename: str):
+    logger.info(f"Plotting cost model to {filename}...")
+    sns.set_theme(style="whitegrid")
+    fig, (ax_fit, ax_extrapolation) = plt.subplots(1, 2, figsize=(18, 8))
+
+    fitted = model.predict(observations)
+    ax_fit.scatter(
+        fitted["egress_bytes_per_message"], fitted["bytes_per_message_median"]
+    )
+    bounds = [
+        fitted[["egress_bytes_per_message", "bytes_per_message_median"]].min().min(),
+        fitted[["egress_bytes_per_message", "bytes_per_message_median"]].max().max(),
+    ]
+    ax_fit.plot(bounds, bounds, color="grey", linestyle="--")
+    ax_fit.set_xscale("log")
+    ax_fit.set_yscale("log")
+    ax_fit.set_title("Egress Bytes per Message: Fitted vs. Observed", fontsize=14)
+    ax_fit.set_xlabel("Observed (bytes)", fontsize=12)
+    ax_fit.set_ylabel("Fitted median (bytes)", fontsize=12)
+
+    for payload_size in PLOT_PAYLOAD_SIZES:
+        configs = pd.DataFrame(
+            {
+                "num_nodes": PLOT_NODE_COUNTS,
+                "payload_size_bytes": payload_size,
+                "rate_msgs_per_s": PLOT_RATE,
+            }
+        )
+        predicted = model.predict(configs)
+        line = ax_extrapolation.plot(
+            predicted["num_nodes"],
+            predicted["node_egress_bps_median"] / 1024,
+            label=f"{payload_size / 1024:g} KB",
+        )[0]
+        ax_extrapolation.fill_between(
+            predicted["num_nodes"],
+            predicted["node_egress_bps_lower"] / 1024,
+            predicted["node_egress_bps_upper"] / 1024,
+            color=line.get_color(),
+            alpha=0.2,
+        )
+    ax_extrapolation.axvspan(
+        observations["num_nodes"].min(),
+        observations["num_nodes"].max(),
+        color="grey",
+        alpha=0.15,
+        label="observed N",
+    )
+    ax_extrapolation.set_xscale("log")
+    ax_extrapolation.set_yscale("log")
+    ax_extrapolation.set_title(
+        f"Predicted Per-Node Egress at {PLOT_RATE} msg/s (D = {DEFAULT_MESH_DEGREE})",
+        fontsize=14,
+    )
+    ax_extrapolation.set_xlabel("Number of Nodes", fontsize=12)
+    ax_extrapolation.set_ylabel("Egress per Node (KB/s)", fontsize=12)
+    ax_extrapolation.legend()
+
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    logger.info("Starting 'Bandwidth Cost Model' session.")
+
+    observations = observations_from_runs(load_model_runs())
+    logger.info(f"{len(observations)} observations from the archived runs")
+    model = CostModel.fit(observations)
+    usable = observations.dropna()
+    usable = usable.loc[usable["egress_bytes_per_message"] > 0]
+    logger.info(
+        f"Fitted on {model.num_observations} observations, "
+        f"per-message overhead {model.overhead_bytes:g} bytes, "
+        f"log noise std {np.sqrt(model.noise_variance):.2f}\n"
+        f"{model.coefficients().round(3)}"
+    )
+
+    queries = model.predict(pd.DataFrame(QUERIES))
+    for query in queries.to_dict("records"):
+        logger.info(
+            f"N = {query['num_nodes']}, {query['payload_size_bytes']} bytes, "
+            f"{query['rate_msgs_per_s']} msg/s: per-node egress "
+            f"{query['node_egress_bps_median'] / 1024:.1f} KB/s "
+            f"(90% interval {query['node_egress_bps_lower'] / 1024:.1f}"
+            f"-{query['node_egress_bps_upper'] / 1024:.1f} KB/s)"
+        )
+
+    candidates = candidate_grid(
+        CANDIDATE_NODE_COUNTS,
+        CANDIDATE_PAYLOAD_SIZES,
+        CANDIDATE_RATES,
+        CANDIDATE_MESH_DEGREES,
+    )
+    candidates["node_seconds"] = candidates["num_nodes"] * CANDIDATE_RUN_S
+    suggestions = model.suggest(candidates, k=NUM_SUGGESTIONS, cost="node_seconds")
+    logger.info(f"Most informative next runs:\n{suggestions.to_string()}")
+
+    plot_model(model, usable, "results/cost_model.png")
+
+    save_run(
+        "cost_model",
+        params={
+            "queries": QUERIES,
+            "candidate_run_s": CANDIDATE_RUN_S,
+            "num_suggestions": NUM_SUGGESTIONS,
+        },
+        tables={
+            "observations": observations,
+            "coefficients": model.coefficients().reset_index(),
+            "queries": queries,
+            "suggestions": suggestions,
+        },
+        summary={
+            "num_observations": model.num_observations,
+            "overhead_bytes": model.overhead_bytes,
+            "log_evidence": model.log_evidence,
+        },
+    )
+    logger.info("Session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,365 @@
+"""
+Image version regression check
+
+Runs the same experiment spec against two or more nwaku image tags and
+reports whether a candidate tag regressed compared to the baseline
+(first) tag.
+
+Design Decisions:
+-----------------------
+Q: Why pin the image digests and never pull?
+
+A: A tag like `latest` points to a different image over time, which
+   makes runs irreproducible. Every tag is resolved once to its digest
+   in the local image store and all trials run that exact image. The
+   images have to be preloaded (`docker pull <tag>` or `docker load`),
+   so no network access is needed while the check runs.
+
+Q: Why several trials per tag, interleaved?
+
+A: A single run can't tell a regression apart from noise. The trials
+   of each tag are compared with a Mann-Whitney U test, which makes no
+   normality assumption. Interleaving the tags (A, B, A, B...) keeps a
+   slow drift of the host (e.g.: thermal, other load) from biasing one
+   of them.
+
+Q: Why must a change be both over the threshold and significant?
+
+A: Significance alone flags tiny but consistent changes nobody cares
+   about, and the threshold alone flags noise.
+
+Q: How is the host kept from adding noise between trials?
+
+A: The nodes, the Docker daemon and the harness would otherwise compete
+   for the same cores, and nim-libp2p's bandwidth and delays change
+   under CPU contention. A few cores are kept for the harness, every
+   node is pinned to its own share of the others and its memory is
+   capped (`HARNESS_CORES`, `NODE_MEMORY_BYTES`). The host's load is recorded during every trial,
+   and trials it contended anyway (`analysis.noise`) are archived but
+   left out of the comparison.
+"""
+
+import logging
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict
+
+import docker
+import pandas as pd
+
+from analysis.noise import noise_check
+from analysis.stats import mann_whitney_u, relative_change
+from archive.archive import save_run
+from harness.gateway import MetricsGateway
+from harness.lifecycle import PUBSUB_TOPIC, run_experiment_lifecycle
+from mesh.resources import NodeResources, ResourcePlan
+from mesh.utils import resolve_image_digest
+from nwaku import client
+from nwaku.delivery import DeliveryTracker
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Baseline tag first, then the candidates
+IMAGE_TAGS = [
+    "wakuorg/nwaku:v0.35.1",
+    "wakuorg/nwaku:v0.36.0",
+]
+# At least 4 trials per tag are needed to reach p < 0.05
+NUM_TRIALS = 5
+
+# Experiment spec
+NUM_NODES = 20
+NUM_BOOTSTRAP_NODES = 2
+CONTENT_TOPIC = "regression-content-topic"
+MESSAGES_PER_NODE = 2
+PAYLOAD_SIZE_BYTES = 1024
+DELIVERY_TIMEOUT_S = 30
+# Cores kept for the harness, the nodes are pinned to the other ones
+HARNESS_CORES = 2
+NODE_MEMORY_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+# Maximum accepted relative increase of each metric's median. All of
+# them are "lower is better".
+REGRESSION_THRESHOLDS = {
+    "net_bandwidth_bytes": 0.10,
+    "amplification": 0.10,
+    "delay_p50_s": 0.20,
+    "delay_p99_s": 0.25,
+    "cpu_seconds_per_message": 0.15,
+}
+SIGNIFICANCE_LEVEL = 0.05
+# Candidates must also deliver (almost) every message to every node
+MIN_DELIVERY_RATIO = 0.999
+
+
+@dataclass
+class TagResults:
+    tag: str
+    digest: str
+    trials: list[dict] = field(default_factory=list)
+    delays: list[pd.DataFrame] = field(default_factory=list)
+
+
+def total_cpu_seconds(gateway: MetricsGateway) -> float:
+    """Sums `process_cpu_seconds_total` over all nodes, scraped right now."""
+    gateway.refresh(max_age_s=0)
+    metrics, errors = gateway.query(names=["process_cpu_seconds_total"])
+    if errors:
+        raise client.WakuClientException(f"CPU time not scraped: {errors}")
+    return sum(metric["value"] for metric in metrics)
+
+
+def publish_and_track(
+    waku_clients: Dict[str, client.WakuClient],
+    gateway: MetricsGateway,
+    trial: dict,
+    delays: list,
+):
+    """
+    The publishing scenario of the regression spec.
+
+    Every node publishes `MESSAGES_PER_NODE` messages concurrently, then
+    it waits for all of them to be delivered everywhere. The CPU spent
+    by all nodes during this window is recorded in `trial`.
+    """
+    payload = "a" * PAYLOAD_SIZE_BYTES  # `a` == 1 byte
+    publish_tasks = [
+        node_id for node_id in waku_clients for _ in range(MESSAGES_PER_NODE)
+    ]
+    random.shuffle(publish_tasks)
+
+    with DeliveryTracker(waku_clients, PUBSUB_TOPIC) as tracker:
+        cpu_before = total_cpu_seconds(gateway)
+        logger.info(f"Publishing {len(publish_tasks)} tracked messages...")
+        with ThreadPoolExecutor() as executor:
+            list(
+                executor.map(
+                    lambda node_id: tracker.publish(node_id, payload, CONTENT_TOPIC),
+                    publish_tasks,
+                )
+            )
+        tracker.wait_for_delivery(DELIVERY_TIMEOUT_S)
+        cpu_after = total_cpu_seconds(gateway)
+
+    trial["num_messages"] = len(publish_tasks)
+    trial["cpu_seconds"] = cpu_after - cpu_before
+    trial["delivery_ratio"] = tracker.delivery_ratio()
+    delays.append(tracker.delays_df())
+
+
+def trial_metrics(trial: dict, bandwidth_df: pd.DataFrame, delays_df: pd.DataFrame):
+    """Computes the compared metrics of a single trial."""
+    agg_df = bandwidth_df.groupby(["node", "direction"])["total_bytes"].agg(
+        ["max", "min"]
+    )
+    net_bandwidth = (agg_df["max"] - agg_df["min"]).sum()
+    # payload bytes that had to reach every other node
+    useful_bytes = trial["num_messages"] * PAYLOAD_SIZE_BYTES * (NUM_NODES - 1)
+    delay = delays_df["delay_s"].dropna()
+
+    trial["net_bandwidth_bytes"] = net_bandwidth
+    trial["amplification"] = net_bandwidth / useful_bytes
+    trial["delay_p50_s"] = delay.quantile(0.5) if len(delay) else float("nan")
+    trial["delay_p99_s"] = delay.quantile(0.99) if len(delay) else float("nan")
+    trial["cpu_seconds_per_message"] = trial["cpu_seconds"] / trial["num_messages"]
+
+
+def compare(baseline: TagResults, candidate: TagResults) -> pd.DataFrame:
+    """
+    Compares every metric of `candidate` against `baseline`.
+
+    Delay quantiles are tested on the pooled per-message delays of all
+    trials, the other metrics on their per-trial values.
+    """
+    baseline_df = pd.DataFrame(baseline.trials)
+    candidate_df = pd.DataFrame(candidate.trials)
+    baseline_delays = pd.concat(baseline.delays)["delay_s"].dropna()
+    candidate_delays = pd.concat(candidate.delays)["delay_s"].dropna()
+
+    rows = []
+    for metric, threshold in REGRESSION_THRESHOLDS.items():
+        if metric.startswith("delay_"):
+            p_value = _p_value(baseline_delays, candidate_delays)
+        else:
+            p_value = _p_value(baseline_df[metric], candidate_df[metric])
+        change = relative_change(baseline_df[metric], candidate_df[metric])
+        regressed = change > threshold and p_value < SIGNIFICANCE_LEVEL
+        rows.append(
+            {
+                "baseline": baseline.tag,
+                "candidate": candidate.tag,
+                "metric": metric,
+                "baseline_median": baseline_df[metric].median(),
+                "candidate_median": candidate_df[metric].median(),
+                "relative_change": change,
+                "threshold": threshold,
+                "p_value": p_value,
+                "passed": not regressed,
+            }
+        )
+
+    candidate_delivery = candidate_df["delivery_ratio"].min()
+    rows.append(
+        {
+            "baseline": baseline.tag,
+            "candidate": candidate.tag,
+            "metric": "delivery_ratio (min)",
+            "baseline_median": baseline_df["delivery_ratio"].min(),
+            "candidate_median": candidate_delivery,
+            "relative_change": relative_change(
+                baseline_df["delivery_ratio"], candidate_df["delivery_ratio"]
+            ),
+            "threshold": MIN_DELIVERY_RATIO - 1,
+            "p_value": float("nan"),
+            "passed": candidate_delivery >= MIN_DELIVERY_RATIO,
+        }
+    )
+    return pd.DataFrame(rows)
+
+
+def _p_value(baseline, candidate) -> float:
+    if len(baseline) == 0 or len(candidate) == 0:
+        return float("nan")
+    _, p_value = mann_whitney_u(baseline, candidate)
+    return p_value
+
+
+def print_report(comparison_df: pd.DataFrame):
+    print()
+    print("=" * 100)
+    print("nwaku image regression report")
+    print("=" * 100)
+    for candidate, rows in comparison_df.groupby("candidate", sort=False):
+        print(f"\n{rows['baseline'].iloc[0]} -> {candidate}")
+        for row in rows.to_dict("records"):
+            status = "PASS" if row["passed"] else "FAIL"
+            print(
+                f"  [{status}] {row['metric']:<26} "
+                f"{row['baseline_median']:>14.6g} -> {row['candidate_median']:<14.6g} "
+                f"{row['relative_change']:>+8.1%} (limit {row['threshold']:+.1%}, "
+                f"p={row['p_value']:.3f})"
+            )
+    overall = "PASS" if bool(comparison_df["passed"].all()) else "FAIL"
+    print(f"\nOverall: {overall}")
+    print("=" * 100)
+
+
+def main() -> bool:
+    logger.info("Starting nwaku image regression session.")
+
+    # resolve every tag once, from the local image store only
+    docker_client = docker.from_env()
+    results = []
+    for tag in IMAGE_TAGS:
+        digest = resolve_image_digest(docker_client, tag)
+        logger.info(f"Pinned {tag} to {digest}")
+        results.append(TagResults(tag, digest))
+    docker_client.close()
+
+    resources = ResourcePlan(
+        harness_cores=HARNESS_CORES,
+        pin_nodes=True,
+        limits=NodeResources(memory_bytes=NODE_MEMORY_BYTES),
+    )
+    noisy_trials = 0
+
+    for trial_num in range(NUM_TRIALS):
+        for tag_results in results:
+            logger.info(
+                f"Running trial {trial_num + 1}/{NUM_TRIALS} for {tag_results.tag}..."
+            )
+            trial: dict = {"trial": trial_num}
+            delays: list[pd.DataFrame] = []
+            host_load: list[dict] = []
+            gateway = MetricsGateway()
+            scenario = lambda clients: publish_and_track(
+                clients, gateway, trial, delays
+            )
+            bandwidth_df = run_experiment_lifecycle(
+                NUM_NODES,
+                NUM_BOOTSTRAP_NODES,
+                scenario,
+                image_name=tag_results.digest,
+                pull_image=False,
+                gateway=gateway,
+                resources=resources,
+                host_load=host_load,
+            )
+            if bandwidth_df.empty or not delays:
+                logger.warning(f"No data for trial {trial_num} of {tag_results.tag}")
+                continue
+
+            trial_metrics(trial, bandwidth_df, delays[0])
+            noise = noise_check(pd.DataFrame(host_load))
+            trial["noisy"] = noise.noisy
+            if noise.noisy:
+                noisy_trials += 1
+                logger.warning(
+                    f"Trial {trial_num} of {tag_results.tag} left out, the host "
+                    f"was contended: {', '.join(noise.reasons)}"
+                )
+            else:
+                tag_results.trials.append(trial)
+                tag_results.delays.append(delays[0])
+            save_run(
+                "image_regression",
+                params={
+                    "image": tag_results.tag,
+                    "image_digest": tag_results.digest,
+                    "trial": trial_num,
+                    "num_nodes": NUM_NODES,
+                    "bootstrappers_num": NUM_BOOTSTRAP_NODES,
+                    "messages_per_node": MESSAGES_PER_NODE,
+                    "num_messages": trial["num_messages"],
+                    "payload_size_bytes": PAYLOAD_SIZE_BYTES,
+                },
+                tables={
+                    "bandwidth": bandwidth_df,
+                    "delays": delays[0],
+                    "host_load": pd.DataFrame(host_load),
+                },
+                summary={
+                    **trial,
+                    **{f"host_{k}_p95": v for k, v in noise.stats.items()},
+                },
+            )
+
+    missing = [tag_results.tag for tag_results in results if not tag_results.trials]
+    if missing:
+        logger.error(f"No successful trials for {missing}, can't compare.")
+        return False
+
+    baseline, candidates = results[0], results[1:]
+    comparison_df = pd.concat(
+        [compare(baseline, candidate) for candidate in candidates],
+        ignore_index=True,
+    )
+    print_report(comparison_df)
+    save_run(
+        "image_regression_report",
+        params={
+            "images": IMAGE_TAGS,
+            "image_digests": [tag_results.digest for tag_results in results],
+            "num_trials": NUM_TRIALS,
+            "thresholds": REGRESSION_THRESHOLDS,
+            "significance_level": SIGNIFICANCE_LEVEL,
+            "harness_cores": HARNESS_CORES,
+            "node_memory_bytes": NODE_MEMORY_BYTES,
+        },
+        tables={"comparison": comparison_df},
+        summary={
+            "passed": bool(comparison_df["passed"].all()),
+            "noisy_trials": noisy_trials,
+        },
+    )
+
+    logger.info("Regression session finished.")
+    return bool(comparison_df["passed"].all())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,204 @@
+"""
+Partition and recovery
+
+Runs a scenario timeline on the mesh: steady background traffic, a
+publishing burst, then a group of nodes cut off from the rest while the
+traffic goes on, and a recovery window once the partition is healed.
+Compares the bandwidth of the partitioned nodes and of the rest in
+every phase.
+
+Design Decisions:
+-----------------------
+Q: Why a timeline instead of a scenario function?
+
+A: The phases overlap (the background traffic runs through the burst
+   and the partition), and each one must be told apart in the samples.
+   The timeline starts every phase on one schedule and stamps the
+   metric samples with the phases running when they were taken, so the
+   per-phase analysis is a filter instead of a guess from wall times.
+
+Q: How is the partition made?
+
+A: With `DROP` rules on the host's `FORWARD` chain between the
+   partitioned nodes and the others (`mesh.faults.NetworkPartition`):
+   connections stall instead of being closed, like in a real network
+   split, and the harness still reaches every node's APIs.
+
+Q: What should recovery look like?
+
+A: During the partition, the cut nodes only see their own group's
+   traffic. After it is healed, gossipsub has to rebuild the mesh links
+   that were pruned while the peers were unreachable: the recovery
+   window shows how long their bandwidth takes to rejoin the rest.
+"""
+
+import logging
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from analysis.timeseries import bandwidth_rates, phase_samples
+from archive.archive import save_run
+from harness.lifecycle import WAKU_IMAGE_NAME, run_experiment_lifecycle
+from harness.timeline import Marker, Partition, SetParameter, Timeline, Traffic
+from mesh.profiling import Profiler
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Experiment config
+NUM_NODES = 20
+BOOTSTRAPPERS_NUM = 2
+PAYLOAD_SIZE = 1024  # 1 KB
+BACKGROUND_RATE = 2  # msg/s over the whole mesh
+BURST_RATE = 20  # msg/s over the whole mesh
+WARMUP_S = 60
+BURST_S = 30
+PARTITION_S = 120
+RECOVERY_S = 120
+# regular nodes cut off from the rest of the mesh
+PARTITIONED_NODES = [f"node-{i}" for i in range(5)]
+
+PHASES = ["warmup", "burst", "partition", "recovery"]
+
+
+def build_timeline() -> Timeline:
+    partition_at = WARMUP_S + BURST_S
+    recovery_at = partition_at + PARTITION_S
+    return Timeline(
+        [
+            Traffic(
+                name="traffic",
+                duration_s=recovery_at + RECOVERY_S,
+                rate_per_s=BACKGROUND_RATE,
+                payload_size_bytes=PAYLOAD_SIZE,
+            ),
+            Marker(name="warmup", duration_s=WARMUP_S),
+            SetParameter(
+                name="burst_start",
+                at_s=WARMUP_S,
+                key="traffic.rate_per_s",
+                value=BURST_RATE,
+            ),
+            Marker(name="burst", at_s=WARMUP_S, duration_s=BURST_S),
+            SetParameter(
+                name="burst_end",
+                at_s=partition_at,
+                key="traffic.rate_per_s",
+                value=BACKGROUND_RATE,
+            ),
+            Partition(
+                name="partition",
+                at_s=partition_at,
+                group=PARTITIONED_NODES,
+                duration_s=PARTITION_S,
+            ),
+            Marker(name="recovery", at_s=recovery_at, duration_s=RECOVERY_S),
+        ]
+    )
+
+
+def phase_bandwidth(bandwidth_df: pd.DataFrame) -> pd.DataFrame:
+    """Mean byte rate (in + out) per node of each group, in every phase."""
+    rows = []
+    for phase in PHASES:
+        samples = phase_samples(bandwidth_df, phase)
+        samples = samples.loc[samples["total_bytes"].notna()]
+        if samples.empty:
+            continue
+        rates = bandwidth_rates(samples)
+        rates["group"] = rates["node"].map(
+            lambda node: "partitioned" if node in PARTITIONED_NODES else "rest"
+        )
+        for group, group_rates in rates.groupby("group"):
+            rows.append(
+                {
+                    "phase": phase,
+                    "group": group,
+                    "mean_node_rate_bps": group_rates["rate_bps"].mean(),
+                    "samples": len(group_rates),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def plot_phase_bandwidth(summary_df: pd.DataFrame, filename: str):
+    logger.info(f"Plotting per-phase bandwidth to {filename}...")
+    sns.set_theme(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(12, 7))
+    sns.barplot(
+        data=summary_df.assign(
+            mean_node_rate_kbps=summary_df["mean_node_rate_bps"] / 1024
+        ),
+        x="phase",
+        y="mean_node_rate_kbps",
+        hue="group",
+        order=PHASES,
+        ax=ax,
+    )
+    ax.set_title(
+        f"Bandwidth per Phase ({len(PARTITIONED_NODES)} of {NUM_NODES} nodes "
+        f"partitioned for {PARTITION_S}s)",
+        fontsize=16,
+    )
+    ax.set_xlabel("Phase", fontsize=12)
+    ax.set_ylabel("Mean Bandwidth per Node (KB/s, in + out)", fontsize=12)
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    logger.info("Starting 'Partition and Recovery' experiment session.")
+
+    timeline = build_timeline()
+    profiler = Profiler()
+    bandwidth_df = run_experiment_lifecycle(
+        NUM_NODES,
+        BOOTSTRAPPERS_NUM,
+        timeline,
+        profiler=profiler,
+    )
+    if bandwidth_df.empty:
+        logger.warning("No bandwidth data collected.")
+        return
+
+    summary_df = phase_bandwidth(bandwidth_df)
+    logger.info(f"Bandwidth per phase:\n{summary_df.to_string(index=False)}")
+
+    plot_phase_bandwidth(summary_df, "results/partition_recovery.png")
+
+    save_run(
+        "partition_recovery",
+        params={
+            "image": WAKU_IMAGE_NAME,
+            "num_nodes": NUM_NODES,
+            "bootstrappers_num": BOOTSTRAPPERS_NUM,
+            "payload_size_bytes": PAYLOAD_SIZE,
+            "background_rate_msgs_per_s": BACKGROUND_RATE,
+            "burst_rate_msgs_per_s": BURST_RATE,
+            "partitioned_nodes": PARTITIONED_NODES,
+            "phases_s": {
+                "warmup": WARMUP_S,
+                "burst": BURST_S,
+                "partition": PARTITION_S,
+                "recovery": RECOVERY_S,
+            },
+        },
+        tables={
+            "bandwidth": bandwidth_df,
+            "phase_bandwidth": summary_df,
+            "spans": profiler.to_dataframe(),
+        },
+        summary={
+            f"{row['phase']}_{row['group']}_rate_bps": row["mean_node_rate_bps"]
+            for row in summary_df.to_dict("records")
+        },
+    )
+    logger.info("Experiment session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,176 @@
+"""
+Soak test
+
+Keeps a mesh under steady background traffic for hours and follows the
+memory, streams and peers of every node, to catch the slow leaks that
+runs of a couple of minutes never show.
+
+Design Decisions:
+-----------------------
+Q: How does the harness itself not grow over hours?
+
+A: The soak metrics are not kept sample by sample: `SoakMonitor` folds
+   them into tiered rollups (1s -> 10s -> 1 min buckets), each tier
+   keeping a bounded number of buckets per node. The lifecycle's
+   bandwidth poller, which keeps every sample, only samples once a
+   minute (`BANDWIDTH_POLL_INTERVAL_S`), and the traffic is published
+   in chunks, so none of them depend on the soak duration.
+
+Q: How is a leak told from a warm-up?
+
+A: Trends are fitted online on the 1 min buckets of every node. A node
+   is flagged when its memory (or open streams) grows significantly,
+   faster than a few percent per hour, *and* still grows over the last
+   tens of minutes. Memory that grows while caches fill up and then
+   plateaus is not a leak.
+
+Q: Why publish from every node in turn?
+
+A: All nodes then relay and originate messages, like a relay of a real
+   network, instead of a single publisher whose REST server would be
+   the only one exercised.
+"""
+
+import logging
+from typing import Dict
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from archive.archive import save_run
+from harness.gateway import MetricsGateway
+from harness.lifecycle import PUBSUB_TOPIC, WAKU_IMAGE_NAME, run_experiment_lifecycle
+from harness.sampling import SamplingPolicy
+from harness.soak import SoakMonitor
+from harness.traffic import publish_steadily
+from nwaku import client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Experiment config
+NUM_NODES = 20
+BOOTSTRAPPERS_NUM = 2
+CONTENT_TOPIC = "soak-content-topic"
+SOAK_DURATION_S = 4 * 60 * 60
+PUBLISH_RATE = 2  # msg/s over the whole mesh
+PAYLOAD_SIZE = 1024  # 1 KB
+# The lifecycle keeps every bandwidth sample, so it samples rarely
+BANDWIDTH_POLL_INTERVAL_S = 60
+
+PLOT_METRICS = ["nim_gc_mem_occupied_bytes", "libp2p_open_streams"]
+
+
+def run_soak(
+    waku_clients: Dict[str, client.WakuClient],
+    gateway: MetricsGateway,
+    monitor_out: list[SoakMonitor],
+    traffic_out: list[dict],
+):
+    """The scenario: hours of steady traffic while the soak monitor samples."""
+    payload = "a" * PAYLOAD_SIZE  # `a` == 1 byte
+    node_ids = list(waku_clients)
+
+    def _publish(i: int):
+        message = client.create_waku_message(payload, CONTENT_TOPIC)
+        # one missed publish isn't retried, the next one is due soon
+        waku_clients[node_ids[i % len(node_ids)]].publish_message(
+            PUBSUB_TOPIC, message, attempts=1
+        )
+
+    monitor = SoakMonitor(gateway)
+    monitor_out.append(monitor)
+    logger.info(f"Soaking for {SOAK_DURATION_S / 3600:g}h at {PUBLISH_RATE} msg/s...")
+    with monitor:
+        results = publish_steadily(_publish, PUBLISH_RATE, SOAK_DURATION_S)
+    traffic_out.extend(vars(result) for result in results)
+
+
+def plot_soak(rollup_df: pd.DataFrame, flagged_nodes: set[str], filename: str):
+    logger.info(f"Plotting soak metrics to {filename}...")
+    sns.set_theme(style="whitegrid")
+    fig, axes = plt.subplots(len(PLOT_METRICS), 1, figsize=(14, 10), sharex=True)
+
+    start = rollup_df["start"].min()
+    for ax, metric in zip(axes, PLOT_METRICS):
+        metric_df = rollup_df[rollup_df["metric"] == metric]
+        for node_id, node_df in metric_df.groupby("node"):
+            flagged = node_id in flagged_nodes
+            ax.plot(
+                (node_df["start"] - start) / 3600,
+                node_df["mean"],
+                color="red" if flagged else "grey",
+                alpha=1.0 if flagged else 0.4,
+                label=node_id if flagged else None,
+            )
+        ax.set_title(metric, fontsize=14)
+        if flagged_nodes & set(metric_df["node"]):
+            ax.legend(title="Flagged nodes")
+    axes[-1].set_xlabel("Time (hours)", fontsize=12)
+    fig.suptitle("Soak: Per-Node Trends (1 min means)", fontsize=16)
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    logger.info("Starting 'Soak' experiment session.")
+
+    monitors: list[SoakMonitor] = []
+    traffic: list[dict] = []
+    gateway = MetricsGateway()
+    bandwidth_df = run_experiment_lifecycle(
+        NUM_NODES,
+        BOOTSTRAPPERS_NUM,
+        lambda clients: run_soak(clients, gateway, monitors, traffic),
+        sampling=SamplingPolicy(BANDWIDTH_POLL_INTERVAL_S),
+        gateway=gateway,
+    )
+    monitor = monitors[0]
+
+    trends_df = monitor.detector.report()
+    flagged = monitor.detector.flagged()
+    flagged_nodes = {status.key[0] for status in flagged}
+    for status in flagged:
+        node_id, metric = status.key
+        logger.warning(
+            f"{node_id}: {metric} grows {status.relative_growth_per_hour:.1%}/h "
+            f"(t = {status.slope_t_stat:.1f}), still "
+            f"{status.recent_slope_per_hour:.0f}/h recently"
+        )
+    logger.info(f"{len(flagged_nodes)} of {NUM_NODES} nodes flagged as leaking")
+
+    minutes_df = monitor.rollup.to_dataframe(2)
+    plot_soak(minutes_df, flagged_nodes, "results/soak_trends.png")
+
+    save_run(
+        "soak",
+        params={
+            "image": WAKU_IMAGE_NAME,
+            "num_nodes": NUM_NODES,
+            "bootstrappers_num": BOOTSTRAPPERS_NUM,
+            "soak_duration_s": SOAK_DURATION_S,
+            "rate_msgs_per_s": PUBLISH_RATE,
+            "payload_size_bytes": PAYLOAD_SIZE,
+            "tiers": [vars(tier) for tier in monitor.rollup.tiers],
+        },
+        tables={
+            "rollup_10s": monitor.rollup.to_dataframe(1),
+            "rollup_1min": minutes_df,
+            "trends": trends_df,
+            "traffic": pd.DataFrame(traffic),
+            "bandwidth": bandwidth_df,
+        },
+        summary={
+            "flagged_nodes": sorted(flagged_nodes),
+            "flagged_series": [list(status.key) for status in flagged],
+            "missed_samples": monitor.gaps,
+        },
+    )
+    logger.info("Experiment session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
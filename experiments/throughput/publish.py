@@ -0,0 +1,397 @@
+"""
+Publisher-side throughput of the REST relay API
+
+How many `POST /relay/v1/messages` per second can a node take before
+its REST latency or error rate goes up?
+
+Design Decisions:
+-----------------------
+Q: Why ramp the number of concurrent publishers instead of a fixed
+   request rate?
+
+A: Each publisher sends its next request as soon as the previous one
+   returns (closed loop). While the node keeps up, adding publishers
+   increases the throughput. Once it saturates, the throughput stops
+   growing and the extra publishers only queue up, increasing latency.
+   The point where that happens is the saturation knee.
+
+Q: Why disable the client retries?
+
+A: Retries hide failed requests and inflate the measured latency with
+   the retry sleeps. Here every failure is a data point.
+
+Q: Why a few target nodes in a mesh instead of a single container?
+
+A: Relay publishing needs peers to propagate the messages to, otherwise
+   the node does not do the work it does in production.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from requests.adapters import HTTPAdapter
+
+from archive.archive import save_run
+from harness.gateway import MetricsGateway
+from harness.lifecycle import (
+    PUBSUB_TOPIC,
+    WAKU_IMAGE_NAME,
+    run_experiment_lifecycle,
+)
+from nwaku import client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Experiment config
+NUM_NODES = 4
+NUM_BOOTSTRAP_NODES = 1
+# Nodes receiving the publish requests (the others only relay)
+NUM_TARGET_NODES = 1
+CONTENT_TOPIC = "publish-throughput-content-topic"
+
+STEP_DURATION_S = 10
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16, 32, 64]
+PAYLOAD_SIZES = [
+    1,  # 1 byte
+    1 * 1024,  # 1 KB
+    16 * 1024,  # 16 KB
+    128 * 1024,  # 128 KB
+]
+
+# Latency histogram buckets: 0.1 ms up to 10 s, log spaced
+LATENCY_BUCKETS_S = np.logspace(-4, 1, 26)
+
+# Saturation knee criteria: adding concurrency must improve throughput
+# by at least this ratio, without going over the error rate
+KNEE_MIN_THROUGHPUT_GAIN = 0.10
+KNEE_MAX_ERROR_RATE = 0.01
+# Stop ramping a payload size once the node fails this much
+ABORT_ERROR_RATE = 0.5
+
+PRESTO_METRICS_PREFIX = "presto_server_"
+
+
+def snapshot_presto_metrics(
+    gateway: MetricsGateway, target_ids: list[str]
+) -> dict[tuple[str, str, str], float]:
+    """Returns the current `presto_server_*` metrics of the target nodes."""
+    metrics, errors = gateway.query(
+        prefix=PRESTO_METRICS_PREFIX, nodes=target_ids, max_age_s=0
+    )
+    for node_id, error in errors.items():
+        logger.warning(f"No presto metrics for {node_id}: {error}")
+
+    snapshot = {}
+    for metric in metrics:
+        labels = ",".join(f"{k}={v}" for k, v in sorted(metric["labels"].items()))
+        snapshot[(metric["node"], metric["name"], labels)] = metric["value"]
+    return snapshot
+
+
+def run_step(
+    targets: Dict[str, client.WakuClient],
+    payload_size: int,
+    concurrency: int,
+    duration_s: float,
+) -> list[dict]:
+    """
+    Runs `concurrency` closed-loop publishers for `duration_s` seconds.
+
+    Publishers are spread over the target nodes. Returns one record per
+    request with its latency and outcome.
+    """
+    payload = "a" * payload_size  # `a` == 1 byte
+    target_items = list(targets.items())
+    deadline = time.monotonic() + duration_s
+
+    def _publisher(publisher_idx: int) -> list[dict]:
+        node_id, waku_client = target_items[publisher_idx % len(target_items)]
+        requests_records = []
+        while time.monotonic() < deadline:
+            msg = client.create_waku_message(
+                payload=payload, content_topic=CONTENT_TOPIC
+            )
+            error = None
+            start = time.perf_counter()
+            try:
+                waku_client.publish_message(PUBSUB_TOPIC, msg, attempts=1)
+            except client.WakuClientException as e:
+                error = str(e)
+            requests_records.append(
+                {
+                    "timestamp": time.time(),
+                    "node": node_id,
+                    "payload_size_bytes": payload_size,
+                    "concurrency": concurrency,
+                    "latency_s": time.perf_counter() - start,
+                    "ok": error is None,
+                    "error": error,
+                }
+            )
+        return requests_records
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = executor.map(_publisher, range(concurrency))
+        return [record for records in results for record in records]
+
+
+def summarize_step(requests_df: pd.DataFrame, duration_s: float) -> dict:
+    latencies = requests_df.loc[requests_df["ok"], "latency_s"]
+    num_requests = len(requests_df)
+    num_errors = num_requests - len(latencies)
+    quantiles = latencies.quantile([0.5, 0.9, 0.99]) if len(latencies) else None
+    return {
+        "requests": num_requests,
+        "errors": num_errors,
+        "error_rate": num_errors / num_requests if num_requests else 0.0,
+        "throughput_rps": len(latencies) / duration_s,
+        "latency_p50_s": quantiles[0.5] if quantiles is not None else np.nan,
+        "latency_p90_s": quantiles[0.9] if quantiles is not None else np.nan,
+        "latency_p99_s": quantiles[0.99] if quantiles is not None else np.nan,
+        "latency_max_s": latencies.max() if len(latencies) else np.nan,
+    }
+
+
+def latency_histogram(requests_df: pd.DataFrame) -> list[dict]:
+    """Bins the latencies of successful requests into `LATENCY_BUCKETS_S`."""
+    latencies = requests_df.loc[requests_df["ok"], "latency_s"].to_numpy()
+    counts, edges = np.histogram(latencies, bins=LATENCY_BUCKETS_S)
+    return [
+        {"bucket_start_s": start, "bucket_end_s": end, "count": int(count)}
+        for start, end, count in zip(edges[:-1], edges[1:], counts)
+    ]
+
+
+def find_saturation_knee(steps_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Finds, for each payload size, the highest concurrency level the node
+    still scales to.
+
+    Walking up the concurrency ramp, the knee is the last level before
+    either the throughput gain drops below `KNEE_MIN_THROUGHPUT_GAIN` or
+    the error rate goes over `KNEE_MAX_ERROR_RATE`. It's NaN if the error
+    rate was over it from the first level on.
+    """
+    knees = []
+    for payload_size, group in steps_df.groupby("payload_size_bytes"):
+        steps = group.sort_values("concurrency").to_dict("records")
+        knee = None
+        for prev, step in zip([None, *steps], steps):
+            if step["error_rate"] > KNEE_MAX_ERROR_RATE:
+                break
+            if prev is not None and prev["throughput_rps"] > 0:
+                gain = step["throughput_rps"] / prev["throughput_rps"] - 1
+                if gain < KNEE_MIN_THROUGHPUT_GAIN:
+                    break
+            knee = step
+
+        # no knee if even the first level failed too often
+        knees.append(
+            {
+                "payload_size_bytes": payload_size,
+                "knee_concurrency": knee["concurrency"] if knee is not None else np.nan,
+                "knee_throughput_rps": (
+                    knee["throughput_rps"] if knee is not None else np.nan
+                ),
+                "knee_latency_p99_s": (
+                    knee["latency_p99_s"] if knee is not None else np.nan
+                ),
+                "max_throughput_rps": group["throughput_rps"].max(),
+            }
+        )
+    return pd.DataFrame(knees)
+
+
+def ramp_publish_load(
+    waku_clients: Dict[str, client.WakuClient],
+    gateway: MetricsGateway,
+    steps: list[dict],
+    requests_records: list[dict],
+    histogram_records: list[dict],
+    presto_records: list[dict],
+):
+    """
+    The publishing scenario for this experiment.
+
+    For each payload size, ramps the number of concurrent publishers
+    against the target nodes, recording every request and the
+    `presto_server_*` metrics of the targets around each step.
+    """
+    targets = dict(list(waku_clients.items())[:NUM_TARGET_NODES])
+    for waku_client in targets.values():
+        # One pooled connection per publisher, otherwise the extra
+        # connections are re-opened for every request
+        waku_client.session.mount(
+            "http://", HTTPAdapter(pool_maxsize=max(CONCURRENCY_LEVELS))
+        )
+
+    for payload_size in PAYLOAD_SIZES:
+        for concurrency in CONCURRENCY_LEVELS:
+            logger.info(
+                f"Publishing {payload_size} byte messages with "
+                f"{concurrency} concurrent publishers for {STEP_DURATION_S}s..."
+            )
+            presto_before = snapshot_presto_metrics(gateway, list(targets))
+            step_records = run_step(targets, payload_size, concurrency, STEP_DURATION_S)
+            presto_after = snapshot_presto_metrics(gateway, list(targets))
+
+            step_df = pd.DataFrame(step_records)
+            step = {
+                "payload_size_bytes": payload_size,
+                "concurrency": concurrency,
+                **summarize_step(step_df, STEP_DURATION_S),
+            }
+            steps.append(step)
+            requests_records.extend(step_records)
+            for bucket in latency_histogram(step_df):
+                histogram_records.append(
+                    {
+                        "payload_size_bytes": payload_size,
+                        "concurrency": concurrency,
+                        **bucket,
+                    }
+                )
+            for key, after in presto_after.items():
+                node_id, metric_name, labels = key
+                # not scraped before the step (failed scrape): unknown, not 0
+                before = presto_before.get(key, float("nan"))
+                presto_records.append(
+                    {
+                        "payload_size_bytes": payload_size,
+                        "concurrency": concurrency,
+                        "node": node_id,
+                        "metric": metric_name,
+                        "labels": labels,
+                        "before": before,
+                        "after": after,
+                        "delta": after - before,
+                    }
+                )
+
+            logger.info(
+                f"{step['throughput_rps']:.1f} req/s, "
+                f"p99 {step['latency_p99_s'] * 1000:.1f} ms, "
+                f"error rate {step['error_rate']:.2%}"
+            )
+            if step["error_rate"] > ABORT_ERROR_RATE:
+                logger.warning(
+                    f"Node is failing most requests, skipping higher "
+                    f"concurrency levels for {payload_size} byte messages"
+                )
+                break
+
+
+def plot_throughput_and_latency(steps_df: pd.DataFrame, filename: str):
+    logger.info(f"Plotting throughput and latency to {filename}...")
+    plot_df = steps_df.assign(latency_p99_ms=steps_df["latency_p99_s"] * 1000)
+    sns.set_theme(style="whitegrid")
+    fig, (ax_throughput, ax_latency) = plt.subplots(1, 2, figsize=(16, 7))
+    sns.lineplot(
+        x="concurrency",
+        y="throughput_rps",
+        hue="payload_size_bytes",
+        data=plot_df,
+        marker="o",
+        palette="tab10",
+        ax=ax_throughput,
+    )
+    ax_throughput.set_xscale("log", base=2)
+    ax_throughput.set_title("Publish Throughput", fontsize=16)
+    ax_throughput.set_xlabel("Concurrent Publishers", fontsize=12)
+    ax_throughput.set_ylabel("Successful Requests / s", fontsize=12)
+
+    sns.lineplot(
+        x="concurrency",
+        y="latency_p99_ms",
+        hue="payload_size_bytes",
+        data=plot_df,
+        marker="o",
+        palette="tab10",
+        ax=ax_latency,
+    )
+    ax_latency.set_xscale("log", base=2)
+    ax_latency.set_yscale("log")
+    ax_latency.set_title("Publish Latency (p99)", fontsize=16)
+    ax_latency.set_xlabel("Concurrent Publishers", fontsize=12)
+    ax_latency.set_ylabel("Latency (ms)", fontsize=12)
+
+    fig.savefig(filename)
+    plt.close(fig)
+    logger.info(f"Plot saved to {filename}")
+
+
+def main():
+    # TODO: accept cmd args
+    logger.info("Starting 'Publish Throughput' benchmark session.")
+
+    steps: list[dict] = []
+    requests_records: list[dict] = []
+    histogram_records: list[dict] = []
+    presto_records: list[dict] = []
+
+    gateway = MetricsGateway()
+    scenario = lambda clients: ramp_publish_load(
+        clients, gateway, steps, requests_records, histogram_records, presto_records
+    )
+    # the targets are overloaded on purpose: an open circuit would fail
+    # the publishes locally, and the benchmark would measure the breaker
+    bandwidth_df = run_experiment_lifecycle(
+        NUM_NODES, NUM_BOOTSTRAP_NODES, scenario, gateway=gateway, breakers=False
+    )
+
+    if not steps:
+        logger.warning("No publish steps were run.")
+        return
+
+    steps_df = pd.DataFrame(steps)
+    knees_df = find_saturation_knee(steps_df)
+    for knee in knees_df.to_dict("records"):
+        if pd.isna(knee["knee_concurrency"]):
+            logger.warning(
+                f"No saturation knee for {knee['payload_size_bytes']} byte messages: "
+                f"over {KNEE_MAX_ERROR_RATE:.0%} errors from the first level on"
+            )
+            continue
+        logger.info(
+            f"Saturation knee for {knee['payload_size_bytes']} byte messages: "
+            f"{knee['knee_concurrency']:.0f} publishers, "
+            f"{knee['knee_throughput_rps']:.1f} req/s "
+            f"(max {knee['max_throughput_rps']:.1f} req/s)"
+        )
+
+    save_run(
+        "publish_throughput",
+        params={
+            "image": WAKU_IMAGE_NAME,
+            "num_nodes": NUM_NODES,
+            "bootstrappers_num": NUM_BOOTSTRAP_NODES,
+            "num_target_nodes": NUM_TARGET_NODES,
+            "step_duration_s": STEP_DURATION_S,
+            "concurrency_levels": CONCURRENCY_LEVELS,
+            "payload_sizes_bytes": PAYLOAD_SIZES,
+        },
+        tables={
+            "steps": steps_df,
+            "knees": knees_df,
+            "requests": pd.DataFrame(requests_records),
+            "latency_histogram": pd.DataFrame(histogram_records),
+            "presto_metrics": pd.DataFrame(presto_records),
+            "bandwidth": bandwidth_df,
+        },
+        summary={"knees": knees_df.to_dict(orient="records")},
+    )
+    plot_throughput_and_latency(steps_df, "results/publish_throughput.png")
+
+    logger.info("Benchmark session finished.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
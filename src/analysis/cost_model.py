@@ -0,0 +1,368 @@
+import logging
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from archive.archive import ArchivedRun
+
+from .timeseries import phase_window
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# nwaku's gossipsub D, used for runs that don't record a mesh degree
+DEFAULT_MESH_DEGREE = 6
+
+# Columns describing a configuration, in feature order
+CONFIG_COLUMNS = ["num_nodes", "payload_size_bytes", "mesh_degree", "rate_msgs_per_s"]
+FEATURE_NAMES = ["intercept", *(f"log_{column}" for column in CONFIG_COLUMNS)]
+
+# Per-message overheads (envelope, framing, gossip control) tried when
+# fitting: the one with the highest model evidence is kept
+OVERHEAD_CANDIDATES_BYTES = [0, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+
+# Prior: bytes per message ~ N * D * (payload + overhead), independent of
+# the rate. Prior variances are relative to the noise variance.
+PRIOR_MEAN = np.array([0.0, 1.0, 1.0, 1.0, 0.0])
+PRIOR_VARIANCE = np.array([1e4, 10.0, 10.0, 10.0, 10.0])
+NOISE_PRIOR_SHAPE = 2.0
+NOISE_PRIOR_SCALE = 0.1
+
+CREDIBLE_LEVEL = 0.9
+
+
+def egress_bytes(
+    bandwidth: pd.DataFrame, start: float | None = None, end: float | None = None
+) -> float:
+    """
+    Sums the `out` bytes of all nodes between `start` and `end` (unix
+    times, defaulting to the first and last sample).
+
+    Each node's counter is read at its last sample before each bound, so
+    the bytes of the poll interval around `start` aren't lost.
+    """
+    # gaps (missed scrapes) have no counter value
+    out = bandwidth.loc[
+        (bandwidth["direction"] == "out") & bandwidth["total_bytes"].notna()
+    ]
+    total = 0.0
+    for _, node_df in out.groupby("node"):
+        node_df = node_df.sort_values("timestamp")
+        timestamps = node_df["timestamp"].to_numpy(dtype=float)
+        counter = node_df["total_bytes"].to_numpy(dtype=float)
+
+        def _at(t: float | None, default: int) -> float:
+            if t is None:
+                return counter[default]
+            i = np.searchsorted(timestamps, t, side="right") - 1
+            return counter[max(i, 0)]
+
+        total += max(_at(end, -1) - _at(start, 0), 0.0)
+    return total
+
+
+def run_observations(run: ArchivedRun) -> list[dict]:
+    """
+    Extracts `(configuration, egress bytes per message)` observations
+    from an archived run:
+    - capacity search runs give one per probe (its publishing window),
+    - runs with `num_messages` and `payload_size_bytes` params give one
+      for the whole scenario. The idle traffic measured in the
+      `baseline` span is subtracted, and the rate is `num_messages`
+      over the `scenario` span. Without spans, the rate is unknown (NaN).
+    """
+    bandwidth = run.tables.get("bandwidth")
+    if bandwidth is None or bandwidth.empty:
+        return []
+
+    params = run.params
+    num_nodes = params.get("num_nodes")
+    mesh_degree = params.get("mesh_degree", DEFAULT_MESH_DEGREE)
+    base = {"run": run.path, "experiment": run.experiment}
+
+    probes = run.tables.get("probes")
+    if probes is not None and "window_start" in probes.columns:
+        observations = []
+        for probe in probes.to_dict("records"):
+            if probe["published"] <= 0:
+                continue
+            egress = egress_bytes(bandwidth, probe["window_start"], probe["window_end"])
+            observations.append(
+                {
+                    **base,
+                    "num_nodes": num_nodes,
+                    "payload_size_bytes": probe["payload_size_bytes"],
+                    "mesh_degree": mesh_degree,
+                    "rate_msgs_per_s": probe["achieved_rate"],
+                    "egress_bytes_per_message": egress / probe["published"],
+                }
+            )
+        return observations
+
+    num_messages = params.get("num_messages")
+    payload_size = params.get("payload_size_bytes")
+    if not num_messages or payload_size is None:
+        return []
+
+    spans = run.tables.get("spans")
+    scenario = phase_window(spans, "scenario") if spans is not None else None
+    baseline = phase_window(spans, "baseline") if spans is not None else None
+
+    rate = np.nan
+    egress = egress_bytes(bandwidth)
+    if scenario:
+        start, end = scenario
+        rate = num_messages / max(end - start, 1e-3)
+        egress = egress_bytes(bandwidth, start=start)
+        if baseline:
+            idle_rate = egress_bytes(bandwidth, *baseline) / (baseline[1] - baseline[0])
+            egress -= idle_rate * (bandwidth["timestamp"].max() - start)
+
+    return [
+        {
+            **base,
+            "num_nodes": num_nodes,
+            "payload_size_bytes": payload_size,
+            "mesh_degree": mesh_degree,
+            "rate_msgs_per_s": rate,
+            "egress_bytes_per_message": max(egress, 0.0) / num_messages,
+        }
+    ]
+
+
+def observations_from_runs(runs: list[ArchivedRun]) -> pd.DataFrame:
+    """Builds the observations table of `run_observations` over many runs."""
+    rows = [row for run in runs for row in run_observations(run)]
+    return pd.DataFrame(
+        rows,
+        columns=["run", "experiment", *CONFIG_COLUMNS, "egress_bytes_per_message"],
+    )
+
+
+def _design_matrix(configs: pd.DataFrame, overhead_bytes: float) -> np.ndarray:
+    return np.column_stack(
+        [
+            np.ones(len(configs)),
+            np.log(configs["num_nodes"].to_numpy(dtype=float)),
+            np.log(
+                configs["payload_size_bytes"].to_numpy(dtype=float) + overhead_bytes
+            ),
+            np.log(configs["mesh_degree"].to_numpy(dtype=float)),
+            np.log(configs["rate_msgs_per_s"].to_numpy(dtype=float)),
+        ]
+    )
+
+
+def _student_t_quantile(p: float, dof: float) -> float:
+    """Cornish-Fisher approximation, accurate enough for intervals with dof >= 3."""
+    z = NormalDist().inv_cdf(p)
+    return (
+        z
+        + (z**3 + z) / (4 * dof)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * dof**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * dof**3)
+    )
+
+
+@dataclass
+class CostModel:
+    """
+    Bayesian log-linear model of the network's egress bytes per message:
+
+        log(bytes) = w0 + w1 log(N) + w2 log(payload + overhead)
+                     + w3 log(D) + w4 log(rate) + noise
+
+    so `w1..w4` are scaling exponents (e.g.: `w1 = 1` means the cost
+    grows linearly with the number of nodes). With a conjugate
+    normal-inverse-gamma prior the posterior, the model evidence and
+    the (Student-t) predictive distribution are closed form.
+
+    Variables that never varied in the data (e.g.: the mesh degree)
+    keep their prior, with its wide uncertainty, instead of being
+    unidentifiable.
+    """
+
+    overhead_bytes: float
+    mean: np.ndarray
+    covariance: np.ndarray  # relative to the noise variance
+    shape: float
+    scale: float
+    log_evidence: float
+    num_observations: int
+
+    @classmethod
+    def fit(cls, observations: pd.DataFrame) -> "CostModel":
+        """
+        Fits the model on the observations of `observations_from_runs`,
+        choosing the per-message overhead with the highest evidence.
+        Observations with an unknown configuration are dropped.
+        """
+        usable = observations.dropna(subset=CONFIG_COLUMNS)
+        usable = usable.loc[usable["egress_bytes_per_message"] > 0]
+        if len(usable) < len(observations):
+            logger.info(
+                f"Dropped {len(observations) - len(usable)} observations "
+                "with an unknown configuration or no egress"
+            )
+        if usable.empty:
+            raise ValueError("No usable observations to fit the cost model.")
+
+        y = np.log(usable["egress_bytes_per_message"].to_numpy(dtype=float))
+        models = [
+            cls._posterior(_design_matrix(usable, overhead), y, overhead)
+            for overhead in OVERHEAD_CANDIDATES_BYTES
+        ]
+        return max(models, key=lambda model: model.log_evidence)
+
+    @classmethod
+    def _posterior(cls, x: np.ndarray, y: np.ndarray, overhead_bytes: float):
+        prior_precision = np.diag(1 / PRIOR_VARIANCE)
+        precision = prior_precision + x.T @ x
+        covariance = np.linalg.inv(precision)
+        mean = covariance @ (prior_precision @ PRIOR_MEAN + x.T @ y)
+
+        n = len(y)
+        shape = NOISE_PRIOR_SHAPE + n / 2
+        scale = NOISE_PRIOR_SCALE + 0.5 * (
+            y @ y + PRIOR_MEAN @ prior_precision @ PRIOR_MEAN - mean @ precision @ mean
+        )
+        log_evidence = (
+            -n / 2 * math.log(2 * math.pi)
+            + 0.5 * np.linalg.slogdet(covariance)[1]
+            - 0.5 * np.log(PRIOR_VARIANCE).sum()
+            + NOISE_PRIOR_SHAPE * math.log(NOISE_PRIOR_SCALE)
+            - shape * math.log(scale)
+            + math.lgamma(shape)
+            - math.lgamma(NOISE_PRIOR_SHAPE)
+        )
+        return cls(
+            overhead_bytes, mean, covariance, shape, float(scale), log_evidence, n
+        )
+
+    @property
+    def noise_variance(self) -> float:
+        """Expected variance of the log noise."""
+        return self.scale / (self.shape - 1)
+
+    def coefficients(self) -> pd.DataFrame:
+        """Posterior mean and standard deviation of each coefficient."""
+        std = np.sqrt(np.diag(self.covariance) * self.scale / self.shape)
+        return pd.DataFrame(
+            {"feature": FEATURE_NAMES, "mean": self.mean, "std": std}
+        ).set_index("feature")
+
+    def predict(
+        self, configs: pd.DataFrame, level: float = CREDIBLE_LEVEL
+    ) -> pd.DataFrame:
+        """
+        Predicts the egress bytes per message of `configs` (the
+        `CONFIG_COLUMNS`, `mesh_degree` is optional), with the median
+        and the `level` credible interval of the predictive distribution,
+        and the implied per-node egress rate (`bytes * rate / N`).
+        """
+        configs = configs.copy()
+        if "mesh_degree" not in configs:
+            configs["mesh_degree"] = DEFAULT_MESH_DEGREE
+
+        x = _design_matrix(configs, self.overhead_bytes)
+        log_median = x @ self.mean
+        parameter_variance = np.einsum("ij,jk,ik->i", x, self.covariance, x)
+        log_std = np.sqrt(self.scale / self.shape * (1 + parameter_variance))
+        half_width = _student_t_quantile((1 + level) / 2, 2 * self.shape) * log_std
+
+        per_node_rate = configs["rate_msgs_per_s"].to_numpy(dtype=float) / configs[
+            "num_nodes"
+        ].to_numpy(dtype=float)
+        for name, log_value in (
+            ("median", log_median),
+            ("lower", log_median - half_width),
+            ("upper", log_median + half_width),
+        ):
+            configs[f"bytes_per_message_{name}"] = np.exp(log_value)
+            configs[f"node_egress_bps_{name}"] = np.exp(log_value) * per_node_rate
+        configs["log_std"] = log_std
+        return configs
+
+    def node_egress(
+        self,
+        num_nodes: int,
+        payload_size_bytes: int,
+        rate_msgs_per_s: float,
+        mesh_degree: int = DEFAULT_MESH_DEGREE,
+        level: float = CREDIBLE_LEVEL,
+    ) -> tuple[float, float, float]:
+        """
+        Returns the `(median, lower, upper)` predicted egress of a single
+        node in bytes per second, e.g.: `node_egress(1000, 10 * 1024, 50)`.
+        """
+        config = pd.DataFrame(
+            [
+                {
+                    "num_nodes": num_nodes,
+                    "payload_size_bytes": payload_size_bytes,
+                    "mesh_degree": mesh_degree,
+                    "rate_msgs_per_s": rate_msgs_per_s,
+                }
+            ]
+        )
+        row = self.predict(config, level).iloc[0]
+        return (
+            row["node_egress_bps_median"],
+            row["node_egress_bps_lower"],
+            row["node_egress_bps_upper"],
+        )
+
+    def suggest(
+        self, candidates: pd.DataFrame, k: int = 1, cost: str | None = None
+    ) -> pd.DataFrame:
+        """
+        Picks the `k` candidate configurations that would reduce the
+        model's uncertainty the most.
+
+        The first one is the candidate with the highest parameter
+        variance (`x' C x`), optionally divided by its `cost` column
+        (e.g.: node-seconds). The covariance is then updated as if it
+        had been run (the update doesn't depend on the outcome), so the
+        next picks go to other unexplored regions instead of the same
+        spot. The picks are returned in order with their `gain`.
+        """
+        candidates = candidates.copy()
+        if "mesh_degree" not in candidates:
+            candidates["mesh_degree"] = DEFAULT_MESH_DEGREE
+        x = _design_matrix(candidates, self.overhead_bytes)
+        weights = (
+            candidates[cost].to_numpy(dtype=float) if cost else np.ones(len(candidates))
+        )
+
+        covariance = self.covariance.copy()
+        picked, gains = [], []
+        for _ in range(min(k, len(candidates))):
+            variance = np.einsum("ij,jk,ik->i", x, covariance, x)
+            score = variance / weights
+            score[picked] = -np.inf
+            best = int(np.argmax(score))
+            picked.append(best)
+            gains.append(score[best])
+
+            cx = covariance @ x[best]
+            covariance -= np.outer(cx, cx) / (1 + x[best] @ cx)
+
+        return candidates.iloc[picked].assign(gain=gains).reset_index(drop=True)
+
+
+def candidate_grid(
+    num_nodes: list[int],
+    payload_sizes_bytes: list[int],
+    rates_msgs_per_s: Sequence[float],
+    mesh_degrees: tuple[int, ...] = (DEFAULT_MESH_DEGREE,),
+) -> pd.DataFrame:
+    """All combinations of the given values, as candidates for `suggest`."""
+    index = pd.MultiIndex.from_product(
+        [num_nodes, payload_sizes_bytes, mesh_degrees, rates_msgs_per_s],
+        names=CONFIG_COLUMNS,
+    )
+    return index.to_frame(index=False)
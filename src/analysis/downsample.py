@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def lttb(x, y, n_out: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Downsamples a series to `n_out` points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept, the others are split into
+    `n_out - 2` buckets and each bucket keeps the point forming the
+    largest triangle with the previously kept point and the next
+    bucket's average, which preserves peaks and valleys that plain
+    decimation drops.
+
+    Bucket averages and triangle areas are computed with numpy, so the
+    Python loop runs `n_out` times whatever the length of the series.
+    `x` must be sorted.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # n_out - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[: n - 1], edges[:-1]) / counts
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i < n_out - 3:
+            cx, cy = avg_x[i + 1], avg_y[i + 1]
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[a], y[a]
+        # twice the triangle area, the constant doesn't change the argmax
+        areas = np.abs(
+            (ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay)
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return x[selected], y[selected]
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# Directions of the libp2p counters, seen from the node
+LINK_DIRECTIONS = {"out": "src", "in": "dst"}
+
+
+def link_matrix(links: pd.DataFrame, value: str = "bytes") -> pd.DataFrame:
+    """
+    Sums captured link records (`mesh.capture.LinkCapture`) over all
+    windows into a `src` x `dst` matrix of `value` (`bytes`,
+    `payload_bytes` or `packets`). Pairs that never talked are 0.
+    """
+    nodes = sorted(set(links["src"]) | set(links["dst"]))
+    return (
+        links.pivot_table(index="src", columns="dst", values=value, aggfunc="sum")
+        .reindex(index=nodes, columns=nodes)
+        .fillna(0)
+    )
+
+
+def counter_deltas(
+    bandwidth: pd.DataFrame, start: float, end: float
+) -> dict[tuple[str, str], float]:
+    """
+    How much each `(node, direction)` libp2p bytes counter grew between
+    `start` and `end` (unix times). Counters are read at their last
+    sample before `start` and their first sample after `end` (or the
+    closest one), so the polls enclose the interval. Gaps (missed
+    scrapes) are skipped.
+    """
+    samples = bandwidth.loc[bandwidth["total_bytes"].notna()]
+    deltas = {}
+    for node, node_df in samples.groupby("node"):
+        for direction, series_df in node_df.groupby("direction"):
+            series_df = series_df.sort_values("timestamp")
+            timestamps = series_df["timestamp"].to_numpy(dtype=float)
+            counter = series_df["total_bytes"].to_numpy(dtype=float)
+            at_start = max(np.searchsorted(timestamps, start, side="right") - 1, 0)
+            at_end = min(
+                np.searchsorted(timestamps, end, side="left"), len(counter) - 1
+            )
+            deltas[(str(node), str(direction))] = max(
+                float(counter[at_end] - counter[at_start]), 0.0
+            )
+    return deltas
+
+
+def cross_check(links: pd.DataFrame, bandwidth: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compares, for every node and direction, the captured traffic with the
+    node's own `libp2p_network_bytes_total` over the capture's windows.
+
+    libp2p counts the bytes it writes to and reads from its connections,
+    i.e.: the TCP payload, so `payload_ratio` (captured TCP payload over
+    the counter's growth) should be close to 1. Lower means frames the
+    capture missed (or traffic with hosts outside the mesh), higher means
+    traffic libp2p doesn't count. Counters are polled, so the first and
+    last poll intervals blur the comparison of short captures.
+    """
+    window_starts = links["window_start"].to_numpy(dtype=float)
+    window_ends = window_starts + links["window_s"].to_numpy(dtype=float)
+    deltas = counter_deltas(
+        bandwidth, float(window_starts.min()), float(window_ends.max())
+    )
+
+    rows = []
+    for direction, column in LINK_DIRECTIONS.items():
+        captured = links.groupby(column).agg(
+            bytes=("bytes", "sum"), payload_bytes=("payload_bytes", "sum")
+        )
+        for node_captured in captured.reset_index().to_dict("records"):
+            node = node_captured[column]
+            libp2p_bytes = deltas.get((str(node), direction), np.nan)
+            rows.append(
+                {
+                    "node": node,
+                    "direction": direction,
+                    "captured_bytes": node_captured["bytes"],
+                    "captured_payload_bytes": node_captured["payload_bytes"],
+                    "libp2p_bytes": libp2p_bytes,
+                    "payload_ratio": (
+                        node_captured["payload_bytes"] / libp2p_bytes
+                        if libp2p_bytes
+                        else np.nan
+                    ),
+                }
+            )
+    return pd.DataFrame(rows)
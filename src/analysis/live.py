@@ -0,0 +1,269 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable
+
+DEFAULT_WINDOW_S = 5.0
+
+# Returns the reason to abort the run, or None to keep going
+AbortRule = Callable[["LiveAggregator", float], str | None]
+
+
+class WindowedCounterRate:
+    """
+    Rate of a cumulative counter over a sliding time window.
+
+    Only the samples spanning the window are kept, and each of them is
+    appended and dropped once, so adding a sample is O(1) amortized.
+    Works on an irregular sampling grid since the rate is always
+    computed from the actual sample timestamps.
+    """
+
+    def __init__(self, window_s: float = DEFAULT_WINDOW_S):
+        self._window_s = window_s
+        self._samples: deque[tuple[float, float]] = deque()
+
+    def add(self, timestamp: float, value: float) -> float:
+        if self._samples and value < self._samples[-1][1]:
+            # counter reset (e.g.: node restarted)
+            self._samples.clear()
+        self._samples.append((timestamp, value))
+        # keep the newest sample that is at least a window old, so the
+        # rate always covers the full window once there is enough data
+        while (
+            len(self._samples) > 2 and timestamp - self._samples[1][0] >= self._window_s
+        ):
+            self._samples.popleft()
+        return self.rate()
+
+    def rate(self) -> float:
+        if len(self._samples) < 2:
+            return 0.0
+        (t0, v0), (t1, v1) = self._samples[0], self._samples[-1]
+        return (v1 - v0) / (t1 - t0) if t1 > t0 else 0.0
+
+
+class WindowedEvents:
+    """Count and mean value of events in a sliding time window, O(1) amortized."""
+
+    def __init__(self, window_s: float = DEFAULT_WINDOW_S):
+        self._window_s = window_s
+        self._events: deque[tuple[float, float]] = deque()
+        self._sum = 0.0
+
+    def add(self, timestamp: float, value: float = 0.0):
+        self._events.append((timestamp, value))
+        self._sum += value
+        self.expire(timestamp)
+
+    def expire(self, now: float):
+        while self._events and now - self._events[0][0] > self._window_s:
+            _, value = self._events.popleft()
+            self._sum -= value
+
+    @property
+    def count(self) -> int:
+        return len(self._events)
+
+    @property
+    def mean(self) -> float | None:
+        return self._sum / len(self._events) if self._events else None
+
+
+class LiveAggregator:
+    """
+    Incremental analysis of a run while it happens.
+
+    Consumes the poller's `libp2p_network_bytes_total` samples as they
+    arrive and keeps, in O(1) per sample:
+    - the windowed byte rate of every node, and of the whole network
+    - the network-wide net bytes since the first sample, and since
+      publishing started (`mark_publish`)
+    - windowed delivery counters, when fed by a `DeliveryTracker`
+
+    After every batch of samples the abort rules are evaluated. The
+    first rule returning a reason sets `aborted`.
+    """
+
+    def __init__(
+        self,
+        window_s: float = DEFAULT_WINDOW_S,
+        abort_rules: Iterable[AbortRule] = (),
+    ):
+        self._window_s = window_s
+        self._abort_rules = list(abort_rules)
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+        # per (node, direction) counter
+        self._rates: Dict[tuple[str, str], WindowedCounterRate] = {}
+        self._key_rate: Dict[tuple[str, str], float] = {}
+        self._last_value: Dict[tuple[str, str], float] = {}
+        # per node aggregates
+        self._node_rate: Dict[str, float] = {}
+        self._node_bytes: Dict[str, float] = {}
+        # network aggregates
+        self.network_rate = 0.0
+        self.network_net_bytes = 0.0
+        self.num_samples = 0
+        self.last_sample_at: float | None = None
+
+        self.publish_marked_at: float | None = None
+        self._bytes_at_publish = 0.0
+
+        self.published = 0
+        self.delivered = 0
+        self._deliveries = WindowedEvents(window_s)
+
+        self.aborted = threading.Event()
+        self.abort_reason: str | None = None
+
+    @property
+    def bytes_since_publish(self) -> float:
+        if self.publish_marked_at is None:
+            return 0.0
+        return self.network_net_bytes - self._bytes_at_publish
+
+    def add_samples(self, records: list[dict]):
+        """Adds poller records (`timestamp`, `node`, `direction`, `total_bytes`)."""
+        with self._lock:
+            for record in records:
+                self._add_sample(record)
+        self.check_abort()
+
+    def mark_publish(self):
+        """Marks the moment the scenario starts publishing."""
+        with self._lock:
+            self.publish_marked_at = time.time()
+            self._bytes_at_publish = self.network_net_bytes
+
+    def record_published(self):
+        with self._lock:
+            self.published += 1
+
+    def record_delivered(self, delay_s: float):
+        with self._lock:
+            self.delivered += 1
+            self._deliveries.add(time.time(), delay_s)
+
+    def check_abort(self, now: float | None = None) -> str | None:
+        """Evaluates the abort rules. Returns the abort reason, if any."""
+        if self.aborted.is_set():
+            return self.abort_reason
+
+        now = time.time() if now is None else now
+        for rule in self._abort_rules:
+            reason = rule(self, now)
+            if reason:
+                self.abort_reason = reason
+                self.aborted.set()
+                return reason
+        return None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns the current aggregates (JSON serializable)."""
+        now = time.time()
+        with self._lock:
+            self._deliveries.expire(now)
+            return {
+                "timestamp": now,
+                "elapsed_s": now - self.started_at,
+                "num_samples": self.num_samples,
+                "last_sample_at": self.last_sample_at,
+                "network_rate_bps": self.network_rate,
+                "network_net_bytes": self.network_net_bytes,
+                "publish_marked_at": self.publish_marked_at,
+                "bytes_since_publish": self.bytes_since_publish,
+                "nodes": {
+                    node: {
+                        "rate_bps": self._node_rate[node],
+                        "net_bytes": self._node_bytes[node],
+                    }
+                    for node in sorted(self._node_rate)
+                },
+                "delivery": {
+                    "published": self.published,
+                    "delivered": self.delivered,
+                    "delivered_in_window": self._deliveries.count,
+                    "mean_delay_in_window_s": self._deliveries.mean,
+                },
+                "aborted": self.aborted.is_set(),
+                "abort_reason": self.abort_reason,
+            }
+
+    def _add_sample(self, record: dict):
+        key = (record["node"], record["direction"])
+        timestamp, value = record["timestamp"], record["total_bytes"]
+
+        if key not in self._rates:
+            self._rates[key] = WindowedCounterRate(self._window_s)
+            self._key_rate[key] = 0.0
+            self._last_value[key] = value
+            self._node_rate.setdefault(key[0], 0.0)
+            self._node_bytes.setdefault(key[0], 0.0)
+
+        rate = self._rates[key].add(timestamp, value)
+        rate_delta = rate - self._key_rate[key]
+        bytes_delta = max(value - self._last_value[key], 0.0)
+        self._key_rate[key] = rate
+        self._last_value[key] = value
+
+        self._node_rate[key[0]] += rate_delta
+        self._node_bytes[key[0]] += bytes_delta
+        self.network_rate += rate_delta
+        self.network_net_bytes += bytes_delta
+        self.num_samples += 1
+        self.last_sample_at = max(self.last_sample_at or timestamp, timestamp)
+
+
+def no_traffic_after_publish(grace_s: float, min_bytes: float = 1.0) -> AbortRule:
+    """Aborts if less than `min_bytes` moved `grace_s` seconds after publishing."""
+
+    def _rule(live: LiveAggregator, now: float) -> str | None:
+        if live.publish_marked_at is None:
+            return None
+        if now - live.publish_marked_at < grace_s:
+            return None
+        if live.bytes_since_publish < min_bytes:
+            return (
+                f"only {live.bytes_since_publish:.0f} bytes moved in the "
+                f"{grace_s}s after publishing"
+            )
+        return None
+
+    return _rule
+
+
+def no_samples(timeout_s: float) -> AbortRule:
+    """Aborts if metric samples stopped coming for `timeout_s` seconds."""
+
+    def _rule(live: LiveAggregator, now: float) -> str | None:
+        last = live.last_sample_at
+        if last is not None and now - last > timeout_s:
+            return f"no metric samples for {now - last:.0f}s"
+        return None
+
+    return _rule
+
+
+def no_delivery_after_publish(grace_s: float) -> AbortRule:
+    """Aborts if tracked messages were published but none was delivered."""
+
+    def _rule(live: LiveAggregator, now: float) -> str | None:
+        if live.publish_marked_at is None or live.published == 0:
+            return None
+        if now - live.publish_marked_at >= grace_s and live.delivered == 0:
+            return f"none of {live.published} messages delivered after {grace_s}s"
+        return None
+
+    return _rule
+
+
+def default_abort_rules(
+    no_traffic_grace_s: float = 5, no_samples_timeout_s: float = 10
+) -> list[AbortRule]:
+    """Rules that catch a broken run: no traffic after publishing, or dead polling."""
+    return [
+        no_traffic_after_publish(no_traffic_grace_s),
+        no_samples(no_samples_timeout_s),
+    ]
@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Default limits of `noise_check`, on the `NOISE_QUANTILE` of the samples
+# share of the time some task waited for a core
+MAX_CPU_PRESSURE = 0.10
+# share of the time the hypervisor took our cores
+MAX_CPU_STEAL = 0.02
+# a saturated harness polls and publishes late
+MAX_HARNESS_CPU_BUSY = 0.90
+# saturated node cores throttle the nodes, but only noise for runs that
+# aren't meant to load them: not checked unless asked for
+MAX_NODE_CPU_BUSY = 0.90
+NOISE_QUANTILE = 0.95
+
+
+@dataclass
+class NoiseReport:
+    # True when any limit was exceeded
+    noisy: bool
+    reasons: list[str] = field(default_factory=list)
+    # the checked quantile of every host load column, NaN if not recorded
+    stats: dict[str, float] = field(default_factory=dict)
+
+
+def noise_check(
+    host_load: pd.DataFrame,
+    start: float | None = None,
+    end: float | None = None,
+    max_cpu_pressure: float = MAX_CPU_PRESSURE,
+    max_cpu_steal: float = MAX_CPU_STEAL,
+    max_harness_cpu_busy: float = MAX_HARNESS_CPU_BUSY,
+    max_node_cpu_busy: float | None = None,
+    quantile: float = NOISE_QUANTILE,
+) -> NoiseReport:
+    """
+    Tells whether the host's contention during a run (the records of
+    `harness.hostload.HostLoadMonitor`, between the unix times `start`
+    and `end` if given) may have changed its results.
+
+    Every column is checked on its `quantile` rather than its mean, so a
+    run with a minute of heavy contention is flagged even if it was
+    quiet otherwise. Columns that weren't recorded (e.g.: no PSI, or no
+    harness cores) aren't checked.
+
+    How busy the nodes' cores were is only checked with a
+    `max_node_cpu_busy` (e.g.: `MAX_NODE_CPU_BUSY`): throughput and
+    capacity runs are meant to saturate them.
+    """
+    if start is not None:
+        host_load = host_load.loc[host_load["timestamp"] >= start]
+    if end is not None:
+        host_load = host_load.loc[host_load["timestamp"] <= end]
+    if host_load.empty:
+        return NoiseReport(noisy=True, reasons=["no host load recorded"])
+
+    limits: dict[str, float | None] = {
+        "cpu_pressure": max_cpu_pressure,
+        "cpu_steal": max_cpu_steal,
+        "harness_cpu_busy": max_harness_cpu_busy,
+        "node_cpu_busy": max_node_cpu_busy,
+    }
+    report = NoiseReport(noisy=False)
+    for column, limit in limits.items():
+        values = (
+            host_load[column].to_numpy(dtype=float)
+            if column in host_load
+            else np.array([])
+        )
+        values = values[~np.isnan(values)]
+        value = float(np.quantile(values, quantile)) if len(values) else np.nan
+        report.stats[column] = value
+        if limit is not None and value > limit:
+            report.reasons.append(
+                f"{column} p{quantile * 100:g} {value:.3f} over {limit:.3f}"
+            )
+    report.noisy = bool(report.reasons)
+    return report
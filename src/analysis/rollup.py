@@ -0,0 +1,157 @@
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Tier:
+    resolution_s: float
+    # closed buckets kept per series, older ones are dropped
+    retention: int
+
+
+# 1s for 15 min, 10s for 6 hours, 1 min for a week
+DEFAULT_TIERS = (Tier(1, 15 * 60), Tier(10, 6 * 360), Tier(60, 7 * 24 * 60))
+
+
+@dataclass
+class Bucket:
+    start: float
+    count: int
+    total: float
+    min: float
+    max: float
+    last: float
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+    def merge(self, other: "Bucket"):
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.last = other.last
+
+
+class TieredRollup:
+    """
+    Downsamples many series (e.g.: one per node and metric) into tiers
+    of coarser and coarser buckets, with bounded memory.
+
+    Samples go into the first tier's buckets. When a bucket closes (a
+    sample of a later bucket arrives), it is kept in its tier and merged
+    into the next tier's bucket, and so on. Each tier keeps at most
+    `retention` closed buckets per series, so a run of any length uses
+    the same memory per series. `on_close(key, tier_index, bucket)` is
+    called for every closed bucket, e.g.: to fit trends on the coarsest
+    tier as the run goes.
+
+    NaN samples (e.g.: gaps of missed scrapes) are ignored.
+    """
+
+    def __init__(
+        self,
+        tiers: tuple[Tier, ...] = DEFAULT_TIERS,
+        on_close: Callable[[Hashable, int, Bucket], None] | None = None,
+    ):
+        for finer, coarser in zip(tiers, tiers[1:]):
+            ratio = coarser.resolution_s / finer.resolution_s
+            if ratio < 1 or not math.isclose(ratio, round(ratio)):
+                raise ValueError(
+                    "Each tier's resolution must be a multiple of the previous one."
+                )
+        self._tiers = tiers
+        self._on_close = on_close
+        self._lock = threading.Lock()
+        # per series: open bucket and closed buckets of every tier
+        self._open: dict[Hashable, list[Bucket | None]] = {}
+        self._closed: dict[Hashable, list[deque[Bucket]]] = {}
+
+    @property
+    def tiers(self) -> tuple[Tier, ...]:
+        return self._tiers
+
+    def add(self, key: Hashable, timestamp: float, value: float):
+        if math.isnan(value):
+            return
+        with self._lock:
+            if key not in self._open:
+                self._open[key] = [None] * len(self._tiers)
+                self._closed[key] = [deque(maxlen=t.retention) for t in self._tiers]
+            self._add(key, 0, Bucket(timestamp, 1, value, value, value, value))
+
+    def _add(self, key: Hashable, tier_index: int, bucket: Bucket):
+        resolution_s = self._tiers[tier_index].resolution_s
+        start = math.floor(bucket.start / resolution_s) * resolution_s
+        current = self._open[key][tier_index]
+
+        if current is not None and current.start == start:
+            current.merge(bucket)
+            return
+
+        if current is not None:
+            self._close(key, tier_index, current)
+        self._open[key][tier_index] = Bucket(
+            start, bucket.count, bucket.total, bucket.min, bucket.max, bucket.last
+        )
+
+    def _close(self, key: Hashable, tier_index: int, bucket: Bucket):
+        self._closed[key][tier_index].append(bucket)
+        if self._on_close:
+            self._on_close(key, tier_index, bucket)
+        if tier_index + 1 < len(self._tiers):
+            self._add(key, tier_index + 1, bucket)
+
+    def flush(self):
+        """Closes every open bucket, e.g.: at the end of a run."""
+        with self._lock:
+            for key, open_buckets in self._open.items():
+                for tier_index in range(len(self._tiers)):
+                    bucket = open_buckets[tier_index]
+                    if bucket is not None:
+                        open_buckets[tier_index] = None
+                        self._close(key, tier_index, bucket)
+
+    def keys(self) -> list[Hashable]:
+        with self._lock:
+            return list(self._closed)
+
+    def buckets(self, key: Hashable, tier_index: int) -> list[Bucket]:
+        """Returns the closed buckets of a series in a tier, oldest first."""
+        with self._lock:
+            return list(self._closed.get(key, [deque()] * len(self._tiers))[tier_index])
+
+    def to_dataframe(
+        self, tier_index: int, key_names: tuple[str, ...] = ("node", "metric")
+    ) -> pd.DataFrame:
+        """
+        Returns the closed buckets of all series in a tier. Tuple keys
+        are split into the `key_names` columns.
+        """
+        rows = []
+        for key in self.keys():
+            key_columns = dict(
+                zip(key_names, key if isinstance(key, tuple) else (key,))
+            )
+            for bucket in self.buckets(key, tier_index):
+                rows.append(
+                    {
+                        **key_columns,
+                        "start": bucket.start,
+                        "count": bucket.count,
+                        "mean": bucket.mean,
+                        "min": bucket.min,
+                        "max": bucket.max,
+                        "last": bucket.last,
+                    }
+                )
+        return pd.DataFrame(
+            rows,
+            columns=[*key_names, "start", "count", "mean", "min", "max", "last"],
+        )
@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+# A probe runs the system at a rate and tells if it held up, with details
+Probe = Callable[[float], tuple[bool, dict[str, Any]]]
+
+
+@dataclass
+class ProbeResult:
+    rate: float
+    passed: bool
+    details: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SearchResult:
+    # highest passing rate, None if even the start rate failed
+    capacity: float | None
+    # lowest failing rate, None if `max_rate` passed
+    first_failing: float | None
+    converged: bool
+    probes: list[ProbeResult]
+
+
+def capacity_search(
+    probe: Probe,
+    start_rate: float,
+    max_rate: float,
+    rel_tolerance: float = 0.1,
+    growth: float = 2.0,
+    max_probes: int = 20,
+) -> SearchResult:
+    """
+    Finds the highest rate `probe` passes at, assuming that passing is
+    monotonic (everything below a passing rate passes too).
+
+    The rate is multiplied by `growth` from `start_rate` until a probe
+    fails (or `max_rate` passes), then the gap between the highest
+    passing and lowest failing rates is bisected until it is within
+    `rel_tolerance` of the passing one. Converges in
+    O(log(capacity / start_rate) + log(1 / rel_tolerance)) probes.
+    """
+    probes: list[ProbeResult] = []
+
+    def _run(rate: float) -> bool:
+        passed, details = probe(rate)
+        probes.append(ProbeResult(rate, passed, details))
+        return passed
+
+    passing: float | None = None
+    failing: float | None = None
+
+    rate = min(start_rate, max_rate)
+    while len(probes) < max_probes:
+        if not _run(rate):
+            failing = rate
+            break
+        passing = rate
+        if rate >= max_rate:
+            break
+        rate = min(rate * growth, max_rate)
+
+    while (
+        passing is not None
+        and failing is not None
+        and (failing - passing) / passing > rel_tolerance
+        and len(probes) < max_probes
+    ):
+        rate = (passing + failing) / 2
+        if _run(rate):
+            passing = rate
+        else:
+            failing = rate
+
+    if passing is None:
+        converged = failing is not None
+    elif failing is None:
+        converged = passing >= max_rate
+    else:
+        converged = (failing - passing) / passing <= rel_tolerance
+
+    return SearchResult(passing, failing, converged, probes)
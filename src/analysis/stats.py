@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Above this many samples per side, the U statistic is close enough to
+# normal and the exact distribution gets expensive
+EXACT_MAX_SAMPLES = 20
+
+
+def mann_whitney_u(x, y) -> tuple[float, float]:
+    """
+    Two-sided Mann-Whitney U test of `x` and `y` coming from the same
+    distribution. Returns `(u, p_value)`, where `u` is the statistic of `x`.
+
+    It makes no normality assumption, which matters for the few, skewed
+    samples we get from experiment trials. The p-value is exact for
+    small samples without ties, otherwise it uses the normal
+    approximation with tie and continuity corrections.
+
+    Note: with 3 samples per side the smallest possible p-value is 0.1,
+    so at least 4 trials per side are needed to reach `p < 0.05`.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x = x[~np.isnan(x)]
+    y = y[~np.isnan(y)]
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Both samples must have at least one value.")
+
+    combined = np.concatenate([x, y])
+    # average ranks for ties
+    ranks = pd.Series(combined).rank().to_numpy()
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2)
+
+    _, tie_counts = np.unique(combined, return_counts=True)
+    has_ties = bool((tie_counts > 1).any())
+    if not has_ties and max(n1, n2) <= EXACT_MAX_SAMPLES:
+        return u, _exact_u_p_value(u, n1, n2)
+
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    tie_term = (tie_counts**3 - tie_counts).sum() / (n * (n - 1))
+    std = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if std == 0:
+        return u, 1.0
+
+    z = max(abs(u - mean) - 0.5, 0) / std
+    return u, min(math.erfc(z / math.sqrt(2)), 1.0)
+
+
+def relative_change(baseline, candidate) -> float:
+    """Returns the relative change of the median of `candidate` vs `baseline`."""
+    baseline_median = float(np.nanmedian(baseline))
+    candidate_median = float(np.nanmedian(candidate))
+    if baseline_median == 0:
+        return 0.0 if candidate_median == 0 else math.inf
+    return candidate_median / baseline_median - 1
+
+
+def scaling_exponent(x, y) -> float:
+    """
+    Fits `y ~ c * x^k` and returns `k` (the slope in log-log space).
+
+    `k ~ 1` means linear scaling, `k > 1` superlinear. Non-positive
+    values are ignored since they have no logarithm.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = (x > 0) & (y > 0)
+    if mask.sum() < 2:
+        return float("nan")
+    slope, _ = np.polyfit(np.log(x[mask]), np.log(y[mask]), 1)
+    return float(slope)
+
+
+def _exact_u_p_value(u: float, n1: int, n2: int) -> float:
+    # dists[m] is the distribution of U with m x's and the y's added so far:
+    # f(m, n, k) = f(m, n - 1, k) + f(m - 1, n, k - n)
+    dists = [np.ones(1) for _ in range(n1 + 1)]
+    for n in range(1, n2 + 1):
+        for m in range(1, n1 + 1):
+            dist = np.zeros(m * n + 1)
+            dist[: len(dists[m])] += dists[m]
+            dist[n : n + len(dists[m - 1])] += dists[m - 1]
+            dists[m] = dist
+
+    dist = dists[n1]
+    k = int(round(u))
+    lower = dist[: k + 1].sum() / dist.sum()
+    upper = dist[k:].sum() / dist.sum()
+    return min(2 * min(lower, upper), 1.0)
@@ -0,0 +1,165 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.cost_model import (
+    NOISE_PRIOR_SCALE,
+    NOISE_PRIOR_SHAPE,
+    PRIOR_MEAN,
+    PRIOR_VARIANCE,
+    CostModel,
+    _design_matrix,
+    candidate_grid,
+    egress_bytes,
+    observations_from_runs,
+)
+from archive.archive import ArchivedRun
+
+
+def _synthetic_observations(seed=0, mesh_degrees=(6,)):
+    # bytes per message = 3 * N * D * (payload + 256), rate has no effect
+    rng = np.random.default_rng(seed)
+    configs = candidate_grid(
+        [10, 20, 50], [1, 1024, 16 * 1024], [1, 10, 100], mesh_degrees
+    )
+    true_bytes = (
+        3
+        * configs["num_nodes"]
+        * configs["mesh_degree"]
+        * (configs["payload_size_bytes"] + 256)
+    )
+    noise = rng.normal(0, 0.05, len(configs))
+    return configs.assign(egress_bytes_per_message=true_bytes * np.exp(noise))
+
+
+def test_cost_model_recovers_scaling_and_overhead():
+    model = CostModel.fit(_synthetic_observations())
+    coefficients = model.coefficients()["mean"]
+
+    assert model.overhead_bytes == 256
+    assert coefficients["log_num_nodes"] == pytest.approx(1, abs=0.05)
+    assert coefficients["log_payload_size_bytes"] == pytest.approx(1, abs=0.05)
+    assert coefficients["log_rate_msgs_per_s"] == pytest.approx(0, abs=0.05)
+
+
+def test_log_evidence_is_the_marginal_likelihood():
+    # under the normal-inverse-gamma prior, y is a multivariate Student t
+    observations = _synthetic_observations().head(8)
+    x = _design_matrix(observations, 256)
+    y = np.log(observations["egress_bytes_per_message"].to_numpy())
+    model = CostModel._posterior(x, y, 256)
+
+    n, dof = len(y), 2 * NOISE_PRIOR_SHAPE
+    sigma = (NOISE_PRIOR_SCALE / NOISE_PRIOR_SHAPE) * (
+        np.eye(n) + x @ np.diag(PRIOR_VARIANCE) @ x.T
+    )
+    residual = y - x @ PRIOR_MEAN
+    expected = (
+        math.lgamma((dof + n) / 2)
+        - math.lgamma(dof / 2)
+        - n / 2 * math.log(dof * math.pi)
+        - 0.5 * np.linalg.slogdet(sigma)[1]
+        - (dof + n)
+        / 2
+        * math.log(1 + residual @ np.linalg.solve(sigma, residual) / dof)
+    )
+    assert model.log_evidence == pytest.approx(expected)
+
+
+def test_cost_model_prediction_intervals_widen_when_extrapolating():
+    model = CostModel.fit(_synthetic_observations())
+    configs = pd.DataFrame(
+        {
+            "num_nodes": [20, 1000],
+            "payload_size_bytes": [1024, 10 * 1024],
+            "rate_msgs_per_s": [10, 50],
+        }
+    )
+    predictions = model.predict(configs)
+
+    near, far = predictions.iloc[0], predictions.iloc[1]
+    assert near["bytes_per_message_median"] == pytest.approx(
+        3 * 20 * 6 * (1024 + 256), rel=0.1
+    )
+    assert near["bytes_per_message_lower"] < near["bytes_per_message_median"]
+    assert far["log_std"] > near["log_std"]
+
+    median, lower, upper = model.node_egress(1000, 10 * 1024, 50)
+    assert median == pytest.approx(far["bytes_per_message_median"] * 50 / 1000)
+    assert lower < median < upper
+
+
+def test_suggest_targets_unexplored_variables():
+    # the mesh degree never varied, so only the prior constrains its effect
+    model = CostModel.fit(_synthetic_observations())
+    candidates = candidate_grid([20], [1024], [10], mesh_degrees=(4, 6, 12))
+
+    suggestions = model.suggest(candidates, k=2)
+    assert suggestions["mesh_degree"].iloc[0] == 12
+    # once 12 is (virtually) run, the other end of the range is worth more
+    assert suggestions["mesh_degree"].iloc[1] == 4
+    assert suggestions["gain"].iloc[0] > suggestions["gain"].iloc[1]
+
+
+def test_egress_bytes_reads_counters_at_window_bounds():
+    bandwidth = pd.DataFrame(
+        {
+            "timestamp": [0.0, 1.0, 2.0, 3.0, 0.0, 1.0, 2.0, 3.0],
+            "node": ["node-0"] * 4 + ["node-1"] * 4,
+            "direction": ["out"] * 8,
+            "total_bytes": [0, 100, 300, 600, 0, 10, 20, 30],
+        }
+    )
+    bandwidth = pd.concat(
+        [bandwidth, bandwidth.assign(direction="in", total_bytes=1e9)]
+    )
+
+    assert egress_bytes(bandwidth) == 630
+    # the counters at 1.5 and 2.5 are the ones sampled at 1 and 2
+    assert egress_bytes(bandwidth, 1.5, 2.5) == 210
+
+
+def test_observations_from_runs_uses_spans_and_probes():
+    bandwidth = pd.DataFrame(
+        {
+            "timestamp": [0.0, 10.0, 11.0, 20.0],
+            "node": ["node-0"] * 4,
+            "direction": ["out"] * 4,
+            "total_bytes": [0, 100, 1100, 1190],
+        }
+    )
+    spans = pd.DataFrame(
+        {"name": ["baseline", "scenario"], "start": [0.0, 10.0], "end": [10.0, 12.0]}
+    )
+    burst = ArchivedRun(
+        path="burst",
+        experiment="num_vs_bandwidth",
+        created_at="",
+        params={"num_nodes": 1, "num_messages": 10, "payload_size_bytes": 1},
+        tables={"bandwidth": bandwidth, "spans": spans},
+    )
+    probes = pd.DataFrame(
+        {
+            "payload_size_bytes": [1024],
+            "published": [20],
+            "achieved_rate": [2.0],
+            "window_start": [10.0],
+            "window_end": [20.0],
+        }
+    )
+    search = ArchivedRun(
+        path="search",
+        experiment="capacity_search",
+        created_at="",
+        params={"num_nodes": 1},
+        tables={"bandwidth": bandwidth, "probes": probes},
+    )
+
+    observations = observations_from_runs([burst, search]).set_index("run")
+    # 1190 - 100 bytes since the scenario started, minus 10 s at 10 B/s idle
+    assert observations.loc["burst", "egress_bytes_per_message"] == 99
+    assert observations.loc["burst", "rate_msgs_per_s"] == 5
+    assert observations.loc["search", "egress_bytes_per_message"] == 1090 / 20
+    assert observations.loc["search", "mesh_degree"] == 6
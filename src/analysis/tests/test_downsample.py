@@ -0,0 +1,22 @@
+import numpy as np
+
+from analysis.downsample import lttb
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[437] = 50.0
+    y[800] = -20.0
+
+    x_out, y_out = lttb(x, y, 20)
+    assert len(x_out) == 20
+    assert x_out[0] == 0 and x_out[-1] == 999
+    assert 50.0 in y_out and -20.0 in y_out
+    assert np.all(np.diff(x_out) > 0)
+
+
+def test_lttb_returns_short_series_unchanged():
+    x_out, y_out = lttb([0, 1, 2], [3, 4, 5], 10)
+    assert x_out.tolist() == [0, 1, 2]
+    assert y_out.tolist() == [3, 4, 5]
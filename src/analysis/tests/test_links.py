@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.links import cross_check, link_matrix
+
+
+def _links():
+    return pd.DataFrame(
+        [
+            # window, src, dst, bytes, payload bytes
+            (10.0, "a", "b", 1200, 1000),
+            (10.0, "b", "a", 100, 0),
+            (11.0, "a", "b", 600, 500),
+            (11.0, "a", "c", 300, 250),
+        ],
+        columns=["window_start", "src", "dst", "bytes", "payload_bytes"],
+    ).assign(window_s=1.0, packets=1)
+
+
+def test_link_matrix_sums_windows_and_fills_silent_pairs():
+    matrix = link_matrix(_links(), value="payload_bytes")
+    assert list(matrix.index) == ["a", "b", "c"]
+    assert matrix.loc["a", "b"] == 1500
+    assert matrix.loc["c", "a"] == 0
+
+
+def test_cross_check_compares_payload_with_libp2p_counters():
+    bandwidth = pd.DataFrame(
+        [
+            # before the capture, within it, and a gap
+            (9.5, "a", "out", 10_000.0),
+            (12.5, "a", "out", 11_750.0),
+            (9.5, "b", "in", 0.0),
+            (11.0, "b", "in", np.nan),
+            (12.5, "b", "in", 3000.0),
+        ],
+        columns=["timestamp", "node", "direction", "total_bytes"],
+    )
+    check = cross_check(_links(), bandwidth).set_index(["node", "direction"])
+
+    assert check.loc[("a", "out"), "captured_payload_bytes"] == 1750
+    assert check.loc[("a", "out"), "payload_ratio"] == pytest.approx(1.0)
+    assert check.loc[("b", "in"), "payload_ratio"] == pytest.approx(0.5)
+    # no counter polled for c
+    assert np.isnan(check.loc[("c", "in"), "libp2p_bytes"])
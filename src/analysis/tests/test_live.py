@@ -0,0 +1,86 @@
+import pytest
+
+from analysis.live import (
+    LiveAggregator,
+    WindowedCounterRate,
+    no_samples,
+    no_traffic_after_publish,
+)
+
+
+def _samples(node, t, bytes_in, bytes_out):
+    return [
+        {"timestamp": t, "node": node, "direction": "in", "total_bytes": bytes_in},
+        {"timestamp": t, "node": node, "direction": "out", "total_bytes": bytes_out},
+    ]
+
+
+def test_windowed_counter_rate_drops_old_samples_and_handles_resets():
+    rate = WindowedCounterRate(window_s=2)
+    assert rate.add(0, 0) == 0.0
+    assert rate.add(1, 100) == 100.0
+    rate.add(2, 200)
+    # 1100 bytes over the last 2s, the sample at t=0 fell out
+    assert rate.add(3, 1200) == pytest.approx(550.0)
+    # counter went back (node restarted): start over
+    assert rate.add(4, 10) == 0.0
+
+
+def test_live_aggregator_totals_and_rates():
+    live = LiveAggregator(window_s=10)
+    live.add_samples(_samples("node-0", 0, 100, 50) + _samples("node-1", 0, 0, 0))
+    live.add_samples(_samples("node-0", 1, 300, 150) + _samples("node-1", 1, 10, 0))
+
+    snapshot = live.snapshot()
+    assert snapshot["network_net_bytes"] == 310
+    assert snapshot["network_rate_bps"] == pytest.approx(310.0)
+    assert snapshot["nodes"]["node-0"] == {"rate_bps": 300.0, "net_bytes": 300.0}
+    assert snapshot["num_samples"] == 8
+
+    live.mark_publish()
+    live.add_samples(_samples("node-0", 2, 400, 150))
+    assert live.bytes_since_publish == 100
+
+
+def test_live_aggregator_delivery_counters():
+    live = LiveAggregator()
+    live.record_published()
+    live.record_delivered(0.2)
+    live.record_delivered(0.4)
+
+    delivery = live.snapshot()["delivery"]
+    assert delivery["published"] == 1
+    assert delivery["delivered"] == 2
+    assert delivery["mean_delay_in_window_s"] == pytest.approx(0.3)
+
+
+def test_abort_when_no_traffic_after_publish():
+    live = LiveAggregator(abort_rules=[no_traffic_after_publish(grace_s=5)])
+    live.add_samples(_samples("node-0", 0, 100, 100))
+    live.mark_publish()
+    assert live.publish_marked_at is not None
+    assert live.check_abort(now=live.publish_marked_at + 1) is None
+
+    reason = live.check_abort(now=live.publish_marked_at + 6)
+    assert reason is not None and "after publishing" in reason
+    assert live.aborted.is_set()
+
+
+def test_no_abort_when_traffic_moves_after_publish():
+    live = LiveAggregator(abort_rules=[no_traffic_after_publish(grace_s=5)])
+    live.add_samples(_samples("node-0", 0, 100, 100))
+    live.mark_publish()
+    live.add_samples(_samples("node-0", 1, 200, 100))
+    assert live.publish_marked_at is not None
+    assert live.check_abort(now=live.publish_marked_at + 6) is None
+
+
+def test_abort_when_samples_stop():
+    live = LiveAggregator(abort_rules=[no_samples(timeout_s=10)])
+    # polling not started yet
+    assert live.check_abort(now=live.started_at + 60) is None
+
+    t = live.started_at
+    live.add_samples(_samples("node-0", t, 0, 0))
+    assert live.check_abort(now=t + 5) is None
+    assert live.check_abort(now=t + 11) is not None
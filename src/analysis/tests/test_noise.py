@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from analysis.noise import MAX_NODE_CPU_BUSY, noise_check
+
+
+def _host_load(pressure: list[float]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "timestamp": np.arange(len(pressure), dtype=float),
+            "cpu_pressure": pressure,
+            "cpu_steal": 0.0,
+            "harness_cpu_busy": np.nan,
+            "node_cpu_busy": 0.5,
+        }
+    )
+
+
+def test_quiet_run_passes_and_unrecorded_columns_are_skipped():
+    report = noise_check(_host_load([0.01] * 100))
+    assert not report.noisy
+    assert np.isnan(report.stats["harness_cpu_busy"])
+
+
+def test_a_contended_minute_flags_the_run():
+    report = noise_check(_host_load([0.01] * 90 + [0.5] * 10))
+    assert report.noisy
+    assert report.reasons[0].startswith("cpu_pressure p95")
+
+
+def test_only_the_window_is_checked():
+    host_load = _host_load([0.5] * 10 + [0.01] * 90)
+    assert noise_check(host_load).noisy
+    assert not noise_check(host_load, start=10).noisy
+    assert noise_check(host_load, start=200).reasons == ["no host load recorded"]
+
+
+def test_busy_node_cores_are_only_checked_when_asked():
+    host_load = _host_load([0.01] * 100).assign(node_cpu_busy=1.0)
+    assert not noise_check(host_load).noisy
+    assert noise_check(host_load, max_node_cpu_busy=MAX_NODE_CPU_BUSY).noisy
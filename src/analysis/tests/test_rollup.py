@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from analysis.rollup import Tier, TieredRollup
+
+
+def test_samples_cascade_through_the_tiers():
+    closed = []
+    rollup = TieredRollup(
+        (Tier(1, 100), Tier(10, 100)),
+        on_close=lambda key, tier, bucket: closed.append((tier, bucket.start)),
+    )
+    for t in range(25):
+        rollup.add("node-0", t + 0.5, float(t))
+    rollup.flush()
+
+    seconds = rollup.buckets("node-0", 0)
+    assert len(seconds) == 25
+    tens = rollup.buckets("node-0", 1)
+    assert [b.start for b in tens] == [0, 10, 20]
+    assert [b.count for b in tens] == [10, 10, 5]
+    assert tens[0].mean == 4.5
+    assert (tens[1].min, tens[1].max, tens[1].last) == (10, 19, 19)
+    assert (1, 10) in closed
+
+
+def test_retention_bounds_memory_per_series():
+    rollup = TieredRollup((Tier(1, 10), Tier(5, 3)))
+    for t in range(1000):
+        rollup.add(("node-0", "nim_gc_mem_bytes"), t, 1.0)
+        rollup.add(("node-0", "libp2p_peers"), t, math.nan)
+
+    assert len(rollup.buckets(("node-0", "nim_gc_mem_bytes"), 0)) == 10
+    # the 995 bucket is still open
+    tens = rollup.buckets(("node-0", "nim_gc_mem_bytes"), 1)
+    assert [b.start for b in tens] == [980, 985, 990]
+    # NaN samples (gaps) are ignored
+    assert ("node-0", "libp2p_peers") not in rollup.keys()
+
+    df = rollup.to_dataframe(1)
+    assert list(df["node"].unique()) == ["node-0"]
+    assert list(df["metric"].unique()) == ["nim_gc_mem_bytes"]
+
+
+def test_tiers_must_nest():
+    with pytest.raises(ValueError):
+        TieredRollup((Tier(10, 10), Tier(15, 10)))
@@ -0,0 +1,47 @@
+import pytest
+
+from analysis.search import capacity_search
+
+
+def _probe_with_capacity(capacity):
+    return lambda rate: (rate <= capacity, {"rate": rate})
+
+
+def test_capacity_search_converges_within_tolerance():
+    result = capacity_search(
+        _probe_with_capacity(137), start_rate=5, max_rate=10_000, rel_tolerance=0.05
+    )
+    assert result.converged
+    assert result.capacity is not None and result.first_failing is not None
+    assert result.capacity <= 137 < result.first_failing
+    assert (result.first_failing - result.capacity) / result.capacity <= 0.05
+    # 5, 10, 20, 40, 80, 160, then bisection between 80 and 160
+    assert [p.rate for p in result.probes[:6]] == [5, 10, 20, 40, 80, 160]
+    assert len(result.probes) <= 12
+
+
+def test_capacity_search_stops_at_max_rate():
+    result = capacity_search(_probe_with_capacity(1e9), start_rate=5, max_rate=100)
+    assert result.converged
+    assert result.capacity == 100
+    assert result.first_failing is None
+
+
+def test_capacity_search_when_start_rate_fails():
+    result = capacity_search(_probe_with_capacity(1), start_rate=5, max_rate=100)
+    assert result.capacity is None
+    assert result.first_failing == 5
+    assert len(result.probes) == 1
+
+
+def test_capacity_search_gives_up_after_max_probes():
+    result = capacity_search(
+        _probe_with_capacity(137),
+        start_rate=5,
+        max_rate=10_000,
+        rel_tolerance=1e-9,
+        max_probes=8,
+    )
+    assert not result.converged
+    assert len(result.probes) == 8
+    assert result.capacity == pytest.approx(120)
@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from analysis.stats import mann_whitney_u, relative_change, scaling_exponent
+
+
+def test_mann_whitney_u_exact_for_separated_samples():
+    u, p_value = mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert u == 0
+    # only 2 of the C(10, 5) = 252 orderings are this extreme
+    assert p_value == pytest.approx(2 / 252)
+
+
+def test_mann_whitney_u_exact_for_interleaved_samples():
+    u, p_value = mann_whitney_u([1, 3, 5, 7], [2, 4, 6, 8])
+    assert u == 6
+    assert p_value == pytest.approx(0.6857142857)
+
+
+def test_mann_whitney_u_with_ties_uses_normal_approximation():
+    u, p_value = mann_whitney_u([1, 1, 2, 3], [2, 3, 3, 4])
+    assert u == 2.5
+    assert p_value == pytest.approx(0.1341691801)
+
+
+def test_mann_whitney_u_is_symmetric_and_ignores_nan():
+    _, p_xy = mann_whitney_u([1, 2, 3, math.nan], [3, 4, 5, 6])
+    _, p_yx = mann_whitney_u([3, 4, 5, 6], [1, 2, 3])
+    assert p_xy == pytest.approx(p_yx)
+
+
+def test_mann_whitney_u_requires_samples():
+    with pytest.raises(ValueError):
+        mann_whitney_u([], [1, 2])
+
+
+def test_relative_change():
+    assert relative_change([10, 10, 20], [11, 11, 30]) == pytest.approx(0.1)
+    assert relative_change([0, 0], [0, 0]) == 0.0
+    assert relative_change([0, 0], [1, 1]) == math.inf
+
+
+def test_scaling_exponent():
+    x = [10, 20, 40, 80]
+    assert scaling_exponent(x, [3 * v for v in x]) == pytest.approx(1.0)
+    assert scaling_exponent(x, [v**2 for v in x]) == pytest.approx(2.0)
+    assert math.isnan(scaling_exponent([10], [1]))
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from analysis.timeseries import bandwidth_rates, network_rate, phase_samples
+
+
+def _samples():
+    records = []
+    for t in range(3):
+        for node, scale in [("node-0", 100), ("node-1", 10)]:
+            for direction in ["in", "out"]:
+                records.append(
+                    {
+                        "timestamp": 1000.0 + t,
+                        "node": node,
+                        "direction": direction,
+                        "total_bytes": t * scale,
+                    }
+                )
+    return pd.DataFrame(records)
+
+
+def test_bandwidth_rates_sums_directions_per_poll():
+    rates = bandwidth_rates(_samples())
+    node_0 = rates[rates["node"] == "node-0"]
+    assert node_0["rate_bps"].tolist() == [200.0, 200.0]
+    assert node_0["timestamp"].tolist() == [1001.0, 1002.0]
+
+
+def test_network_rate_sums_nodes():
+    network = network_rate(bandwidth_rates(_samples()))
+    assert network["rate_bps"].tolist() == pytest.approx([220.0, 220.0])
+
+
+def test_phase_samples_matches_whole_phase_names():
+    df = pd.DataFrame(
+        {
+            "timestamp": [1.0, 2.0, 3.0, 4.0],
+            "phases": ["baseline", "scenario,burst", "scenario,burst_end", None],
+        }
+    )
+    assert phase_samples(df, "burst")["timestamp"].tolist() == [2.0]
+    assert phase_samples(df, "scenario")["timestamp"].tolist() == [2.0, 3.0]
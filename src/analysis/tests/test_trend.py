@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from analysis.trend import LeakDetector, OnlineTrend
+
+
+def test_online_trend_matches_least_squares():
+    rng = np.random.default_rng(0)
+    t = 1.7e9 + np.arange(200) * 60.0
+    y = 3.0 * (t - t[0]) + 1000 + rng.normal(0, 50, len(t))
+
+    trend = OnlineTrend()
+    for ti, yi in zip(t, y):
+        trend.add(ti, yi)
+
+    slope, _ = np.polyfit(t - t[0], y, 1)
+    assert trend.slope == pytest.approx(slope)
+    assert trend.mean == pytest.approx(y.mean())
+    assert trend.slope_t_stat > 100
+
+
+def test_forgetting_trend_follows_recent_behaviour():
+    trend = OnlineTrend(half_life_s=600)
+    for minute in range(240):
+        # grows for an hour, then flat
+        trend.add(minute * 60.0, min(minute, 60) * 10.0)
+    assert abs(trend.slope) < 1e-3
+
+
+def _feed(detector, node, values_per_minute):
+    for minute, value in enumerate(values_per_minute):
+        detector.add((node, "nim_gc_mem_bytes"), minute * 60.0, value)
+
+
+def test_leak_detector_flags_only_unbounded_growth():
+    rng = np.random.default_rng(1)
+    minutes = np.arange(4 * 60)
+    base = 50e6
+    detector = LeakDetector()
+    # +5%/h and still growing
+    _feed(detector, "leaking", base * (1 + 0.05 * minutes / 60))
+    # grows during warm-up, then plateaus
+    _feed(detector, "warm-up", base * (1 + 0.2 * np.minimum(minutes, 60) / 60))
+    # flat but noisy
+    _feed(detector, "noisy", base * (1 + rng.normal(0, 0.02, len(minutes))))
+    detector.add(("leaking", "libp2p_peers"), 0, 5)
+
+    flagged = {status.key for status in detector.flagged()}
+    assert flagged == {("leaking", "nim_gc_mem_bytes")}
+
+    report = detector.report().set_index(["node", "metric"])
+    growth = report.loc[("leaking", "nim_gc_mem_bytes"), "relative_growth_per_hour"]
+    assert growth == pytest.approx(0.05 / 1.1, rel=0.05)
+
+
+def test_leak_detector_waits_for_enough_data():
+    detector = LeakDetector()
+    _feed(detector, "leaking", 1e6 * (1 + np.arange(10)))
+    assert detector.flagged() == []
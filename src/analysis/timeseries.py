@@ -0,0 +1,192 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from .downsample import lttb
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Points kept per series once downsampled, independent of the run length
+NODE_SERIES_POINTS = 300
+NETWORK_SERIES_POINTS = 2000
+NETWORK_BIN_S = 1.0
+
+
+def bandwidth_rates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts polled `libp2p_network_bytes_total` samples (`timestamp`,
+    `node`, `direction`, `total_bytes`) into each node's byte rate (in +
+    out) per poll: `timestamp`, `node`, `rate_bps`.
+
+    Done with numpy on the sorted samples instead of pandas groupbys, as
+    long runs over many nodes have millions of samples.
+    """
+    node_codes, node_names = pd.factorize(df["node"])
+    direction_codes, directions = pd.factorize(df["direction"])
+    timestamps = df["timestamp"].to_numpy(dtype=float)
+    total_bytes = df["total_bytes"].to_numpy(dtype=float)
+
+    order = np.lexsort((timestamps, direction_codes, node_codes))
+    node_codes = node_codes[order]
+    timestamps = timestamps[order]
+    total_bytes = total_bytes[order]
+    series = node_codes * len(directions) + direction_codes[order]
+
+    n = len(series)
+    index = np.arange(n)
+    series_start = np.r_[True, series[1:] != series[:-1]] if n else np.array([], bool)
+    # both directions of a node come from the same scrape, so the n-th
+    # sample of each direction belongs to the n-th poll of the node
+    poll = index - np.maximum.accumulate(np.where(series_start, index, 0))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.diff(total_bytes, prepend=np.nan) / np.diff(
+            timestamps, prepend=np.nan
+        )
+    # the first sample of each series has no rate, resets go negative
+    valid = ~series_start & np.isfinite(rate)
+    rate = np.clip(rate, 0, None)
+
+    num_polls = poll.max() + 1 if n else 1
+    keys, inverse = np.unique(
+        node_codes[valid] * num_polls + poll[valid], return_inverse=True
+    )
+    counts = np.bincount(inverse)
+    rates = pd.DataFrame(
+        {
+            "timestamp": np.bincount(inverse, weights=timestamps[valid]) / counts,
+            "node": np.asarray(node_names)[keys // num_polls],
+            "rate_bps": np.bincount(inverse, weights=rate[valid]),
+        }
+    )
+    return rates.sort_values("timestamp", ignore_index=True)
+
+
+def network_rate(rates: pd.DataFrame, bin_s: float = NETWORK_BIN_S) -> pd.DataFrame:
+    """
+    Sums the node rates of `bandwidth_rates` into the network's rate, in
+    time bins of `bin_s` (robust to nodes that missed a poll).
+    """
+    t0 = rates["timestamp"].min()
+    binned = rates.assign(bin=((rates["timestamp"] - t0) // bin_s).astype(int))
+    per_node = binned.groupby(["bin", "node"], observed=True).agg(
+        timestamp=("timestamp", "mean"), rate_bps=("rate_bps", "mean")
+    )
+    network = per_node.groupby("bin").agg(
+        timestamp=("timestamp", "mean"), rate_bps=("rate_bps", "sum")
+    )
+    return pd.DataFrame(network).reset_index(drop=True)
+
+
+def phase_window(spans: pd.DataFrame, name: str) -> tuple[float, float] | None:
+    """Returns the (start, end) of the first `Profiler` span called `name`."""
+    phase = spans.loc[spans["name"] == name]
+    if phase.empty:
+        return None
+    return float(phase["start"].iloc[0]), float(phase["end"].iloc[0])
+
+
+def phase_samples(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """
+    Returns the samples stamped with the phase `name` (their `phases`
+    column, see `harness.timeline.PhaseLog`).
+    """
+    return df.loc[df["phases"].fillna("").str.split(",").map(lambda p: name in p)]
+
+
+@dataclass
+class TimeSeriesPlot:
+    """
+    One run's bandwidth time-series figure.
+
+    Only holds plain data, so it can be sent to a process pool
+    (`render_plots`). `publish_times` are drawn as markers and the
+    `baseline` (start, end) window as a band; both are unix times.
+    """
+
+    df: pd.DataFrame
+    title: str
+    filename: str
+    publish_times: list[float] = field(default_factory=list)
+    baseline: tuple[float, float] | None = None
+
+
+def plot_bandwidth_time_series(plot: TimeSeriesPlot) -> str:
+    """
+    Renders per-node and network-wide bandwidth rates of a run.
+
+    Every series is LTTB downsampled first, and all node series are
+    drawn as a single `LineCollection`: the drawing cost doesn't grow
+    with the run length, only the (vectorized) rate computation does.
+    """
+    rates = bandwidth_rates(plot.df)
+    network = network_rate(rates)
+    t0 = rates["timestamp"].min()
+
+    fig = Figure(figsize=(14, 10))
+    ax_nodes, ax_network = fig.subplots(2, 1, sharex=True)
+
+    segments = []
+    for _, node_rates in rates.groupby("node", observed=True):
+        x, y = lttb(
+            node_rates["timestamp"] - t0,
+            node_rates["rate_bps"] / 1024,
+            NODE_SERIES_POINTS,
+        )
+        segments.append(np.column_stack([x, y]))
+    ax_nodes.add_collection(LineCollection(segments, linewidths=0.8, alpha=0.4))
+    ax_nodes.autoscale()
+    ax_nodes.set_title(f"{plot.title}: per node", fontsize=16)
+    ax_nodes.set_ylabel("Rate (KB/s)", fontsize=12)
+
+    x, y = lttb(
+        network["timestamp"] - t0, network["rate_bps"] / 1024, NETWORK_SERIES_POINTS
+    )
+    ax_network.plot(x, y, linewidth=1.2)
+    ax_network.set_title(f"{plot.title}: network", fontsize=16)
+    ax_network.set_xlabel("Time since first sample (s)", fontsize=12)
+    ax_network.set_ylabel("Rate (KB/s)", fontsize=12)
+
+    if plot.baseline:
+        start, end = plot.baseline
+        for ax in (ax_nodes, ax_network):
+            ax.axvspan(start - t0, end - t0, color="grey", alpha=0.15)
+        in_baseline = network.loc[
+            (network["timestamp"] >= start) & (network["timestamp"] <= end),
+            "rate_bps",
+        ]
+        if not in_baseline.empty:
+            mean, std = in_baseline.mean() / 1024, in_baseline.std(ddof=0) / 1024
+            ax_network.axhspan(
+                mean - std, mean + std, color="green", alpha=0.15, label="baseline"
+            )
+
+    for i, publish_time in enumerate(plot.publish_times):
+        for ax in (ax_nodes, ax_network):
+            ax.axvline(
+                publish_time - t0,
+                color="red",
+                linestyle="--",
+                linewidth=1,
+                label="publish" if i == 0 and ax is ax_network else None,
+            )
+
+    if plot.baseline or plot.publish_times:
+        ax_network.legend()
+
+    fig.savefig(plot.filename)
+    return plot.filename
+
+
+def render_plots(plots: list[TimeSeriesPlot], max_workers: int | None = None):
+    """Renders many runs' figures in parallel, one process per figure."""
+    logger.info(f"Rendering {len(plots)} time-series plots...")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for filename in executor.map(plot_bandwidth_time_series, plots):
+            logger.info(f"Plot saved to {filename}")
@@ -0,0 +1,186 @@
+import math
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Relative growth per hour above which a metric's trend is a leak suspect
+DEFAULT_GROWTH_LIMITS = {
+    "nim_gc_mem_bytes": 0.02,
+    "nim_gc_mem_occupied_bytes": 0.02,
+    "libp2p_open_streams": 0.05,
+}
+# Trends fitted on less than this are not judged
+MIN_TREND_SPAN_S = 30 * 60
+# Half-life of the recent trend, which tells growth from a plateau
+RECENT_HALF_LIFE_S = 20 * 60
+# t-statistic of the slope for it to count as growth, not noise
+MIN_SLOPE_T_STAT = 3.0
+# The recent slope must be at least this fraction of the overall slope
+MIN_RECENT_SLOPE_RATIO = 0.5
+
+
+class OnlineTrend:
+    """
+    Least-squares line through `(t, y)` points, updated in O(1) memory
+    and time per point (Welford-style running sums).
+
+    With `half_life_s`, older points are exponentially forgotten, so the
+    line follows the recent behaviour of the series.
+    """
+
+    def __init__(self, half_life_s: float | None = None):
+        self._half_life_s = half_life_s
+        self.n = 0
+        self._t0: float | None = None
+        self._last_t = 0.0
+        self._weight = 0.0
+        self._mean_t = 0.0
+        self._mean_y = 0.0
+        self._sxx = 0.0
+        self._sxy = 0.0
+        self._syy = 0.0
+
+    def add(self, t: float, y: float):
+        if self._t0 is None:
+            self._t0 = t
+        t -= self._t0  # keeps the sums well conditioned with unix times
+
+        decay = 1.0
+        if self._half_life_s and self.n:
+            decay = 0.5 ** ((t - self._last_t) / self._half_life_s)
+        self.n += 1
+        self._last_t = t
+        self._weight = decay * self._weight + 1
+        dt = t - self._mean_t
+        dy = y - self._mean_y
+        self._mean_t += dt / self._weight
+        self._mean_y += dy / self._weight
+        self._sxx = decay * self._sxx + dt * (t - self._mean_t)
+        self._sxy = decay * self._sxy + dt * (y - self._mean_y)
+        self._syy = decay * self._syy + dy * (y - self._mean_y)
+
+    @property
+    def span_s(self) -> float:
+        return self._last_t
+
+    @property
+    def mean(self) -> float:
+        return self._mean_y
+
+    @property
+    def slope(self) -> float:
+        return self._sxy / self._sxx if self._sxx > 0 else 0.0
+
+    @property
+    def slope_t_stat(self) -> float:
+        """Slope over its standard error (unweighted fits only)."""
+        if self.n < 3 or self._sxx <= 0:
+            return 0.0
+        residuals = max(self._syy - self.slope * self._sxy, 0.0)
+        stderr = math.sqrt(residuals / (self.n - 2) / self._sxx)
+        if stderr == 0:
+            return math.copysign(math.inf, self.slope) if self.slope else 0.0
+        return self.slope / stderr
+
+
+@dataclass
+class GrowthStatus:
+    key: tuple[str, str]
+    points: int
+    span_s: float
+    mean: float
+    slope_per_hour: float
+    relative_growth_per_hour: float
+    slope_t_stat: float
+    recent_slope_per_hour: float
+    limit_per_hour: float
+    flagged: bool
+
+
+class LeakDetector:
+    """
+    Fits the trend of every `(node, metric)` series online and flags the
+    ones that keep growing.
+
+    A series is flagged once its trend covers `min_span_s` and:
+    - its slope is significant (t-statistic of at least `MIN_SLOPE_T_STAT`),
+    - it grows by more than its metric's limit (relative to its mean)
+      per hour (`growth_limits`),
+    - and it still grows now: the slope of the recent trend (points
+      forgotten with `recent_half_life_s`) is at least
+      `MIN_RECENT_SLOPE_RATIO` of the overall one. Memory that grew
+      during warm-up and then plateaued isn't flagged.
+
+    Metrics without a limit (e.g.: `libp2p_peers`) are fitted, not judged.
+    """
+
+    def __init__(
+        self,
+        growth_limits: dict[str, float] = DEFAULT_GROWTH_LIMITS,
+        min_span_s: float = MIN_TREND_SPAN_S,
+        recent_half_life_s: float = RECENT_HALF_LIFE_S,
+    ):
+        self._growth_limits = growth_limits
+        self._min_span_s = min_span_s
+        self._recent_half_life_s = recent_half_life_s
+        self._lock = threading.Lock()
+        self._trends: dict[tuple[str, str], tuple[OnlineTrend, OnlineTrend]] = {}
+
+    def add(self, key: tuple[str, str], t: float, value: float):
+        if math.isnan(value):
+            return
+        with self._lock:
+            if key not in self._trends:
+                self._trends[key] = (
+                    OnlineTrend(),
+                    OnlineTrend(half_life_s=self._recent_half_life_s),
+                )
+            for trend in self._trends[key]:
+                trend.add(t, value)
+
+    def status(self, key: tuple[str, str]) -> GrowthStatus:
+        with self._lock:
+            overall, recent = self._trends[key]
+            _, metric = key
+            limit = self._growth_limits.get(metric, math.inf)
+            slope_per_hour = overall.slope * 3600
+            relative_growth = (
+                slope_per_hour / abs(overall.mean) if overall.mean else 0.0
+            )
+            flagged = (
+                overall.span_s >= self._min_span_s
+                and overall.slope_t_stat >= MIN_SLOPE_T_STAT
+                and relative_growth > limit
+                and recent.slope >= MIN_RECENT_SLOPE_RATIO * overall.slope
+            )
+            return GrowthStatus(
+                key=key,
+                points=overall.n,
+                span_s=overall.span_s,
+                mean=overall.mean,
+                slope_per_hour=slope_per_hour,
+                relative_growth_per_hour=relative_growth,
+                slope_t_stat=overall.slope_t_stat,
+                recent_slope_per_hour=recent.slope * 3600,
+                limit_per_hour=limit,
+                flagged=flagged,
+            )
+
+    def flagged(self) -> list[GrowthStatus]:
+        return [status for status in self.statuses() if status.flagged]
+
+    def statuses(self) -> list[GrowthStatus]:
+        with self._lock:
+            keys = list(self._trends)
+        return [self.status(key) for key in keys]
+
+    def report(self) -> pd.DataFrame:
+        """One row per series: `node`, `metric` and its `GrowthStatus` fields."""
+        rows = []
+        for status in self.statuses():
+            node, metric = status.key
+            row = {"node": node, "metric": metric, **vars(status)}
+            del row["key"]
+            rows.append(row)
+        return pd.DataFrame(rows)
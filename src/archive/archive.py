@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import pandas as pd
+
+RUNS_DIR = "results/runs"
+RUN_META_FILE = "run.json"
+ARCHIVE_FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+@dataclass
+class ArchivedRun:
+    """A single experiment run loaded back from the archive."""
+
+    path: str
+    experiment: str
+    created_at: str
+    params: dict[str, Any]
+    summary: dict[str, Any] = field(default_factory=dict)
+    tables: dict[str, pd.DataFrame] = field(default_factory=dict)
+
+
+def save_run(
+    experiment: str,
+    params: dict[str, Any],
+    tables: dict[str, pd.DataFrame],
+    summary: dict[str, Any] | None = None,
+    root: str = RUNS_DIR,
+) -> str:
+    """
+    Stores one experiment run in its own timestamped directory.
+
+    Layout of a run directory:
+    - `run.json`: experiment name, creation time, params and summary
+    - `<table>.csv`: one file per table (e.g.: raw polled metrics)
+
+    All experiments share this format so that runs (e.g.: of different
+    nwaku image tags) can be loaded and compared with the same code.
+
+    Returns the path of the created run directory.
+    """
+    created_at = datetime.now(timezone.utc)
+    run_id = (
+        f"{created_at.strftime('%Y%m%dT%H%M%SZ')}-{experiment}-{uuid.uuid4().hex[:6]}"
+    )
+    path = os.path.join(root, run_id)
+    os.makedirs(path)
+
+    for name, df in tables.items():
+        df.to_csv(os.path.join(path, f"{name}.csv"), index=False)
+
+    meta = {
+        "format_version": ARCHIVE_FORMAT_VERSION,
+        "experiment": experiment,
+        "created_at": created_at.isoformat(),
+        "params": params,
+        "summary": summary or {},
+        "tables": sorted(tables.keys()),
+    }
+    with open(os.path.join(path, RUN_META_FILE), "w") as f:
+        json.dump(meta, f, indent=2, default=_to_json)
+
+    logger.info(f"Archived run {run_id} to {path}")
+    return path
+
+
+def load_run(path: str, tables: list[str] | None = None) -> ArchivedRun:
+    """
+    Loads a run directory created by `save_run`.
+
+    If `tables` is given, only those tables are read from disk.
+    """
+    with open(os.path.join(path, RUN_META_FILE), "r") as f:
+        meta = json.load(f)
+
+    names = meta.get("tables", []) if tables is None else tables
+    return ArchivedRun(
+        path=path,
+        experiment=meta["experiment"],
+        created_at=meta["created_at"],
+        params=meta.get("params", {}),
+        summary=meta.get("summary", {}),
+        tables={name: pd.read_csv(os.path.join(path, f"{name}.csv")) for name in names},
+    )
+
+
+def list_runs(root: str = RUNS_DIR, experiment: str | None = None) -> list[str]:
+    """
+    Returns the paths of all archived runs, oldest first.
+
+    If `experiment` is given, only runs of that experiment are returned.
+    """
+    if not os.path.isdir(root):
+        return []
+
+    paths = []
+    for entry in sorted(os.listdir(root)):
+        meta_path = os.path.join(root, entry, RUN_META_FILE)
+        if not os.path.isfile(meta_path):
+            continue
+
+        if experiment is not None:
+            with open(meta_path, "r") as f:
+                if json.load(f).get("experiment") != experiment:
+                    continue
+
+        paths.append(os.path.join(root, entry))
+    return paths
+
+
+def _to_json(value: Any) -> Any:
+    """Converts numpy/pandas scalars that `json` can't serialize."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from archive.archive import list_runs, load_run, save_run
+
+
+def test_save_and_load_run(tmp_path):
+    df = pd.DataFrame({"node": ["node-0", "node-1"], "total_bytes": [10.0, 20.0]})
+    path = save_run(
+        "some-experiment",
+        params={"num_nodes": 2},
+        tables={"bandwidth": df},
+        summary={"net_bandwidth_cost": 30},
+        root=str(tmp_path),
+    )
+
+    run = load_run(path)
+    assert run.experiment == "some-experiment"
+    assert run.params == {"num_nodes": 2}
+    assert run.summary == {"net_bandwidth_cost": 30}
+    pd.testing.assert_frame_equal(run.tables["bandwidth"], df)
+
+
+def test_list_runs_filters_by_experiment(tmp_path):
+    first = save_run("a", params={}, tables={}, root=str(tmp_path))
+    second = save_run("b", params={}, tables={}, root=str(tmp_path))
+
+    assert sorted(list_runs(str(tmp_path))) == sorted([first, second])
+    assert list_runs(str(tmp_path), experiment="b") == [second]
+    assert list_runs(str(tmp_path / "missing")) == []
@@ -0,0 +1,402 @@
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List
+
+from mesh.resources import ROLE_BOOTSTRAP, ROLE_REGULAR
+from nwaku import client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Age of a snapshot readers accept by default
+GATEWAY_TTL_S = 1.0
+GATEWAY_HOST = "127.0.0.1"
+# Scrape deadline of the nodes, at least
+MIN_GATEWAY_DEADLINE_S = 0.5
+
+# Families the gateway adds to the merged exposition, per node
+UP_METRIC = "p2p_eval_gateway_up"
+AGE_METRIC = "p2p_eval_gateway_scrape_age_seconds"
+
+
+@dataclass
+class NodeSnapshot:
+    """The last scrape of a node's metrics, parsed once for every reader."""
+
+    node: str
+    role: str
+    # unix time the metrics were received (or the scrape failed), the
+    # same clock as every other sample
+    scraped_at: float
+    # monotonic time of the scrape, to tell its age
+    fetched_at: float
+    raw: str = ""
+    samples: list[dict] = field(default_factory=list)
+    error: Exception | None = None
+
+    @property
+    def age_s(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class MetricsGateway:
+    """
+    Scrapes the metrics of every node of a mesh once, for all consumers.
+
+    Each node's last scrape is cached as a parsed `NodeSnapshot`. Readers
+    say how old a snapshot may be (`max_age_s`, `ttl_s` by default): a
+    younger one is served from the cache, otherwise the node is scraped
+    right away. Concurrent readers of the same node wait for a single
+    scrape, so a node is never scraped more than once for all of them.
+    A failed scrape is cached too, and re-raised to its readers, so a
+    node that is down isn't asked again by every consumer.
+
+    With an `interval_s`, every node is also scraped that often in the
+    background once started, e.g.: to keep a served exposition fresh.
+    Without it (the default), nodes are only scraped when read, so the
+    readers' own pace (e.g.: a backed-off `SamplingPolicy`) sets the
+    scrape rate. With a `port` (0 for any free one) the cache is
+    served over HTTP on `host`:
+    - `GET /metrics`: a single Prometheus exposition of all nodes, each
+      sample labelled with its `node` and `role`, e.g.: for Prometheus,
+    - `GET /api/v1/query`: the samples as JSON, filtered by `name`,
+      `prefix`, `node`, `role` (all repeatable) and `label=key:value`.
+    """
+
+    def __init__(
+        self,
+        interval_s: float | None = None,
+        ttl_s: float | None = None,
+        port: int | None = None,
+        host: str = GATEWAY_HOST,
+    ):
+        self._interval_s = interval_s
+        if ttl_s is None:
+            ttl_s = GATEWAY_TTL_S if interval_s is None else interval_s
+        self._ttl_s = ttl_s
+        self._port = port
+        self._host = host
+        self._clients: Dict[str, client.WakuClient] = {}
+        self._roles: Dict[str, str] = {}
+        self._node_locks: Dict[str, threading.Lock] = {}
+        self._snapshots: Dict[str, NodeSnapshot] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._server: ThreadingHTTPServer | None = None
+        self._server_thread: threading.Thread | None = None
+        self.scrapes = 0
+
+    def add_node(
+        self, node_id: str, waku_client: client.WakuClient, role: str = ROLE_REGULAR
+    ):
+        with self._lock:
+            self._clients[node_id] = waku_client
+            self._roles[node_id] = role
+            self._node_locks[node_id] = threading.Lock()
+            self._snapshots.pop(node_id, None)
+
+    @property
+    def nodes(self) -> list[str]:
+        with self._lock:
+            return list(self._clients)
+
+    @property
+    def url(self) -> str | None:
+        """Base URL of the HTTP endpoints, once served."""
+        if not self._server:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._stop_event.clear()
+        if self._interval_s is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        if self._port is not None:
+            self._server = ThreadingHTTPServer(
+                (self._host, self._port), _handler_for(self)
+            )
+            self._server_thread = threading.Thread(
+                target=self._server.serve_forever, daemon=True
+            )
+            self._server_thread.start()
+            logger.info(f"Serving the metrics of all nodes at {self.url}/metrics")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            if self._server_thread:
+                self._server_thread.join()
+                self._server_thread = None
+            self._server = None
+        logger.info(f"Metrics gateway stopped after {self.scrapes} scrapes")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def snapshot(
+        self,
+        node_id: str,
+        max_age_s: float | None = None,
+        deadline_s: float | None = None,
+    ) -> NodeSnapshot:
+        """
+        Returns the node's snapshot, scraping it first if the cached one
+        is older than `max_age_s` (`ttl_s` by default; 0 always scrapes).
+        A new scrape takes at most `deadline_s` (retries included).
+
+        Raises the scrape's error (a `WakuClientException`) if it failed.
+        """
+        max_age_s = self._ttl_s if max_age_s is None else max_age_s
+        snapshot = self._fresh(node_id, max_age_s)
+        if snapshot is None:
+            with self._node_locks[node_id]:
+                # another reader may have scraped while we waited
+                snapshot = self._fresh(node_id, max_age_s) or self._scrape(
+                    node_id, deadline_s
+                )
+        if snapshot.error:
+            raise snapshot.error
+        return snapshot
+
+    def _fresh(self, node_id: str, max_age_s: float) -> NodeSnapshot | None:
+        with self._lock:
+            snapshot = self._snapshots.get(node_id)
+        if snapshot and snapshot.age_s <= max_age_s:
+            return snapshot
+        return None
+
+    def _scrape(self, node_id: str, deadline_s: float | None) -> NodeSnapshot:
+        deadline_s = max(deadline_s or self._ttl_s, MIN_GATEWAY_DEADLINE_S)
+        with self._lock:
+            waku_client = self._clients[node_id]
+            role = self._roles[node_id]
+        try:
+            raw = waku_client.get_metrics(deadline_s=deadline_s)
+            snapshot = NodeSnapshot(
+                node_id,
+                role,
+                scraped_at=time.time(),
+                fetched_at=time.monotonic(),
+                raw=raw,
+                samples=client.parse_metrics(raw),
+            )
+        except client.WakuClientException as e:
+            snapshot = NodeSnapshot(
+                node_id, role, time.time(), time.monotonic(), error=e
+            )
+        with self._lock:
+            self._snapshots[node_id] = snapshot
+            self.scrapes += 1
+        return snapshot
+
+    def refresh(self, max_age_s: float | None = None, deadline_s: float | None = None):
+        """Scrapes, concurrently, every node whose snapshot is older than `max_age_s`."""
+
+        def _refresh_node(node_id: str):
+            try:
+                self.snapshot(node_id, max_age_s, deadline_s)
+            except client.WakuClientException:
+                pass  # cached, its readers get the error
+
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(_refresh_node, self.nodes))
+
+    def _run(self):
+        # only started with an interval
+        interval_s = self._interval_s or GATEWAY_TTL_S
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            # a snapshot a reader just took is recent enough
+            self.refresh(max_age_s=interval_s / 2, deadline_s=interval_s)
+            remaining = interval_s - (time.monotonic() - started)
+            if remaining > 0 and self._stop_event.wait(remaining):
+                break
+
+    def query(
+        self,
+        names: Iterable[str] | None = None,
+        prefix: str | None = None,
+        nodes: Iterable[str] | None = None,
+        roles: Iterable[str] | None = None,
+        labels: Dict[str, str] | None = None,
+        max_age_s: float | None = None,
+    ) -> tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """
+        Returns the samples of the selected nodes (all by default), each
+        with its `node`, `role` and `scraped_at`, that match every given
+        filter, and the nodes whose scrape failed with their error.
+        """
+        names = set(names) if names is not None else None
+        roles = set(roles) if roles is not None else None
+        known = self.nodes
+        selected = [
+            node_id
+            for node_id in (list(nodes) if nodes is not None else known)
+            if node_id in known and (roles is None or self._roles[node_id] in roles)
+        ]
+
+        samples, errors = [], {}
+        for node_id in selected:
+            try:
+                snapshot = self.snapshot(node_id, max_age_s)
+            except client.WakuClientException as e:
+                errors[node_id] = str(e)
+                continue
+            for sample in snapshot.samples:
+                if names is not None and sample["name"] not in names:
+                    continue
+                if prefix is not None and not sample["name"].startswith(prefix):
+                    continue
+                if labels and any(
+                    sample["labels"].get(key) != value for key, value in labels.items()
+                ):
+                    continue
+                samples.append(
+                    {
+                        "node": node_id,
+                        "role": snapshot.role,
+                        "scraped_at": snapshot.scraped_at,
+                        **sample,
+                    }
+                )
+        return samples, errors
+
+    def exposition(self, max_age_s: float | None = None) -> str:
+        """
+        Merges the expositions of all nodes into one: the samples of a
+        family are grouped under a single `# HELP`/`# TYPE` header and
+        labelled with their `node` and `role`.
+        """
+        headers: Dict[str, list[str]] = {}
+        families: Dict[str, list[str]] = {UP_METRIC: [], AGE_METRIC: []}
+        headers[UP_METRIC] = [
+            f"# HELP {UP_METRIC} Whether the last scrape of the node succeeded.",
+            f"# TYPE {UP_METRIC} gauge",
+        ]
+        headers[AGE_METRIC] = [
+            f"# HELP {AGE_METRIC} Age of the node's last scrape.",
+            f"# TYPE {AGE_METRIC} gauge",
+        ]
+
+        for node_id in self.nodes:
+            try:
+                snapshot = self.snapshot(node_id, max_age_s)
+                up = 1
+            except client.WakuClientException:
+                with self._lock:
+                    snapshot = self._snapshots[node_id]
+                up = 0
+            node_labels = f'node="{node_id}",role="{snapshot.role}"'
+            families[UP_METRIC].append(f"{UP_METRIC}{{{node_labels}}} {up}")
+            families[AGE_METRIC].append(
+                f"{AGE_METRIC}{{{node_labels}}} {snapshot.age_s:.3f}"
+            )
+            for family, header, lines in _families(snapshot.raw):
+                headers.setdefault(family, header)
+                families.setdefault(family, []).extend(
+                    _with_labels(line, node_labels) for line in lines
+                )
+
+        exposition = []
+        for family, lines in families.items():
+            exposition.extend(headers.get(family, []))
+            exposition.extend(lines)
+        return "\n".join(exposition) + "\n"
+
+
+def _families(raw: str) -> Iterable[tuple[str, list[str], list[str]]]:
+    """
+    Splits an exposition into `(family, header lines, sample lines)`.
+
+    Samples belong to the family of the `# HELP`/`# TYPE` lines before
+    them if their name starts with it (e.g.: a histogram's `_bucket`,
+    `_sum` and `_count`), otherwise to a family of their own name.
+    """
+    families: Dict[str, tuple[list[str], list[str]]] = {}
+    current = None
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        if line.startswith("#"):
+            parts = line.split(None, 3)
+            if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                current = parts[2]
+                families.setdefault(current, ([], []))[0].append(line)
+            continue
+
+        name = line.split("{", 1)[0].split(" ", 1)[0]
+        family = current if current and name.startswith(current) else name
+        families.setdefault(family, ([], []))[1].append(line)
+    for family, (header, lines) in families.items():
+        yield family, header, lines
+
+
+def _with_labels(line: str, labels: str) -> str:
+    """Adds `labels` (`key="value",...`) to a sample line."""
+    brace = line.find("{")
+    space = line.find(" ")
+    if brace != -1 and (space == -1 or brace < space):
+        separator = "" if line[brace + 1] == "}" else ","
+        return f"{line[: brace + 1]}{labels}{separator}{line[brace + 1 :]}"
+    return f"{line[:space]}{{{labels}}}{line[space:]}"
+
+
+def _handler_for(gateway: MetricsGateway) -> type[BaseHTTPRequestHandler]:
+    class _GatewayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            if url.path == "/metrics":
+                self._reply(
+                    200,
+                    gateway.exposition(),
+                    "text/plain; version=0.0.4; charset=utf-8",
+                )
+            elif url.path == "/api/v1/query":
+                params = urllib.parse.parse_qs(url.query)
+                labels = dict(
+                    label.split(":", 1)
+                    for label in params.get("label", [])
+                    if ":" in label
+                )
+                samples, errors = gateway.query(
+                    names=params.get("name"),
+                    prefix=params.get("prefix", [None])[0],
+                    nodes=params.get("node"),
+                    roles=params.get("role"),
+                    labels=labels,
+                )
+                body = json.dumps({"samples": samples, "errors": errors})
+                self._reply(200, body, "application/json")
+            else:
+                self._reply(404, "Not found\n", "text/plain")
+
+        def _reply(self, status: int, body: str, content_type: str):
+            encoded = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format, *args):
+            logger.debug(f"Gateway request: {format % args}")
+
+    return _GatewayHandler
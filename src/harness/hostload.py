@@ -0,0 +1,163 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+HOST_LOAD_INTERVAL_S = 1.0
+PROC_STAT = "/proc/stat"
+# Pressure stall information, Linux >= 4.20 with PSI enabled
+PROC_CPU_PRESSURE = "/proc/pressure/cpu"
+PROC_LOADAVG = "/proc/loadavg"
+
+
+def parse_proc_stat(text: str) -> Dict[int | None, tuple[int, int, int]]:
+    """
+    Parses `/proc/stat` into the `(busy, steal, total)` jiffies of every
+    core, and of all of them under `None`. Waiting on I/O counts as idle,
+    and guest time is already part of user time.
+    """
+    times = {}
+    for line in text.splitlines():
+        if not line.startswith("cpu"):
+            continue
+        name, *values = line.split()
+        user, nice, system, idle, iowait, irq, softirq, steal = (
+            [int(v) for v in values[:8]] + [0] * 8
+        )[:8]
+        total = user + nice + system + idle + iowait + irq + softirq + steal
+        core = None if name == "cpu" else int(name[3:])
+        times[core] = (total - idle - iowait - steal, steal, total)
+    return times
+
+
+def parse_cpu_pressure(text: str) -> int | None:
+    """Returns the `some` total of `/proc/pressure/cpu`: µs any task waited for a core."""
+    for line in text.splitlines():
+        if line.startswith("some"):
+            for field in line.split()[1:]:
+                key, _, value = field.partition("=")
+                if key == "total":
+                    return int(value)
+    return None
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class HostLoadMonitor:
+    """
+    Records how loaded the host is while a run goes on, to tell the runs
+    whose results the host's own contention may have changed.
+
+    Every `interval_s`, a record is appended to `records`, with the share
+    of the interval:
+
+    - `cpu_busy`: all cores were busy (0 to 1)
+    - `cpu_steal`: the hypervisor ran someone else on our cores
+    - `cpu_pressure`: some task waited for a core (PSI `some`; NaN
+      without PSI). Unlike busy time, it only grows when the cores are
+      oversubscribed, which is what changes the nodes' behaviour.
+    - `harness_cpu_busy` and `node_cpu_busy`: the harness' and the
+      nodes' cores were busy (NaN if their cores aren't given, e.g.: a
+      `mesh.resources.ResourcePlan` without harness cores)
+
+    and `harness_cpu_cores`, the cores this process used on average, and
+    `load1`, the 1 min load average.
+    """
+
+    def __init__(
+        self,
+        records: List[Dict[str, Any]],
+        harness_cpus: List[int] | None = None,
+        node_cpus: List[int] | None = None,
+        interval_s: float = HOST_LOAD_INTERVAL_S,
+    ):
+        self._records = records
+        self._harness_cpus = harness_cpus or []
+        self._node_cpus = node_cpus or []
+        self._interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="host-load", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _snapshot(self) -> dict:
+        stat = _read(PROC_STAT)
+        pressure = _read(PROC_CPU_PRESSURE)
+        process = os.times()
+        return {
+            "at": time.time(),
+            "cores": parse_proc_stat(stat) if stat else {},
+            "pressure_us": parse_cpu_pressure(pressure) if pressure else None,
+            "process_s": process.user + process.system,
+        }
+
+    def _run(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self._interval_s):
+            current = self._snapshot()
+            self._records.append(self._record(previous, current))
+            previous = current
+
+    def _record(self, previous: dict, current: dict) -> Dict[str, Any]:
+        elapsed = current["at"] - previous["at"]
+
+        def _share(cores: Sequence[int | None], index: int) -> float:
+            delta, total = 0, 0
+            for core in cores:
+                if core in previous["cores"] and core in current["cores"]:
+                    delta += (
+                        current["cores"][core][index] - previous["cores"][core][index]
+                    )
+                    total += current["cores"][core][2] - previous["cores"][core][2]
+            return delta / total if total else math.nan
+
+        pressure = math.nan
+        if previous["pressure_us"] is not None and current["pressure_us"] is not None:
+            waited_s = (current["pressure_us"] - previous["pressure_us"]) / 1e6
+            pressure = min(waited_s / elapsed, 1.0) if elapsed > 0 else math.nan
+
+        loadavg = _read(PROC_LOADAVG)
+        return {
+            "timestamp": current["at"],
+            "cpu_busy": _share([None], 0),
+            "cpu_steal": _share([None], 1),
+            "cpu_pressure": pressure,
+            "harness_cpu_busy": (
+                _share(self._harness_cpus, 0) if self._harness_cpus else math.nan
+            ),
+            "node_cpu_busy": (
+                _share(self._node_cpus, 0) if self._node_cpus else math.nan
+            ),
+            "harness_cpu_cores": (
+                (current["process_s"] - previous["process_s"]) / elapsed
+                if elapsed > 0
+                else math.nan
+            ),
+            "load1": float(loadavg.split()[0]) if loadavg else math.nan,
+        }
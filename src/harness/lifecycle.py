@@ -0,0 +1,434 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis.live import LiveAggregator
+from mesh.capture import LinkCapture
+from mesh.logs import LogCollector
+from mesh.mesh import Mesh
+from mesh.profiling import Profiler
+from mesh.resources import ResourcePlan
+from mesh.runtime import NWAKU_APP, NodeApp, NodeRuntime, Teardown
+from nwaku import client
+from nwaku.logs import LogEvent
+
+from .gateway import ROLE_BOOTSTRAP, ROLE_REGULAR, MetricsGateway
+from .hostload import HostLoadMonitor
+from .sampling import SamplingPolicy
+from .timeline import PhaseLog, Timeline, TimelineContext
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Time constants for experiment phases
+# TODO: make them proportionaly to the num of nodes
+BASELINE_WAIT_S = 15
+POST_ACTION_WAIT_S = 10
+WAIT_AFTER_SUBSCRIPTIONS_S = 10
+WAIT_FOR_API_S = 10
+
+# Shared configuration
+WAKU_IMAGE_NAME = "wakuorg/nwaku"
+PUBSUB_TOPIC = "/waku/2/default-waku/proto"
+
+POLL_INTERVAL_S = 1
+# How often the poller re-reads the sampling policy while waiting
+POLICY_CHECK_INTERVAL_S = 0.05
+# How often the abort rules are re-evaluated while waiting
+ABORT_CHECK_INTERVAL_S = 1
+# Shortest time budget of a node's scrape (retries included), the
+# budget is otherwise the current sampling interval
+MIN_SCRAPE_DEADLINE_S = 0.5
+# `direction` label values of `libp2p_network_bytes_total`
+BYTES_DIRECTIONS = ("in", "out")
+
+
+class ExperimentAborted(Exception):
+    """Raised when a live abort rule stops a run early."""
+
+
+def run_experiment_lifecycle(
+    num_nodes: int,
+    bootstrappers_num: int,
+    execute_publish_scenario: Callable[[Dict[str, client.WakuClient]], None] | Timeline,
+    image_name: str = WAKU_IMAGE_NAME,
+    pull_image: bool = True,
+    log_events: List[LogEvent] | None = None,
+    profiler: Profiler | None = None,
+    live: LiveAggregator | None = None,
+    runtime: NodeRuntime | None = None,
+    sampling: SamplingPolicy | None = None,
+    app: NodeApp = NWAKU_APP,
+    teardown: Teardown | None = None,
+    link_records: List[Dict[str, Any]] | None = None,
+    gateway: MetricsGateway | None = None,
+    resources: ResourcePlan | None = None,
+    host_load: List[Dict[str, Any]] | None = None,
+    breakers: bool = True,
+) -> pd.DataFrame:
+    """
+    Handles the generic lifecycle of a Waku network experiment.
+
+    This function takes care of all the boilerplate: setting up the
+    mesh, creating clients, subscribing nodes, running metrics polling,
+    and tearing down resources.
+
+    The `execute_publish_scenario` is responsible for actually performing the
+    desired experiment scenario (e.g.: publishing `n` msgs,
+    publishing msgs of `s` size...). It can also be a `Timeline` of
+    phases (traffic, faults, measurement windows...), run on the mesh's
+    nodes.
+
+    Every metric sample is stamped with the phases running when it was
+    taken (`phases`, comma separated): the lifecycle's `baseline`,
+    `scenario` and `post_action_wait`, and the phases of a timeline.
+
+    `image_name` and `pull_image` are passed to the `Mesh`, e.g.: to run
+    a pinned image digest from the local image store. A `runtime` (e.g.:
+    `mesh.netns.ProcessRuntime`) replaces the default Docker one, and
+    `app` the default nwaku args, and `teardown` how the nodes are
+    stopped at the end.
+
+    If `log_events` is given, the logs of all nodes are followed for the
+    whole run and parsed into it (see `nwaku.logs`). Their timestamps use
+    the same clock as the metric samples.
+
+    If `profiler` is given, the mesh setup/teardown and every lifecycle
+    phase are recorded in it as timing spans.
+
+    If `live` is given, every metric sample is fed to it as soon as it is
+    polled, and the publish is marked right before the scenario runs. The
+    lifecycle waits are cut short and `ExperimentAborted` is raised as
+    soon as one of its abort rules fires.
+
+    `sampling` sets how often metrics are polled (every `POLL_INTERVAL_S`
+    by default). The lifecycle tells it when the run is idle (baseline)
+    and when the scenario starts, and a timeline's `Traffic` phases tell
+    it about every publish, e.g.: for `AdaptiveSampling` to back off and
+    to sample sub-second around publishing.
+
+    If `link_records` is given, the traffic between every pair of nodes
+    is captured on the mesh's bridge from the baseline on, and appended
+    to it per time window (see `mesh.capture.LinkCapture`). Needs root.
+
+    Every node's metrics are scraped through a `MetricsGateway`, shared
+    by the poller and any other reader, e.g.: a scenario that was given
+    the same `gateway` (by default a new one, not served over HTTP, that
+    only scrapes when read, so `sampling` sets the scrape rate). Its
+    nodes are added once the mesh is up, with their role, and it runs
+    from the baseline to the end of the run.
+
+    With `breakers`, every client gets a `client.CircuitBreaker` once all
+    nodes answered, so a node that stops answering fails fast. Runs that
+    overload their nodes on purpose (e.g.: a throughput benchmark) turn
+    them off, or they would measure the breaker instead of the node.
+
+    `resources` sets the cores, CPU quota and memory of the nodes (see
+    `mesh.resources.ResourcePlan`). If it keeps cores for the harness,
+    this process is pinned to them before the mesh starts.
+
+    If `host_load` is given, the host's load (busy cores, CPU pressure,
+    steal...) is recorded in it from the baseline on (see
+    `harness.hostload.HostLoadMonitor`), e.g.: for `analysis.noise` to
+    flag runs the host's contention may have changed.
+    """
+    records: List[Dict[str, Any]] = []
+    profiler = profiler or Profiler()
+    phase_log = PhaseLog(profiler)
+    sampling = sampling or SamplingPolicy(POLL_INTERVAL_S)
+    gateway = gateway or MetricsGateway()
+    if resources:
+        resources.pin_harness()
+
+    with Mesh(
+        num_nodes=num_nodes,
+        bootstrappers_num=bootstrappers_num,
+        image_name=image_name,
+        pull_image=pull_image,
+        profiler=profiler,
+        runtime=runtime,
+        app=app,
+        teardown=teardown,
+        resources=resources,
+    ) as mesh:
+        waku_clients: Dict[str, client.WakuClient] = {}
+        polling_thread: threading.Thread | None = None
+        stop_event: threading.Event | None = None
+        log_collector: LogCollector | None = None
+        link_capture: LinkCapture | None = None
+        host_load_monitor: HostLoadMonitor | None = None
+        gateway_started = False
+        try:
+            if log_events is not None:
+                log_collector = LogCollector(mesh.all_nodes, log_events)
+                log_collector.start()
+
+            for node in mesh.all_nodes:
+                waku_clients[node.id] = client.WakuClient(
+                    ip_address=node.api_host,
+                    rest_port=node.rest_port,
+                    metrics_port=node.metrics_port,
+                )
+
+            logger.info("Waiting for REST API to be ready...")
+            with profiler.span("wait_for_api", "lifecycle"):
+                _wait(WAIT_FOR_API_S, live)
+
+            logger.info("Subscribing all nodes to the pubsub topic...")
+            with profiler.span("subscribe", "lifecycle"):
+                with ThreadPoolExecutor() as executor:
+                    list(
+                        executor.map(
+                            lambda c: c.subscribe_to_pubsub_topic([PUBSUB_TOPIC]),
+                            waku_clients.values(),
+                        )
+                    )
+            # every node answered: from now on one that stops answering
+            # fails fast instead of holding pollers and publishers up
+            if breakers:
+                for waku_client in waku_clients.values():
+                    waku_client.breaker = client.CircuitBreaker()
+
+            bootstrap_ids = {node.id for node in mesh.bootstrap_nodes}
+            for node_id, waku_client in waku_clients.items():
+                role = ROLE_BOOTSTRAP if node_id in bootstrap_ids else ROLE_REGULAR
+                gateway.add_node(node_id, waku_client, role)
+
+            logger.info("Waiting for gossipsub mesh to form...")
+            with profiler.span("wait_for_gossipsub_mesh", "lifecycle"):
+                _wait(WAIT_AFTER_SUBSCRIPTIONS_S, live)
+
+            stop_event = threading.Event()
+            polling_thread = threading.Thread(
+                target=poll_libp2p_bytes_metrics,
+                args=(
+                    stop_event,
+                    gateway,
+                    records,
+                    live.add_samples if live else None,
+                    sampling,
+                    phase_log,
+                ),
+            )
+            if link_records is not None:
+                if not mesh.runtime.bridge_interface:
+                    raise ValueError("The runtime has no bridge to capture on.")
+                link_capture = LinkCapture(
+                    mesh.runtime.bridge_interface, mesh.all_nodes, link_records
+                )
+                link_capture.start()
+
+            if host_load is not None:
+                host_load_monitor = HostLoadMonitor(
+                    host_load,
+                    harness_cpus=resources.harness_cpus if resources else None,
+                    node_cpus=resources.node_cores if resources else None,
+                )
+                host_load_monitor.start()
+
+            gateway.start()
+            gateway_started = True
+            sampling.idle()
+            polling_thread.start()
+
+            logger.info(f"Collecting baseline metrics for {BASELINE_WAIT_S}s...")
+            with phase_log.phase("baseline", "lifecycle"):
+                _wait(BASELINE_WAIT_S, live)
+
+            # Execute the specific experiment scenario
+            if live:
+                live.mark_publish()
+            sampling.publish()
+            with phase_log.phase("scenario", "lifecycle"):
+                if isinstance(execute_publish_scenario, Timeline):
+                    execute_publish_scenario.run(
+                        TimelineContext(
+                            {node.id: node for node in mesh.all_nodes},
+                            waku_clients,
+                            PUBSUB_TOPIC,
+                            sampling=sampling,
+                        ),
+                        phase_log,
+                    )
+                else:
+                    execute_publish_scenario(waku_clients)
+
+            logger.info(f"Waiting {POST_ACTION_WAIT_S}s for messages to propagate...")
+            with phase_log.phase("post_action_wait", "lifecycle"):
+                _wait(POST_ACTION_WAIT_S, live)
+
+        except ExperimentAborted as e:
+            logger.warning(f"Experiment aborted: {e}")
+            raise
+
+        except Exception as e:
+            logger.error(f"An error occurred during experiment: {e}", exc_info=True)
+            raise
+
+        finally:
+            if polling_thread and polling_thread.is_alive():
+                logger.info("Stopping metrics polling...")
+                if stop_event:
+                    stop_event.set()
+                polling_thread.join()
+
+            if link_capture:
+                link_capture.stop()
+
+            if host_load_monitor:
+                host_load_monitor.stop()
+
+            if gateway_started:
+                gateway.stop()
+
+            for waku_client in waku_clients.values():
+                waku_client.close()
+
+            if log_collector:
+                log_collector.stop()
+
+    logger.info(f"Experiment run finished. Collected {len(records)} data points.")
+
+    if not records:
+        return pd.DataFrame()
+
+    return pd.DataFrame(records)
+
+
+def _wait(seconds: float, live: LiveAggregator | None):
+    """Sleeps `seconds`, raising `ExperimentAborted` if `live` aborts."""
+    if live is None:
+        time.sleep(seconds)
+        return
+
+    deadline = time.monotonic() + seconds
+    while (remaining := deadline - time.monotonic()) > 0:
+        # rules are also checked on every sample batch, this catches the
+        # ones that fire because samples stopped coming
+        live.aborted.wait(min(remaining, ABORT_CHECK_INTERVAL_S))
+        if live.check_abort():
+            raise ExperimentAborted(live.abort_reason)
+
+
+def poll_libp2p_bytes_metrics(
+    stop_event: threading.Event,
+    gateway: MetricsGateway,
+    records: List[Dict[str, Any]],
+    on_samples: Callable[[List[Dict[str, Any]]], None] | None = None,
+    sampling: SamplingPolicy | None = None,
+    phases: PhaseLog | None = None,
+):
+    """
+    Polls Waku node metrics concurrently and appends them to a shared list.
+
+    This function runs in a background thread. In a loop, it reads the
+    metrics of all nodes at the same time from the `gateway`'s cache,
+    which only scrapes a node if its snapshot is older than half the
+    current interval. This provides a more accurate snapshot of the
+    network's state at each polling interval.
+
+    `on_samples` is called with each node's new records as soon as they
+    are polled, for incremental consumers (e.g.: `LiveAggregator`).
+
+    The time between polls is set by `sampling` (every `POLL_INTERVAL_S`
+    by default) and can change during the run. Each record carries the
+    time its node's metrics were actually received, not a grid time.
+
+    A node's scrape may take at most the current interval (retries
+    included), so one slow node doesn't hold the whole poll up. A node
+    that failed it (or whose circuit breaker is open) gets explicit gap
+    records instead: `total_bytes` is NaN and `gap` says why.
+
+    With `phases`, every record is stamped with the phases running at its
+    timestamp (`phases` column, comma separated).
+    """
+    sampling = sampling or SamplingPolicy(POLL_INTERVAL_S)
+
+    def _poll_single_node(node_id: str) -> list:
+        node_records = []
+        try:
+            interval_s = sampling.interval_s()
+            snapshot = gateway.snapshot(
+                node_id,
+                max_age_s=interval_s / 2,
+                deadline_s=max(interval_s, MIN_SCRAPE_DEADLINE_S),
+            )
+            for metric in snapshot.samples:
+                if metric["name"] != "libp2p_network_bytes_total":
+                    continue
+                node_records.append(
+                    {
+                        "timestamp": snapshot.scraped_at,
+                        "node": node_id,
+                        "direction": metric["labels"]["direction"],
+                        "total_bytes": metric["value"],
+                    }
+                )
+        except client.CircuitOpenError:
+            node_records = _gap_records(node_id, "circuit_open")
+        except Exception as e:
+            logger.error(f"Error polling metrics for {node_id}: {e}")
+            node_records = _gap_records(node_id, "scrape_failed")
+        if phases:
+            for record in node_records:
+                record["phases"] = ",".join(phases.active_at(record["timestamp"]))
+        return node_records
+
+    # reused between polls, sub-second sampling would otherwise spend
+    # a good part of each interval creating threads
+    with ThreadPoolExecutor() as executor:
+        while not stop_event.is_set():
+            poll_started = time.monotonic()
+            # Map the polling function over all clients
+            results_iterator = executor.map(_poll_single_node, gateway.nodes)
+
+            # Collect results and extend the main records list
+            for node_records_list in results_iterator:
+                if node_records_list:
+                    records.extend(node_records_list)
+                    if on_samples and "gap" not in node_records_list[0]:
+                        on_samples(node_records_list)
+
+            # Wait for the next polling interval, or break if stopped
+            if _wait_next_poll(stop_event, sampling, poll_started):
+                break
+
+
+def _gap_records(node_id: str, reason: str) -> List[Dict[str, Any]]:
+    """
+    Records a missed scrape, for both directions so that each direction's
+    n-th record still belongs to the node's n-th poll.
+    """
+    gap_at = time.time()
+    return [
+        {
+            "timestamp": gap_at,
+            "node": node_id,
+            "direction": direction,
+            "total_bytes": float("nan"),
+            "gap": reason,
+        }
+        for direction in BYTES_DIRECTIONS
+    ]
+
+
+def _wait_next_poll(
+    stop_event: threading.Event, sampling: SamplingPolicy, poll_started: float
+) -> bool:
+    """
+    Waits until `sampling`'s interval since `poll_started` has passed.
+
+    The interval is re-read while waiting, so switching from a long idle
+    interval to sub-second sampling applies immediately. Returns True if
+    the poller was stopped.
+    """
+    while True:
+        remaining = poll_started + sampling.interval_s() - time.monotonic()
+        if remaining <= 0:
+            return stop_event.is_set()
+        if stop_event.wait(min(remaining, POLICY_CHECK_INTERVAL_S)):
+            return True
@@ -0,0 +1,153 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from analysis.live import LiveAggregator
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+LIVE_VIEW_HOST = "127.0.0.1"
+LIVE_VIEW_PORT = 8787
+TERMINAL_VIEW_INTERVAL_S = 5
+# Nodes shown in the text views, busiest first
+TOP_NODES = 10
+
+
+def format_bytes(num_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+def render_text(snapshot: dict) -> str:
+    """Renders a `LiveAggregator.snapshot()` as a short plain-text report."""
+    delivery = snapshot["delivery"]
+    lines = [
+        f"elapsed: {snapshot['elapsed_s']:.0f}s  samples: {snapshot['num_samples']}",
+        f"network: {format_bytes(snapshot['network_rate_bps'])}/s  "
+        f"total: {format_bytes(snapshot['network_net_bytes'])}  "
+        f"since publish: {format_bytes(snapshot['bytes_since_publish'])}",
+        f"delivery: {delivery['delivered']} delivered / "
+        f"{delivery['published']} published  "
+        f"(window: {delivery['delivered_in_window']})",
+    ]
+    if snapshot["aborted"]:
+        lines.append(f"ABORTED: {snapshot['abort_reason']}")
+
+    nodes = sorted(
+        snapshot["nodes"].items(), key=lambda item: item[1]["rate_bps"], reverse=True
+    )
+    for node, stats in nodes[:TOP_NODES]:
+        lines.append(
+            f"  {node:<20} {format_bytes(stats['rate_bps']):>12}/s  "
+            f"{format_bytes(stats['net_bytes']):>12}"
+        )
+    return "\n".join(lines)
+
+
+class LiveViewServer:
+    """
+    Serves a `LiveAggregator` over local HTTP while a run is going on.
+
+    - `GET /` returns the plain-text report (e.g.: `watch curl -s ...`)
+    - `GET /api/live` returns the full snapshot as JSON
+    """
+
+    def __init__(
+        self,
+        live: LiveAggregator,
+        host: str = LIVE_VIEW_HOST,
+        port: int = LIVE_VIEW_PORT,
+    ):
+        self._live = live
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Live view available at {self.url}")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _handler_class(self):
+        live = self._live
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/api/live":
+                    body = json.dumps(live.snapshot()).encode("utf-8")
+                    content_type = "application/json"
+                elif self.path == "/":
+                    body = (render_text(live.snapshot()) + "\n").encode("utf-8")
+                    content_type = "text/plain; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # keep the experiment logs readable
+                pass
+
+        return _Handler
+
+
+class TerminalLiveView:
+    """Logs the live report every `interval_s` seconds while a run is going on."""
+
+    def __init__(
+        self, live: LiveAggregator, interval_s: float = TERMINAL_VIEW_INTERVAL_S
+    ):
+        self._live = live
+        self._interval_s = interval_s
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval_s):
+            logger.info(f"Live view:\n{render_text(self._live.snapshot())}")
@@ -0,0 +1,60 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from mesh.profiling import Profiler, Span
+from nwaku import client
+
+from .gateway import MetricsGateway
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+READY_POLL_INTERVAL_S = 0.2
+# Each node is waited for in its own thread, up to this many at a time
+READY_MAX_WORKERS = 128
+
+
+def wait_for_ready(
+    waku_clients: Dict[str, client.WakuClient],
+    gateway: MetricsGateway,
+    timeout_s: float,
+    profiler: Profiler | None = None,
+) -> Dict[str, float | None]:
+    """
+    Waits until every node serves both its REST API and its metrics.
+
+    nwaku starts the metrics server last, so a node answering both is
+    done with its setup. Returns the unix time each node became ready
+    (None if it didn't within `timeout_s`). Each node's wait is recorded
+    as a `wait_ready` span in `profiler`.
+
+    The metrics are read through `gateway`, which must hold the same
+    nodes, so the first snapshot of every node is already cached for the
+    other readers once it is ready.
+    """
+    deadline = time.monotonic() + timeout_s
+
+    def _wait_single_node(node_info: tuple[str, client.WakuClient]) -> float | None:
+        node_id, waku_client = node_info
+        start = time.time()
+        while time.monotonic() < deadline:
+            try:
+                waku_client.get_info(attempts=1)
+                gateway.snapshot(node_id, max_age_s=READY_POLL_INTERVAL_S)
+            except client.WakuClientException:
+                time.sleep(READY_POLL_INTERVAL_S)
+                continue
+
+            ready_at = time.time()
+            if profiler:
+                profiler.record(Span("wait_ready", "node", start, ready_at, node_id))
+            return ready_at
+
+        logger.warning(f"Node {node_id} not ready after {timeout_s}s")
+        return None
+
+    with ThreadPoolExecutor(max_workers=READY_MAX_WORKERS) as executor:
+        ready_times = executor.map(_wait_single_node, waku_clients.items())
+        return dict(zip(waku_clients.keys(), ready_times))
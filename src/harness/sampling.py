@@ -0,0 +1,81 @@
+import threading
+import time
+
+DEFAULT_INTERVAL_S = 1.0
+IDLE_INTERVAL_S = 2.0
+BURST_INTERVAL_S = 0.2
+BURST_DURATION_S = 5.0
+
+
+class SamplingPolicy:
+    """
+    Decides how often the metrics poller samples the nodes.
+
+    The poller asks for `interval_s()` before every sample and while
+    waiting for the next one, so a change of rate applies right away.
+    The lifecycle (or a scenario) tells the policy what the run is
+    doing with `idle()`, `active()` and `publish()`; this base policy
+    ignores them and samples at a fixed interval.
+
+    Samples always carry the time they were actually taken, so the
+    sampling grid may be irregular: rates have to be computed from
+    timestamp differences, not from sample counts.
+    """
+
+    def __init__(self, interval_s: float = DEFAULT_INTERVAL_S):
+        self._interval_s = interval_s
+
+    def interval_s(self) -> float:
+        return self._interval_s
+
+    def idle(self):
+        """Nothing is expected to happen (e.g.: baseline, waiting for the mesh)."""
+
+    def active(self):
+        """Back to the normal sampling rate."""
+
+    def publish(self):
+        """Messages are being published now."""
+
+
+class AdaptiveSampling(SamplingPolicy):
+    """
+    Backs off to `idle_interval_s` during idle phases, and samples every
+    `burst_interval_s` for `burst_duration_s` after each publish to see
+    the propagation. Otherwise samples every `interval_s`.
+    """
+
+    def __init__(
+        self,
+        interval_s: float = DEFAULT_INTERVAL_S,
+        idle_interval_s: float = IDLE_INTERVAL_S,
+        burst_interval_s: float = BURST_INTERVAL_S,
+        burst_duration_s: float = BURST_DURATION_S,
+    ):
+        super().__init__(interval_s)
+        self._idle_interval_s = idle_interval_s
+        self._burst_interval_s = burst_interval_s
+        self._burst_duration_s = burst_duration_s
+        self._lock = threading.Lock()
+        self._mode_interval_s = interval_s
+        self._burst_until = 0.0
+
+    def interval_s(self) -> float:
+        with self._lock:
+            if time.monotonic() < self._burst_until:
+                return self._burst_interval_s
+            return self._mode_interval_s
+
+    def idle(self):
+        with self._lock:
+            self._mode_interval_s = self._idle_interval_s
+
+    def active(self):
+        with self._lock:
+            self._mode_interval_s = self._interval_s
+
+    def publish(self):
+        with self._lock:
+            self._burst_until = time.monotonic() + self._burst_duration_s
+            # once the burst is over, traffic may still be propagating
+            self._mode_interval_s = self._interval_s
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from analysis.rollup import DEFAULT_TIERS, Bucket, Tier, TieredRollup
+from analysis.trend import LeakDetector
+from nwaku import client
+
+from .gateway import MetricsGateway
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Metrics followed during a soak, each summed over its labels
+SOAK_METRICS = (
+    "nim_gc_mem_bytes",
+    "nim_gc_mem_occupied_bytes",
+    "libp2p_open_streams",
+    "libp2p_peers",
+    "libp2p_network_bytes_total",
+)
+SOAK_SAMPLE_INTERVAL_S = 1.0
+
+
+class SoakMonitor:
+    """
+    Samples `SOAK_METRICS` of every node for hours with bounded memory.
+
+    Samples go into a `TieredRollup` (see `DEFAULT_TIERS`) instead of
+    being kept, and every closed bucket of the coarsest tier feeds the
+    per-node trends of the `LeakDetector`, so leak suspects are known
+    while the soak runs. Nodes that miss a scrape are counted in `gaps`.
+
+    Metrics are read from the `gateway`'s cache, so sampling every
+    second doesn't add scrapes to the ones of the other readers.
+    """
+
+    def __init__(
+        self,
+        gateway: MetricsGateway,
+        interval_s: float = SOAK_SAMPLE_INTERVAL_S,
+        tiers: tuple[Tier, ...] = DEFAULT_TIERS,
+        detector: LeakDetector | None = None,
+    ):
+        self._gateway = gateway
+        self._interval_s = interval_s
+        self.detector = detector or LeakDetector()
+        self.rollup = TieredRollup(tiers, on_close=self._on_bucket_closed)
+        self._trend_tier = len(tiers) - 1
+        self.gaps: Dict[str, int] = {node_id: 0 for node_id in gateway.nodes}
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _on_bucket_closed(self, key, tier_index: int, bucket: Bucket):
+        if tier_index == self._trend_tier:
+            self.detector.add(key, bucket.start, bucket.mean)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling and closes the open buckets."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        self.rollup.flush()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _sample_node(self, node_id: str):
+        try:
+            snapshot = self._gateway.snapshot(
+                node_id, max_age_s=self._interval_s / 2, deadline_s=self._interval_s
+            )
+        except client.WakuClientException as e:
+            logger.debug(f"Soak sample of {node_id} missed: {e}")
+            self.gaps[node_id] += 1
+            return
+
+        totals: Dict[str, float] = {}
+        for sample in snapshot.samples:
+            if sample["name"] in SOAK_METRICS:
+                totals[sample["name"]] = (
+                    totals.get(sample["name"], 0.0) + sample["value"]
+                )
+        for name, value in totals.items():
+            self.rollup.add((node_id, name), snapshot.scraped_at, value)
+
+    def _run(self):
+        with ThreadPoolExecutor() as executor:
+            while not self._stop_event.is_set():
+                started = time.monotonic()
+                list(executor.map(self._sample_node, self._gateway.nodes))
+                remaining = self._interval_s - (time.monotonic() - started)
+                if remaining > 0 and self._stop_event.wait(remaining):
+                    break
@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import cast
+
+import pytest
+
+from harness.gateway import ROLE_BOOTSTRAP, MetricsGateway
+from nwaku.client import CircuitOpenError, WakuClient
+
+EXPOSITION = """# HELP libp2p_network_bytes_total total traffic
+# TYPE libp2p_network_bytes_total counter
+libp2p_network_bytes_total{direction="in"} 10.0
+libp2p_network_bytes_total{direction="out"} 20.0
+# HELP process_cpu_seconds_total Total user and system CPU time
+# TYPE process_cpu_seconds_total counter
+process_cpu_seconds_total 1.5
+# TYPE presto_server_request_duration histogram
+presto_server_request_duration_bucket{le="0.1"} 3
+presto_server_request_duration_sum 0.2
+presto_server_request_duration_count 3
+"""
+
+
+class _CountingClient:
+    def __init__(self, delay_s=0.0):
+        self.scrapes = 0
+        self._delay_s = delay_s
+        self._lock = threading.Lock()
+
+    def get_metrics(self, deadline_s=None):
+        with self._lock:
+            self.scrapes += 1
+        time.sleep(self._delay_s)
+        return EXPOSITION
+
+
+class _DeadClient:
+    def __init__(self):
+        self.scrapes = 0
+
+    def get_metrics(self, deadline_s=None):
+        self.scrapes += 1
+        raise CircuitOpenError("circuit open")
+
+
+def test_concurrent_readers_share_one_scrape():
+    slow = _CountingClient(delay_s=0.1)
+    gateway = MetricsGateway(ttl_s=10)
+    gateway.add_node("node-0", cast(WakuClient, slow))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        snapshots = list(executor.map(lambda _: gateway.snapshot("node-0"), range(8)))
+
+    assert slow.scrapes == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    # a reader that needs a newer snapshot gets one
+    gateway.snapshot("node-0", max_age_s=0)
+    assert slow.scrapes == 2
+
+
+def test_failed_scrapes_are_cached_and_raised():
+    dead = _DeadClient()
+    gateway = MetricsGateway(ttl_s=10)
+    gateway.add_node("node-0", cast(WakuClient, dead))
+
+    for _ in range(3):
+        with pytest.raises(CircuitOpenError):
+            gateway.snapshot("node-0")
+    assert dead.scrapes == 1
+
+
+def test_query_filters_and_labels_nodes():
+    gateway = MetricsGateway()
+    gateway.add_node(
+        "bootstrap-node-0", cast(WakuClient, _CountingClient()), ROLE_BOOTSTRAP
+    )
+    gateway.add_node("node-0", cast(WakuClient, _CountingClient()))
+    gateway.add_node("node-1", cast(WakuClient, _DeadClient()))
+
+    samples, errors = gateway.query(
+        names=["libp2p_network_bytes_total"], labels={"direction": "out"}
+    )
+    assert {(s["node"], s["role"], s["value"]) for s in samples} == {
+        ("bootstrap-node-0", "bootstrap", 20.0),
+        ("node-0", "regular", 20.0),
+    }
+    assert list(errors) == ["node-1"]
+
+    samples, errors = gateway.query(prefix="presto_", roles=["bootstrap"])
+    assert {s["name"] for s in samples} == {
+        "presto_server_request_duration_bucket",
+        "presto_server_request_duration_sum",
+        "presto_server_request_duration_count",
+    }
+    assert not errors
+
+
+def test_exposition_merges_families_with_node_labels():
+    gateway = MetricsGateway()
+    gateway.add_node(
+        "bootstrap-node-0", cast(WakuClient, _CountingClient()), ROLE_BOOTSTRAP
+    )
+    gateway.add_node("node-0", cast(WakuClient, _CountingClient()))
+    lines = gateway.exposition().splitlines()
+
+    # one header per family, followed by the samples of every node
+    assert lines.count("# TYPE libp2p_network_bytes_total counter") == 1
+    type_line = lines.index("# TYPE presto_server_request_duration histogram")
+    assert lines[type_line + 1 : type_line + 7] == [
+        'presto_server_request_duration_bucket{node="bootstrap-node-0",role="bootstrap",le="0.1"} 3',
+        'presto_server_request_duration_sum{node="bootstrap-node-0",role="bootstrap"} 0.2',
+        'presto_server_request_duration_count{node="bootstrap-node-0",role="bootstrap"} 3',
+        'presto_server_request_duration_bucket{node="node-0",role="regular",le="0.1"} 3',
+        'presto_server_request_duration_sum{node="node-0",role="regular"} 0.2',
+        'presto_server_request_duration_count{node="node-0",role="regular"} 3',
+    ]
+    assert 'p2p_eval_gateway_up{node="node-0",role="regular"} 1' in lines
+
+
+def test_gateway_serves_exposition_and_queries_over_http():
+    client = _CountingClient()
+    gateway = MetricsGateway(interval_s=0.05, port=0)
+    gateway.add_node("node-0", cast(WakuClient, client))
+
+    with gateway:
+        with urllib.request.urlopen(f"{gateway.url}/metrics") as response:
+            exposition = response.read().decode()
+        query_url = (
+            f"{gateway.url}/api/v1/query"
+            "?name=libp2p_network_bytes_total&label=direction:in"
+        )
+        with urllib.request.urlopen(query_url) as response:
+            body = json.loads(response.read())
+        time.sleep(0.2)
+
+    assert 'process_cpu_seconds_total{node="node-0",role="regular"} 1.5' in exposition
+    assert [sample["value"] for sample in body["samples"]] == [10.0]
+    # scraped in the background, about once per interval
+    assert 2 <= client.scrapes <= 10
+
+
+def test_gateway_without_interval_only_scrapes_when_read():
+    client = _CountingClient()
+    gateway = MetricsGateway()
+    gateway.add_node("node-0", cast(WakuClient, client))
+
+    with gateway:
+        time.sleep(0.1)
+        assert client.scrapes == 0
+        gateway.snapshot("node-0")
+
+    assert client.scrapes == 1
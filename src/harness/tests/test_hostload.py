@@ -0,0 +1,43 @@
+import math
+import time
+
+from harness.hostload import HostLoadMonitor, parse_cpu_pressure, parse_proc_stat
+
+PROC_STAT = """cpu  300 0 100 500 50 0 0 50 0 0
+cpu0 200 0 50 200 25 0 0 25 0 0
+cpu1 100 0 50 300 25 0 0 25 0 0
+intr 194291 0 0
+"""
+
+
+def test_proc_stat_counts_io_wait_as_idle_and_steal_apart():
+    times = parse_proc_stat(PROC_STAT)
+    assert times[None] == (400, 50, 1000)
+    assert times[0] == (250, 25, 500)
+    assert set(times) == {None, 0, 1}
+
+
+def test_cpu_pressure_reads_the_some_total():
+    text = (
+        "some avg10=1.42 avg60=1.20 avg300=1.02 total=31827187\n"
+        "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+    )
+    assert parse_cpu_pressure(text) == 31827187
+    assert parse_cpu_pressure("") is None
+
+
+def test_monitor_records_shares_of_every_interval():
+    records = []
+    with HostLoadMonitor(records, harness_cpus=[0], interval_s=0.05):
+        # keep the harness busy for a bit
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            pass
+
+    assert len(records) >= 2
+    for record in records:
+        assert 0 <= record["cpu_busy"] <= 1 or math.isnan(record["cpu_busy"])
+        assert record["harness_cpu_cores"] >= 0
+        # no node cores given
+        assert math.isnan(record["node_cpu_busy"])
+    assert max(r["harness_cpu_cores"] for r in records) > 0.5
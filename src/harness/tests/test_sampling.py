@@ -0,0 +1,136 @@
+import math
+import threading
+import time
+
+from harness.gateway import MetricsGateway
+from harness.lifecycle import poll_libp2p_bytes_metrics
+from harness.sampling import AdaptiveSampling, SamplingPolicy
+from harness.timeline import PhaseLog
+from nwaku.client import CircuitOpenError
+
+
+class _FakeClient:
+    def __init__(self):
+        self.total = 0
+
+    def get_metrics(self, deadline_s=None):
+        self.total += 100
+        return (
+            f'libp2p_network_bytes_total{{direction="in"}} {self.total}\n'
+            f'libp2p_network_bytes_total{{direction="out"}} {self.total}\n'
+        )
+
+
+def _gateway(**clients) -> MetricsGateway:
+    gateway = MetricsGateway()
+    for node_id, waku_client in clients.items():
+        gateway.add_node(node_id, waku_client)
+    return gateway
+
+
+def test_adaptive_sampling_switches_intervals():
+    sampling = AdaptiveSampling(
+        interval_s=1, idle_interval_s=5, burst_interval_s=0.1, burst_duration_s=0.05
+    )
+    assert sampling.interval_s() == 1
+    sampling.idle()
+    assert sampling.interval_s() == 5
+    sampling.publish()
+    assert sampling.interval_s() == 0.1
+    time.sleep(0.06)
+    # back to the normal rate after the burst, not to idle
+    assert sampling.interval_s() == 1
+
+
+def test_fixed_policy_ignores_run_events():
+    sampling = SamplingPolicy(2)
+    sampling.idle()
+    sampling.publish()
+    assert sampling.interval_s() == 2
+
+
+def test_poller_follows_policy_changes_with_exact_timestamps():
+    sampling = AdaptiveSampling(
+        interval_s=10, idle_interval_s=10, burst_interval_s=0.02, burst_duration_s=60
+    )
+    records = []
+    stop_event = threading.Event()
+    poller = threading.Thread(
+        target=poll_libp2p_bytes_metrics,
+        args=(stop_event, _gateway(node_0=_FakeClient()), records, None, sampling),
+    )
+    poller.start()
+    time.sleep(0.1)
+    # only the first poll happened so far, the next one is 10s away
+    assert len(records) == 2
+
+    sampling.publish()
+    time.sleep(0.3)
+    stop_event.set()
+    poller.join()
+
+    timestamps = sorted({r["timestamp"] for r in records})
+    assert len(timestamps) > 5
+    # both directions of a scrape share its timestamp
+    assert len(records) == 2 * len(timestamps)
+
+
+class _DeadClient:
+    def get_metrics(self, deadline_s=None):
+        raise CircuitOpenError("circuit open")
+
+
+def test_poller_records_unhealthy_nodes_as_gaps():
+    records, live_records = [], []
+    stop_event = threading.Event()
+    poller = threading.Thread(
+        target=poll_libp2p_bytes_metrics,
+        args=(
+            stop_event,
+            _gateway(node_0=_FakeClient(), node_1=_DeadClient()),
+            records,
+            live_records.extend,
+            SamplingPolicy(0.02),
+        ),
+    )
+    poller.start()
+    time.sleep(0.1)
+    stop_event.set()
+    poller.join()
+
+    gaps = [r for r in records if r.get("gap")]
+    assert gaps and all(r["node"] == "node_1" for r in gaps)
+    assert all(r["gap"] == "circuit_open" for r in gaps)
+    assert all(math.isnan(r["total_bytes"]) for r in gaps)
+    # one gap per direction and poll, like a real scrape
+    assert {r["direction"] for r in gaps} == {"in", "out"}
+    # live consumers only get real samples
+    assert all(r["node"] == "node_0" for r in live_records)
+
+
+def test_poller_stamps_samples_with_running_phases():
+    records = []
+    phase_log = PhaseLog()
+    stop_event = threading.Event()
+    poller = threading.Thread(
+        target=poll_libp2p_bytes_metrics,
+        args=(
+            stop_event,
+            _gateway(node_0=_FakeClient()),
+            records,
+            None,
+            SamplingPolicy(0.02),
+            phase_log,
+        ),
+    )
+    poller.start()
+    time.sleep(0.05)
+    with phase_log.phase("partition"):
+        time.sleep(0.1)
+    time.sleep(0.05)
+    stop_event.set()
+    poller.join()
+
+    stamps = [r["phases"] for r in records]
+    assert stamps[0] == "" and stamps[-1] == ""
+    assert "partition" in stamps
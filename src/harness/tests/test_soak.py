@@ -0,0 +1,52 @@
+import time
+from typing import cast
+
+from analysis.rollup import Tier
+from harness.gateway import MetricsGateway
+from harness.soak import SoakMonitor
+from nwaku.client import WakuClient, WakuClientException
+
+
+class _LeakyClient:
+    def __init__(self):
+        self.memory = 1000
+
+    def get_metrics(self, deadline_s=None):
+        self.memory += 10
+        return (
+            f'nim_gc_mem_bytes{{thread_id="1"}} {self.memory}\n'
+            'libp2p_open_streams{type="YamuxStream",dir="In"} 2\n'
+            'libp2p_open_streams{type="YamuxStream",dir="Out"} 3\n'
+            "libp2p_pubsub_peers 7\n"
+        )
+
+
+class _DeadClient:
+    def get_metrics(self, deadline_s=None):
+        raise WakuClientException("unreachable")
+
+
+def test_soak_monitor_rolls_up_and_fits_trends():
+    gateway = MetricsGateway()
+    gateway.add_node("node-0", cast(WakuClient, _LeakyClient()))
+    gateway.add_node("node-1", cast(WakuClient, _DeadClient()))
+    monitor = SoakMonitor(
+        gateway,
+        interval_s=0.01,
+        tiers=(Tier(0.01, 10), Tier(0.05, 100)),
+    )
+    with monitor:
+        time.sleep(0.3)
+
+    streams = monitor.rollup.buckets(("node-0", "libp2p_open_streams"), 1)
+    # summed over the labels
+    assert streams and all(bucket.mean == 5 for bucket in streams)
+    assert ("node-0", "libp2p_pubsub_peers") not in monitor.rollup.keys()
+    assert len(monitor.rollup.buckets(("node-0", "nim_gc_mem_bytes"), 0)) <= 10
+
+    memory = monitor.detector.status(("node-0", "nim_gc_mem_bytes"))
+    assert memory.points == len(
+        monitor.rollup.buckets(("node-0", "nim_gc_mem_bytes"), 1)
+    )
+    assert memory.slope_per_hour > 0
+    assert monitor.gaps["node-1"] > 0 and monitor.gaps["node-0"] == 0
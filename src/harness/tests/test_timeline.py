@@ -0,0 +1,143 @@
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from harness.timeline import (
+    Marker,
+    Phase,
+    PhaseLog,
+    SetParameter,
+    Timeline,
+    TimelineContext,
+    Traffic,
+)
+from harness.sampling import SamplingPolicy
+from mesh.profiling import Profiler
+
+
+@dataclass(kw_only=True)
+class _Record(Phase):
+    started: dict
+
+    def run(self, ctx):
+        self.started[self.name] = time.monotonic()
+        ctx.wait(0.1)
+
+
+@dataclass(kw_only=True)
+class _Fail(Phase):
+    def run(self, ctx):
+        raise RuntimeError("fault injection failed")
+
+
+class _FakeClient:
+    def __init__(self):
+        self.published = 0
+
+    def publish_message(self, pubsub_topic, message, attempts=1):
+        self.published += 1
+
+
+def _ctx(**clients) -> TimelineContext:
+    return TimelineContext({}, clients, "/waku/2/test/proto")
+
+
+def test_phases_start_at_their_offsets_and_overlap():
+    started = {}
+    begin = time.monotonic()
+    Timeline(
+        [
+            _Record(name="late", at_s=0.05, started=started),
+            _Record(name="first", started=started),
+        ]
+    ).run(_ctx())
+
+    assert started["first"] - begin < 0.03
+    assert 0.05 <= started["late"] - begin < 0.08
+    # `late` started while `first` (0.1s long) was still running
+    assert started["late"] - started["first"] < 0.1
+
+
+def test_phase_log_tells_active_phases_and_records_spans():
+    profiler = Profiler()
+    phase_log = PhaseLog(profiler)
+    with phase_log.phase("outer", "lifecycle"):
+        with phase_log.phase("inner"):
+            inside = time.time()
+        after_inner = time.time()
+
+    assert phase_log.active_at(inside) == ["outer", "inner"]
+    assert phase_log.active_at(after_inner) == ["outer"]
+    assert phase_log.active_at(time.time() + 1) == []
+    spans = profiler.to_dataframe()
+    assert dict(zip(spans["name"], spans["category"])) == {
+        "outer": "lifecycle",
+        "inner": "timeline",
+    }
+
+
+def test_failed_phase_stops_the_timeline():
+    started = {}
+    ctx = _ctx()
+    with pytest.raises(RuntimeError, match="fault injection failed"):
+        Timeline(
+            [
+                _Fail(name="fault", at_s=0.02),
+                _Record(name="never", at_s=0.5, started=started),
+            ]
+        ).run(ctx)
+    assert ctx.stop_event.is_set()
+    assert "never" not in started
+
+
+def test_duplicate_phase_names_are_rejected():
+    with pytest.raises(ValueError, match="unique"):
+        Timeline([Marker(name="m", duration_s=1), Marker(name="m", duration_s=1)])
+
+
+def test_set_parameter_changes_a_running_traffic_rate(monkeypatch):
+    monkeypatch.setattr("harness.timeline.TIMELINE_TRAFFIC_CHUNK_S", 0.1)
+    waku_client = _FakeClient()
+    ctx = _ctx(node_0=waku_client)
+    Timeline(
+        [
+            Traffic(name="load", duration_s=0.4, rate_per_s=10),
+            SetParameter(name="burst", at_s=0.2, key="load.rate_per_s", value=200),
+        ]
+    ).run(ctx)
+
+    rates = [r.published / r.duration_s for r in ctx.results["load"]]
+    assert rates[0] < 50 and max(rates) > 100
+    assert waku_client.published == sum(r.published for r in ctx.results["load"])
+
+
+def test_zero_rate_pauses_a_traffic_phase(monkeypatch):
+    monkeypatch.setattr("harness.timeline.TIMELINE_TRAFFIC_CHUNK_S", 0.1)
+    waku_client = _FakeClient()
+    ctx = _ctx(node_0=waku_client)
+    Timeline(
+        [
+            Traffic(name="load", duration_s=0.3, rate_per_s=0),
+            SetParameter(name="resume", at_s=0.15, key="load.rate_per_s", value=100),
+        ]
+    ).run(ctx)
+
+    assert ctx.results["load"][0].published == 0
+    assert waku_client.published > 0
+
+
+def test_traffic_tells_the_sampling_policy_about_every_publish():
+    class _CountingPolicy(SamplingPolicy):
+        publishes = 0
+
+        def publish(self):
+            self.publishes += 1
+
+    waku_client = _FakeClient()
+    ctx = _ctx(node_0=waku_client)
+    ctx.sampling = policy = _CountingPolicy()
+    Timeline([Traffic(name="load", at_s=0.05, duration_s=0.1, rate_per_s=50)]).run(ctx)
+
+    assert policy.publishes == waku_client.published > 0
@@ -0,0 +1,43 @@
+import time
+
+from harness.traffic import publish_at_rate, publish_steadily
+from nwaku.client import WakuClientException
+
+
+def test_publish_at_rate_is_open_loop_and_counts_failures():
+    published_at = []
+
+    def _publish(i):
+        published_at.append(time.monotonic())
+        if i % 10 == 0:
+            raise WakuClientException("rejected")
+
+    result = publish_at_rate(_publish, rate_per_s=100, duration_s=0.3)
+    assert len(published_at) == 30
+    assert result.failed == 3
+    assert result.published == 27
+    # the schedule spreads the messages over the duration
+    assert max(published_at) - min(published_at) >= 0.28
+
+
+def test_publish_steadily_runs_in_chunks_with_growing_indexes():
+    indexes = []
+    results = publish_steadily(indexes.append, 100, duration_s=0.35, chunk_s=0.1)
+
+    assert len(results) >= 2
+    assert all(r.duration_s <= 0.1 for r in results)
+    assert sorted(indexes) == list(range(len(indexes)))
+    assert sum(r.published for r in results) == len(indexes)
+
+
+def test_publish_steadily_pauses_at_zero_rate():
+    indexes = []
+    rates = iter([0, 100])
+    results = publish_steadily(
+        indexes.append, lambda: next(rates), duration_s=0.2, chunk_s=0.1
+    )
+
+    assert [r.target_rate for r in results] == [0, 100]
+    assert results[0].published == 0
+    assert results[1].published > 0
+    assert len(indexes) == results[1].published
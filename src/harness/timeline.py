@@ -0,0 +1,257 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from mesh.faults import NetworkPartition
+from mesh.profiling import Profiler, Span
+from mesh.runtime import NodeContainer, Teardown
+from nwaku import client
+
+from .sampling import SamplingPolicy
+from .traffic import TrafficResult, publish_steadily
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+TIMELINE_CONTENT_TOPIC = "timeline-content-topic"
+# Traffic phases re-read their rate between chunks of this length
+TIMELINE_TRAFFIC_CHUNK_S = 5.0
+
+
+class PhaseLog:
+    """
+    Records when every phase of a run starts and ends.
+
+    Each phase is also recorded as a `Profiler` span (with the category
+    it was given), so its exact bounds are archived with the run's
+    spans. `active_at(t)` tells the phases running at a sample's time,
+    which the metrics poller stamps on every sample.
+    """
+
+    def __init__(self, profiler: Profiler | None = None):
+        self._profiler = profiler
+        self._lock = threading.Lock()
+        # name, start and end (None while running) of every phase
+        self._phases: List[list] = []
+
+    @contextmanager
+    def phase(self, name: str, category: str = "timeline"):
+        entry = [name, time.time(), None]
+        with self._lock:
+            self._phases.append(entry)
+        try:
+            yield
+        finally:
+            entry[2] = time.time()
+            if self._profiler:
+                self._profiler.record(Span(name, category, entry[1], entry[2]))
+
+    def active_at(self, timestamp: float) -> List[str]:
+        with self._lock:
+            return [
+                name
+                for name, start, end in self._phases
+                if start <= timestamp and (end is None or timestamp < end)
+            ]
+
+
+@dataclass
+class TimelineContext:
+    """What the phases of a timeline act on, and share while running."""
+
+    nodes: Dict[str, NodeContainer]
+    waku_clients: Dict[str, client.WakuClient]
+    pubsub_topic: str
+    stop_event: threading.Event = field(default_factory=threading.Event)
+    # set by `SetParameter`, read by the phases, e.g.: `<traffic>.rate_per_s`
+    params: Dict[str, Any] = field(default_factory=dict)
+    # what each phase produced, by phase name
+    results: Dict[str, Any] = field(default_factory=dict)
+    # told about every publish, e.g.: for `AdaptiveSampling` to sample
+    # sub-second while traffic runs, however late in the run
+    sampling: SamplingPolicy = field(default_factory=SamplingPolicy)
+
+    def wait(self, seconds: float) -> bool:
+        """Waits `seconds`, returns True if the timeline was stopped."""
+        return self.stop_event.wait(seconds)
+
+
+@dataclass(kw_only=True)
+class Phase(ABC):
+    """A step of a `Timeline`, started `at_s` seconds after the timeline."""
+
+    name: str
+    at_s: float = 0.0
+
+    @abstractmethod
+    def run(self, ctx: TimelineContext):
+        """Runs the phase to its end. Long phases return early once `ctx` is stopped."""
+
+
+@dataclass(kw_only=True)
+class Traffic(Phase):
+    """
+    Publishes `rate_per_s` messages per second for `duration_s`, from
+    the `publishers` in turn (all nodes by default). The rate can be
+    changed while it runs with `SetParameter(key=f"{name}.rate_per_s")`.
+    Its `TrafficResult`s (one per chunk) are the phase's result.
+    """
+
+    duration_s: float
+    rate_per_s: float
+    payload_size_bytes: int = 1
+    content_topic: str = TIMELINE_CONTENT_TOPIC
+    publishers: List[str] | None = None
+
+    def run(self, ctx: TimelineContext):
+        payload = "a" * self.payload_size_bytes  # `a` == 1 byte
+        publishers = self.publishers or list(ctx.waku_clients)
+
+        def _publish(i: int):
+            ctx.sampling.publish()
+            message = client.create_waku_message(payload, self.content_topic)
+            # a missed publish isn't retried, the next one is due soon
+            ctx.waku_clients[publishers[i % len(publishers)]].publish_message(
+                ctx.pubsub_topic, message, attempts=1
+            )
+
+        results: List[TrafficResult] = publish_steadily(
+            _publish,
+            lambda: ctx.params.get(f"{self.name}.rate_per_s", self.rate_per_s),
+            self.duration_s,
+            stop_event=ctx.stop_event,
+            chunk_s=TIMELINE_TRAFFIC_CHUNK_S,
+        )
+        ctx.results[self.name] = results
+
+
+@dataclass(kw_only=True)
+class KillNodes(Phase):
+    """Kills and removes `nodes` for the rest of the run."""
+
+    nodes: List[str]
+
+    def run(self, ctx: TimelineContext):
+        for node_id in self.nodes:
+            ctx.nodes[node_id].cleanup(Teardown())
+        logger.info(f"Killed {len(self.nodes)} nodes: {self.nodes}")
+
+
+@dataclass(kw_only=True)
+class PauseNodes(Phase):
+    """Freezes `nodes` for `duration_s` (e.g.: a long GC pause or a stalled host)."""
+
+    nodes: List[str]
+    duration_s: float
+
+    def run(self, ctx: TimelineContext):
+        paused = []
+        try:
+            for node_id in self.nodes:
+                ctx.nodes[node_id].pause()
+                paused.append(node_id)
+            ctx.wait(self.duration_s)
+        finally:
+            for node_id in paused:
+                ctx.nodes[node_id].unpause()
+
+
+@dataclass(kw_only=True)
+class Partition(Phase):
+    """
+    Cuts `group` off from the other nodes for `duration_s` (see
+    `mesh.faults.NetworkPartition`), then heals the partition.
+    """
+
+    group: List[str]
+    duration_s: float
+
+    def run(self, ctx: TimelineContext):
+        group = [ctx.nodes[node_id] for node_id in self.group]
+        rest = [
+            node for node_id, node in ctx.nodes.items() if node_id not in self.group
+        ]
+        with NetworkPartition(group, rest):
+            ctx.wait(self.duration_s)
+
+
+@dataclass(kw_only=True)
+class SetParameter(Phase):
+    """Sets `key` to `value` in the timeline's params, read by the running phases."""
+
+    key: str
+    value: Any
+
+    def run(self, ctx: TimelineContext):
+        ctx.params[self.key] = self.value
+        logger.info(f"Set {self.key} = {self.value}")
+
+
+@dataclass(kw_only=True)
+class Marker(Phase):
+    """A measurement window of `duration_s`: does nothing, but is stamped like any phase."""
+
+    duration_s: float
+
+    def run(self, ctx: TimelineContext):
+        ctx.wait(self.duration_s)
+
+
+class Timeline:
+    """
+    A run's scenario as phases on a single schedule.
+
+    One scheduler starts every phase at its `at_s` offset, and phases run
+    concurrently (e.g.: background traffic while a node group is
+    partitioned). Every phase's start and end are recorded in the
+    `PhaseLog`, so the samples taken meanwhile are stamped with it.
+
+    If a phase fails, the other ones are stopped (`ctx.stop_event`), no
+    new phase is started, and the error is raised once they are done.
+    """
+
+    def __init__(self, phases: List[Phase]):
+        names = [phase.name for phase in phases]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Phase names must be unique: {sorted(duplicates)}")
+        self._phases = sorted(phases, key=lambda phase: phase.at_s)
+
+    @property
+    def phases(self) -> List[Phase]:
+        return list(self._phases)
+
+    def run(self, ctx: TimelineContext, phase_log: PhaseLog | None = None):
+        phase_log = phase_log or PhaseLog()
+        started = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=max(len(self._phases), 1), thread_name_prefix="phase"
+        ) as executor:
+            futures = []
+            for phase in self._phases:
+                delay = started + phase.at_s - time.monotonic()
+                if ctx.wait(max(delay, 0)):
+                    logger.warning(f"Timeline stopped before {phase.name}")
+                    break
+                futures.append(executor.submit(self._run_phase, phase, ctx, phase_log))
+            errors = [future.exception() for future in futures]
+
+        for error in errors:
+            if error:
+                raise error
+
+    def _run_phase(self, phase: Phase, ctx: TimelineContext, phase_log: PhaseLog):
+        logger.info(f"Phase {phase.name} ({type(phase).__name__}) started")
+        try:
+            with phase_log.phase(phase.name):
+                phase.run(ctx)
+        except Exception as e:
+            logger.error(f"Phase {phase.name} failed, stopping the timeline: {e}")
+            ctx.stop_event.set()
+            raise
+        logger.info(f"Phase {phase.name} ended")
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from nwaku.client import WakuClientException
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Publishes in flight at the same time, at most
+PUBLISH_MAX_WORKERS = 64
+# Delay before the first message is due, so all workers start on time
+SCHEDULE_LEAD_S = 0.1
+# Length of each open-loop run of a steady publisher
+STEADY_CHUNK_S = 60.0
+
+
+@dataclass
+class TrafficResult:
+    target_rate: float
+    duration_s: float
+    published: int
+    failed: int
+    achieved_rate: float
+    # how late the latest publish started compared to its schedule
+    max_lag_s: float
+
+
+def publish_at_rate(
+    publish: Callable[[int], None],
+    rate_per_s: float,
+    duration_s: float,
+    max_workers: int = PUBLISH_MAX_WORKERS,
+) -> TrafficResult:
+    """
+    Publishes `rate_per_s` messages per second for `duration_s` seconds.
+
+    Open loop: message `i` is due at `start + i / rate_per_s` whatever
+    the previous publishes took, so a slow node shows up as lag and
+    failed publishes instead of silently lowering the offered rate.
+    `publish(i)` publishes the `i`-th message (e.g.: from node
+    `i % num_publishers`).
+    """
+    num_messages = max(1, round(rate_per_s * duration_s))
+    start = time.monotonic() + SCHEDULE_LEAD_S
+
+    def _publish(i: int) -> tuple[bool, float]:
+        due = start + i / rate_per_s
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        lag = time.monotonic() - due
+        try:
+            publish(i)
+            return True, lag
+        except WakuClientException as e:
+            logger.debug(f"Publish {i} failed: {e}")
+            return False, lag
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_publish, range(num_messages)))
+    elapsed = time.monotonic() - start
+
+    published = sum(1 for ok, _ in results if ok)
+    return TrafficResult(
+        target_rate=rate_per_s,
+        duration_s=duration_s,
+        published=published,
+        failed=num_messages - published,
+        achieved_rate=published / elapsed if elapsed > 0 else 0.0,
+        max_lag_s=max(lag for _, lag in results),
+    )
+
+
+def publish_steadily(
+    publish: Callable[[int], None],
+    rate_per_s: float | Callable[[], float],
+    duration_s: float,
+    stop_event: threading.Event | None = None,
+    chunk_s: float = STEADY_CHUNK_S,
+) -> list[TrafficResult]:
+    """
+    Publishes `rate_per_s` messages per second for `duration_s` seconds
+    (e.g.: hours of background traffic), as consecutive `publish_at_rate`
+    runs of `chunk_s`.
+
+    Chunks keep the number of scheduled publishes bounded, and let
+    `stop_event` end the traffic early. `publish(i)` gets a message
+    index that keeps growing across chunks. Returns one result per chunk.
+
+    `rate_per_s` may be a function, read before every chunk, e.g.: to
+    change the rate while the traffic runs. A rate of 0 (or less) pauses
+    the traffic for that chunk: nothing is published.
+    """
+    results: list[TrafficResult] = []
+    deadline = time.monotonic() + duration_s
+    published = 0
+    while (remaining := deadline - time.monotonic()) > 0:
+        if stop_event and stop_event.is_set():
+            break
+        offset = published
+        rate = rate_per_s() if callable(rate_per_s) else rate_per_s
+        if rate <= 0:
+            paused_s = min(chunk_s, remaining)
+            if stop_event:
+                stop_event.wait(paused_s)
+            else:
+                time.sleep(paused_s)
+            results.append(TrafficResult(rate, paused_s, 0, 0, 0.0, 0.0))
+            continue
+        result = publish_at_rate(
+            lambda i: publish(offset + i), rate, min(chunk_s, remaining)
+        )
+        published += result.published + result.failed
+        results.append(result)
+        logger.info(
+            f"Steady traffic: {result.published} published, {result.failed} failed "
+            f"at {result.achieved_rate:.2f} msg/s, {max(remaining - chunk_s, 0):.0f}s left"
+        )
+    return results
@@ -0,0 +1,256 @@
+import ctypes
+import logging
+import math
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List
+
+from .runtime import NodeContainer
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Bytes of each frame copied to the harness: Ethernet + IPv4 + TCP
+# headers with options, never the payload
+HEADER_SNAPLEN = 128
+LINK_WINDOW_S = 1.0
+# How often the capture thread checks whether it was stopped
+STOP_CHECK_INTERVAL_S = 0.2
+# Kernel buffer of the capture socket, so bursts aren't dropped
+CAPTURE_RCVBUF_BYTES = 32 * 1024 * 1024
+
+# Linux constants not exposed by the `socket` module
+ETH_P_ALL = 0x0003
+ETH_P_IP = 0x0800
+ETH_HEADER_LEN = 14
+IPPROTO_TCP = 6
+SOL_PACKET = 263
+PACKET_ADD_MEMBERSHIP = 1
+PACKET_MR_PROMISC = 1
+SO_ATTACH_FILTER = 26
+# classic BPF `ret #k`: accept the frame, truncated to k bytes
+BPF_RET_K = 0x06
+
+
+class CaptureError(Exception):
+    """Raised when the capture socket can't be opened on the interface."""
+
+
+def parse_frame(frame: bytes | memoryview) -> tuple[str, str, int, int] | None:
+    """
+    Parses the headers of an Ethernet frame carrying IPv4.
+
+    Returns `(src_ip, dst_ip, frame_bytes, payload_bytes)`, where the
+    sizes come from the IP header, so a truncated frame (header
+    snapshot) gives its full size. `payload_bytes` are the bytes above
+    TCP (0 for other protocols). Returns None for any other frame.
+    """
+    if len(frame) < ETH_HEADER_LEN + 20:
+        return None
+    (ethertype,) = struct.unpack_from("!H", frame, 12)
+    if ethertype != ETH_P_IP:
+        return None
+
+    version_ihl, total_length, protocol = struct.unpack_from("!BxH5xB", frame, 14)
+    if version_ihl >> 4 != 4:
+        return None
+    ip_header_len = (version_ihl & 0x0F) * 4
+    src_ip = socket.inet_ntoa(frame[26:30])
+    dst_ip = socket.inet_ntoa(frame[30:34])
+
+    payload_bytes = 0
+    tcp_offset = ETH_HEADER_LEN + ip_header_len
+    if protocol == IPPROTO_TCP and len(frame) >= tcp_offset + 13:
+        tcp_header_len = (frame[tcp_offset + 12] >> 4) * 4
+        payload_bytes = max(total_length - ip_header_len - tcp_header_len, 0)
+
+    return src_ip, dst_ip, ETH_HEADER_LEN + total_length, payload_bytes
+
+
+class LinkAggregator:
+    """
+    Sums the traffic of every `(src, dst)` node pair per time window.
+
+    Frames are mapped to nodes by their IP addresses (`ip_to_node`), and
+    counted in the window `floor(timestamp / window_s)`. Only the totals
+    are kept, never the frames. A window is emitted by `pop_closed` once
+    a frame of a later window arrives, so memory stays bounded by the
+    number of node pairs.
+
+    Frames from or to an unknown address (e.g.: the harness talking to
+    the nodes' APIs through the bridge) are only counted in
+    `unmapped_bytes`.
+    """
+
+    def __init__(self, ip_to_node: Dict[str, str], window_s: float = LINK_WINDOW_S):
+        self._ip_to_node = ip_to_node
+        self._window_s = window_s
+        self._current_window: int | None = None
+        # (src, dst) -> [frame bytes, payload bytes, packets]
+        self._links: Dict[tuple[str, str], list[int]] = {}
+        self._closed: List[Dict[str, Any]] = []
+        self.unmapped_bytes = 0
+
+    def add(self, timestamp: float, frame: bytes | memoryview):
+        parsed = parse_frame(frame)
+        if parsed is None:
+            return
+        src_ip, dst_ip, frame_bytes, payload_bytes = parsed
+        src = self._ip_to_node.get(src_ip)
+        dst = self._ip_to_node.get(dst_ip)
+        if src is None or dst is None:
+            self.unmapped_bytes += frame_bytes
+            return
+
+        window = math.floor(timestamp / self._window_s)
+        if window != self._current_window:
+            self._close_window()
+            self._current_window = window
+        totals = self._links.setdefault((src, dst), [0, 0, 0])
+        totals[0] += frame_bytes
+        totals[1] += payload_bytes
+        totals[2] += 1
+
+    def _close_window(self):
+        if self._current_window is None:
+            return
+        window_start = self._current_window * self._window_s
+        for (src, dst), (frame_bytes, payload_bytes, packets) in self._links.items():
+            self._closed.append(
+                {
+                    "window_start": window_start,
+                    "window_s": self._window_s,
+                    "src": src,
+                    "dst": dst,
+                    "bytes": frame_bytes,
+                    "payload_bytes": payload_bytes,
+                    "packets": packets,
+                }
+            )
+        self._links = {}
+        self._current_window = None
+
+    def pop_closed(self, flush: bool = False) -> List[Dict[str, Any]]:
+        """Returns the records of the windows closed so far (all of them with `flush`)."""
+        if flush:
+            self._close_window()
+        closed, self._closed = self._closed, []
+        return closed
+
+
+class LinkCapture:
+    """
+    Captures the traffic between the nodes on the host interface they
+    all talk through (e.g.: the mesh's bridge, see
+    `NodeRuntime.bridge_interface`) into per-link records.
+
+    Frames are read from a raw `AF_PACKET` socket in promiscuous mode (a
+    bridge only passes the frames it forwards to its taps then), with a
+    BPF filter that truncates every frame to `snaplen` bytes in the
+    kernel: only headers reach the harness, and nothing is written to
+    disk. Each closed window's `(src, dst)` totals (`LinkAggregator`) are
+    appended to the shared `records` list. Needs root (CAP_NET_RAW).
+    """
+
+    def __init__(
+        self,
+        interface: str,
+        nodes: list[NodeContainer],
+        records: List[Dict[str, Any]],
+        window_s: float = LINK_WINDOW_S,
+        snaplen: int = HEADER_SNAPLEN,
+    ):
+        ip_to_node = {node.ip_address: node.id for node in nodes if node.ip_address}
+        if len(ip_to_node) < len(nodes):
+            logger.warning(
+                f"{len(nodes) - len(ip_to_node)} nodes have no known address, "
+                "their traffic won't be captured"
+            )
+        self._interface = interface
+        self._records = records
+        self._snaplen = snaplen
+        self._aggregator = LinkAggregator(ip_to_node, window_s)
+        self._stop_event = threading.Event()
+        self._sock: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+        self.frames = 0
+
+    @property
+    def unmapped_bytes(self) -> int:
+        return self._aggregator.unmapped_bytes
+
+    def start(self):
+        self._sock = _open_capture_socket(self._interface, self._snaplen)
+        self._thread = threading.Thread(
+            target=self._run, args=(self._sock,), daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Capturing link traffic on {self._interface}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+        self._records.extend(self._aggregator.pop_closed(flush=True))
+        logger.info(
+            f"Stopped capturing on {self._interface}: {self.frames} frames, "
+            f"{self.unmapped_bytes} bytes from or to other hosts"
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self, sock: socket.socket):
+        buffer = bytearray(self._snaplen)
+        view = memoryview(buffer)
+        while not self._stop_event.is_set():
+            try:
+                size = sock.recv_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                logger.error(f"Capture on {self._interface} failed: {e}")
+                break
+            self.frames += 1
+            self._aggregator.add(time.time(), view[:size])
+            closed = self._aggregator.pop_closed()
+            if closed:
+                self._records.extend(closed)
+
+
+def _open_capture_socket(interface: str, snaplen: int) -> socket.socket:
+    if os.geteuid() != 0:
+        raise PermissionError("Capturing link traffic needs root (CAP_NET_RAW)")
+    try:
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, CAPTURE_RCVBUF_BYTES)
+        _attach_snaplen_filter(sock, snaplen)
+        sock.bind((interface, 0))
+        # struct packet_mreq: ifindex, type, address length, address
+        membership = struct.pack(
+            "iHH8s", socket.if_nametoindex(interface), PACKET_MR_PROMISC, 0, b""
+        )
+        sock.setsockopt(SOL_PACKET, PACKET_ADD_MEMBERSHIP, membership)
+    except OSError as e:
+        raise CaptureError(f"Can't capture on {interface}: {e}") from e
+    sock.settimeout(STOP_CHECK_INTERVAL_S)
+    return sock
+
+
+def _attach_snaplen_filter(sock: socket.socket, snaplen: int):
+    """Attaches a one instruction BPF program truncating every frame to `snaplen`."""
+    # struct sock_filter: code, jt, jf, k
+    program = ctypes.create_string_buffer(struct.pack("HBBI", BPF_RET_K, 0, 0, snaplen))
+    # struct sock_fprog: length, pointer to the instructions
+    fprog = struct.pack("HL", 1, ctypes.addressof(program))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
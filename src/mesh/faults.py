@@ -0,0 +1,109 @@
+import logging
+import subprocess
+import uuid
+from typing import Callable
+
+from .runtime import NodeContainer
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Comment of every rule a partition adds, to find leftovers
+PARTITION_RULE_PREFIX = "p2p-eval-partition-"
+
+
+class FaultError(Exception):
+    """Raised when a fault can't be injected or removed."""
+
+
+def _iptables(*args: str):
+    try:
+        result = subprocess.run(
+            ["iptables", "-w", *args], capture_output=True, text=True
+        )
+    except FileNotFoundError as e:
+        raise FaultError("iptables is needed to partition the mesh") from e
+    if result.returncode != 0:
+        raise FaultError(f"`iptables {' '.join(args)}` failed: {result.stderr.strip()}")
+
+
+class NetworkPartition:
+    """
+    Cuts the traffic between two groups of nodes, while each group (and
+    the host, e.g.: the harness talking to the node APIs) still reaches
+    every node.
+
+    The cut is made of `DROP` rules on the host's `FORWARD` chain for
+    every address pair across the groups, in both directions, so
+    established connections stall like in a real partition instead of
+    being closed. Bridged traffic only goes through iptables with
+    `br_netfilter` (`net.bridge.bridge-nf-call-iptables = 1`), which
+    Docker sets up for its networks. Needs root.
+
+    Every rule is commented with `PARTITION_RULE_PREFIX` and the
+    partition's id, so `heal` removes exactly what `apply` added.
+    """
+
+    def __init__(
+        self,
+        group: list[NodeContainer],
+        rest: list[NodeContainer],
+        run: Callable[..., None] = _iptables,
+    ):
+        self._group_ips = _ips(group)
+        self._rest_ips = _ips(rest)
+        self._run = run
+        self._comment = f"{PARTITION_RULE_PREFIX}{uuid.uuid4().hex[:8]}"
+        self._applied = False
+
+    def _rules(self) -> list[list[str]]:
+        return [
+            [
+                "-s",
+                ",".join(src_ips),
+                "-d",
+                ",".join(dst_ips),
+                "-m",
+                "comment",
+                "--comment",
+                self._comment,
+                "-j",
+                "DROP",
+            ]
+            for src_ips, dst_ips in (
+                (self._group_ips, self._rest_ips),
+                (self._rest_ips, self._group_ips),
+            )
+        ]
+
+    def apply(self):
+        if self._applied or not self._group_ips or not self._rest_ips:
+            return
+        for rule in self._rules():
+            self._run("-I", "FORWARD", "1", *rule)
+        self._applied = True
+        logger.info(
+            f"Partitioned {len(self._group_ips)} nodes from {len(self._rest_ips)}"
+        )
+
+    def heal(self):
+        if not self._applied:
+            return
+        for rule in self._rules():
+            self._run("-D", "FORWARD", *rule)
+        self._applied = False
+        logger.info(f"Healed partition {self._comment}")
+
+    def __enter__(self):
+        self.apply()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.heal()
+
+
+def _ips(nodes: list[NodeContainer]) -> list[str]:
+    missing = [node.id for node in nodes if not node.ip_address]
+    if missing:
+        raise FaultError(f"Nodes without a known address can't be cut: {missing}")
+    return [node.ip_address for node in nodes if node.ip_address]
@@ -0,0 +1,73 @@
+import logging
+import threading
+
+from docker import errors
+from nwaku.logs import LogEvent, LogStreamParser
+
+from .mesh import NodeContainer
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+class LogCollector:
+    """
+    Follows the logs of every node container in parallel and parses them
+    into `LogEvent`s as they are written.
+
+    Each node gets a thread reading its runtime's log stream; the stream
+    starts at the node's first log line, so nothing written before the
+    collector started is lost. Parsed events are appended to
+    the shared `events` list.
+    """
+
+    def __init__(self, nodes: list[NodeContainer], events: list[LogEvent]):
+        self._nodes = nodes
+        self._events = events
+        self._lock = threading.Lock()
+        self._streams = []
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        for node in self._nodes:
+            stream = node.logs()
+            self._streams.append(stream)
+            thread = threading.Thread(
+                target=self._follow, args=(node, stream), daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Following logs of {len(self._nodes)} nodes")
+
+    def stop(self):
+        # closing the streams unblocks the reading threads
+        for stream in self._streams:
+            stream.close()
+        for thread in self._threads:
+            thread.join()
+        self._streams.clear()
+        self._threads.clear()
+        logger.info(f"Stopped following logs, collected {len(self._events)} events")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _follow(self, node: NodeContainer, stream):
+        parser = LogStreamParser(node.id)
+        try:
+            for chunk in stream:
+                self._append(parser.feed(chunk))
+        except (errors.APIError, OSError, ValueError) as e:
+            # raised when the stream is closed under us or the
+            # node goes away
+            logger.debug(f"Log stream of {node.id} ended: {e}")
+        self._append(parser.flush())
+
+    def _append(self, events: list[LogEvent]):
+        if events:
+            with self._lock:
+                self._events.extend(events)
@@ -1,69 +1,84 @@
-import docker
 import logging
-
-from .utils import get_free_ports, new_docker_net, pull_docker_image
+import uuid
+
+from .profiling import Profiler
+from .resources import ROLE_BOOTSTRAP, ROLE_REGULAR, ResourcePlan
+from .runtime import (
+    NWAKU_APP,
+    DockerRuntime,
+    NodeApp,
+    NodeContainer,
+    NodeRuntime,
+    Teardown,
+)
+from .utils import get_free_ports
 from nwaku.client import WakuClient
 
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
-from docker import errors
-from docker.models.containers import Container
-from docker.models.images import Image
-from docker.models.networks import Network
-
-DOCKER_NET_NAME = "p2p-eval-test"
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 
-@dataclass
-class NodeContainer:
-    """Holds state for a running node container."""
-
-    id: str
-    container: Container
-    rest_port: int
-    metrics_port: int
-
-    def cleanup(self):
-        try:
-            self.container.stop()
-            self.container.remove()
-            logger.info(f"Stopped and removed container: {self.container.name}")
-        except errors.NotFound:
-            logger.warning(
-                f"Container {self.container.name} not found for cleanup, already removed."
-            )
-        except Exception as e:
-            logger.error(f"Error cleaning up container {self.container.name}: {e}")
-
-
 class Mesh:
     """
     Mesh handles the setup and teardown of a network of nodes.
 
-    1. Currently it creates a docker network and runs all nodes in it.
+    1. Nodes run on a pluggable `NodeRuntime`: Docker containers on a
+       docker network (default), or processes in network namespaces
+       (`mesh.netns.ProcessRuntime`)
     2. There is no discovery yet
 
+    Every resource it creates is labelled with the mesh's `session_id`,
+    and the leftovers of crashed runs are reaped before starting.
+
     TODOs:
     - [ ] statically build mesh or add discovery
     - [ ] handle forceful shutdown signals
     - [ ] allow building image too
-    - [ ] allow arbitrary p2p apps
-        - [ ] required: receive necessary ports flags to run application
+    - [x] allow arbitrary p2p apps
+        - [x] required: receive necessary ports flags to run application
     """
 
-    def __init__(self, num_nodes: int, bootstrappers_num: int, image_name: str):
+    def __init__(
+        self,
+        num_nodes: int,
+        bootstrappers_num: int,
+        image_name: str | None = None,
+        pull_image: bool = True,
+        profiler: Profiler | None = None,
+        runtime: NodeRuntime | None = None,
+        app: NodeApp = NWAKU_APP,
+        teardown: Teardown | None = None,
+        resources: ResourcePlan | None = None,
+    ):
+        """
+        Without a `runtime`, nodes run in Docker (see `DockerRuntime` for
+        `image_name` and `pull_image`). `app` describes the args and port
+        flags of the app every node runs. `teardown` sets how nodes are
+        stopped (killed and removed in bulk by default). `resources` sets
+        the cores, CPU quota and memory of every node (unlimited by
+        default).
+
+        Setup and teardown phases, and every node's start, are recorded as
+        spans in `profiler` (a new one if not given).
+        """
         if bootstrappers_num >= num_nodes:
             raise ValueError("Total nodes must be greater than bootstrap nodes.")
 
+        if runtime is None:
+            if image_name is None:
+                raise ValueError("Either an image name or a runtime is required.")
+            runtime = DockerRuntime(image_name, pull_image)
+
         self._num_nodes = num_nodes
         self._bootstrappers_num = bootstrappers_num
-        self._image_name = image_name
-        self._client = docker.from_env()
-        self._image: Image | None = None
-        self._network: Network | None = None
+        self._runtime = runtime
+        self._app = app
+        self._profiler = profiler or Profiler()
+        self._teardown = teardown or Teardown()
+        self._resources = resources
+        self._session_id = uuid.uuid4().hex[:12]
         self._bootstrap_nodes: list[NodeContainer] = []
         self._nodes: list[NodeContainer] = []
 
@@ -80,6 +95,28 @@ class Mesh:
     def all_nodes(self) -> list[NodeContainer]:
         return self._bootstrap_nodes + self._nodes
 
+    @property
+    def profiler(self) -> Profiler:
+        return self._profiler
+
+    @property
+    def session_id(self) -> str:
+        """Labels every resource of this mesh (see `NodeRuntime.reap`)."""
+        return self._session_id
+
+    @property
+    def runtime(self) -> NodeRuntime:
+        return self._runtime
+
+    @property
+    def resources(self) -> ResourcePlan | None:
+        return self._resources
+
+    @property
+    def image_id(self) -> str | None:
+        """Returns the id of the image the nodes run, once the mesh is started."""
+        return self._runtime.image_id
+
     def start(self):
         """
         Starts the mesh network concurrently:
@@ -90,14 +127,28 @@ class Mesh:
 
         TODO: node configs shouldn't be built with dicts but instead with a dataclass
         """
-        logger.info("Starting mesh: pulling image and creating docker network")
-        self._image = pull_docker_image(self._client, self._image_name)
-        self._network = new_docker_net(self._client, DOCKER_NET_NAME)
+        with self._profiler.span("mesh_start", "mesh"):
+            self._start()
+
+        logger.info("Mesh started successfully.")
+
+    def _start(self):
+        with self._profiler.span("reap", "mesh"):
+            self._runtime.reap()
+
+        logger.info(
+            f"Starting mesh {self._session_id}: getting image and creating network"
+        )
+        with self._profiler.span("get_image", "mesh"):
+            self._runtime.prepare_image()
+        with self._profiler.span("create_network", "mesh"):
+            self._runtime.create_network(self._session_id)
 
         # 1. Pre-allocate all ports at once to avoid race conditions
         logger.debug("Pre-allocating ports...")
         num_ports_needed = self._num_nodes * 2
-        all_ports = get_free_ports(num_ports_needed)
+        with self._profiler.span("allocate_ports", "mesh"):
+            all_ports = get_free_ports(num_ports_needed)
         port_iterator = iter(all_ports)
 
         # 2. Prepare startup configs for all nodes
@@ -106,6 +157,8 @@ class Mesh:
             bootstrap_configs.append(
                 {
                     "name": f"bootstrap-node-{i}",
+                    "role": ROLE_BOOTSTRAP,
+                    "index": i,
                     "rest_port": next(port_iterator),
                     "metrics_port": next(port_iterator),
                 }
@@ -116,6 +169,8 @@ class Mesh:
             regular_node_configs.append(
                 {
                     "name": f"node-{i}",
+                    "role": ROLE_REGULAR,
+                    "index": self._bootstrappers_num + i,
                     "rest_port": next(port_iterator),
                     "metrics_port": next(port_iterator),
                 }
@@ -123,46 +178,43 @@ class Mesh:
 
         # 3. Start bootstrap nodes
         logger.info(f"Starting {self._bootstrappers_num} bootstrap nodes...")
-        with ThreadPoolExecutor() as executor:
-            self._bootstrap_nodes = list(
-                executor.map(lambda cfg: self._start_node(**cfg), bootstrap_configs)
-            )
+        with self._profiler.span("start_bootstrap_nodes", "mesh"):
+            with ThreadPoolExecutor() as executor:
+                self._bootstrap_nodes = list(
+                    executor.map(lambda cfg: self._start_node(**cfg), bootstrap_configs)
+                )
 
         # 4. Get multiaddresses
         logger.info("Getting multiaddresses of bootstrap nodes...")
-        with ThreadPoolExecutor() as executor:
-            bootstrap_multiaddrs = list(
-                executor.map(self._get_multiaddr, self._bootstrap_nodes)
-            )
+        with self._profiler.span("fetch_multiaddrs", "mesh"):
+            with ThreadPoolExecutor() as executor:
+                bootstrap_multiaddrs = list(
+                    executor.map(self._get_multiaddr, self._bootstrap_nodes)
+                )
 
         # 5. Start non-bootstrap nodes
         num_regular_nodes = self._num_nodes - self._bootstrappers_num
         logger.info(f"Starting {num_regular_nodes} regular nodes...")
-        with ThreadPoolExecutor() as executor:
-            self._nodes = list(
-                executor.map(
-                    lambda cfg: self._start_node(
-                        **cfg, bootstrap_multiaddresses=bootstrap_multiaddrs
-                    ),
-                    regular_node_configs,
+        with self._profiler.span("start_regular_nodes", "mesh"):
+            with ThreadPoolExecutor() as executor:
+                self._nodes = list(
+                    executor.map(
+                        lambda cfg: self._start_node(
+                            **cfg, bootstrap_multiaddresses=bootstrap_multiaddrs
+                        ),
+                        regular_node_configs,
+                    )
                 )
-            )
-
-        logger.info("Mesh started successfully.")
 
     def stop(self):
-        """Stops and removes all containers and the network."""
+        """Stops and removes all nodes and the network, as set by `teardown`."""
         logger.info("Stopping mesh...")
-        with ThreadPoolExecutor() as executor:
-            # TODO: handle exceptions here?
-            list(executor.map(lambda node: node.cleanup(), self.all_nodes))
+        with self._profiler.span("mesh_stop", "mesh"):
+            with ThreadPoolExecutor(max_workers=self._teardown.max_workers) as executor:
+                # TODO: handle exceptions here?
+                list(executor.map(self._cleanup_node, self.all_nodes))
 
-        if self._network:
-            try:
-                self._network.remove()
-                logger.info(f"Removed network: {self._network.name}")
-            except errors.APIError as e:
-                logger.error(f"Error removing network {self._network.name}: {e}")
+            self._runtime.remove_network()
 
         self._bootstrap_nodes.clear()
         self._nodes.clear()
@@ -178,65 +230,49 @@ class Mesh:
     def _start_node(
         self,
         name: str,
+        role: str,
+        index: int,
         rest_port: int,
         metrics_port: int,
         bootstrap_multiaddresses: list[str] | None = None,
     ) -> NodeContainer:
-        """Starts a single node container with required ports and config."""
-        if not self._network:
-            raise ValueError("Network not initialized.")
-
-        if not self._image:
-            raise ValueError("Image not initialized.")
-
-        command = [
-            f"--listen-address=0.0.0.0",
-            f"--rest=true",
-            f"--rest-admin=true",
-            f"--rest-address=0.0.0.0",
-            f"--rest-port={rest_port}",
-            f"--metrics-server=true",
-            f"--metrics-server-address=0.0.0.0",
-            f"--metrics-server-port={metrics_port}",
-        ]
-        if bootstrap_multiaddresses:
-            for addr in bootstrap_multiaddresses:
-                if addr:
-                    command.append(f"--staticnode={addr}")
-
-        container = self._client.containers.run(
-            self._image,
-            command=command,
-            name=name,
-            detach=True,
-            # make node's APIs accessible to host, and therefore to this script'
-            ports={
-                f"{rest_port}/tcp": rest_port,
-                f"{metrics_port}/tcp": metrics_port,
-            },
-            network=self._network.name,
+        """Starts a single node with required ports and config."""
+        command = self._app.command(rest_port, metrics_port, bootstrap_multiaddresses)
+        resources = (
+            self._resources.for_node(name, role, index) if self._resources else None
         )
+        with self._profiler.span("start_node", "node", node=name):
+            node = self._runtime.start_node(
+                name, command, [rest_port, metrics_port], resources
+            )
         logger.info(
-            f"Started container: {name} with REST port {rest_port} and metrics port {metrics_port}"
+            f"Started node: {name} with REST port {rest_port} and metrics port {metrics_port}"
         )
 
-        return NodeContainer(name, container, rest_port, metrics_port)
+        return node
+
+    def _cleanup_node(self, node: NodeContainer):
+        with self._profiler.span("cleanup_node", "node", node=node.id):
+            node.cleanup(self._teardown)
 
     def _get_multiaddr(self, node: NodeContainer) -> str:
-        with WakuClient(
-            ip_address="localhost",
-            rest_port=node.rest_port,
-            metrics_port=node.metrics_port,
-        ) as client:
-            info = client.get_info()
-            listen_addrs = info.get("listenAddresses", [])
-            if not listen_addrs:
-                raise Exception(f"Node {node.id} reported no listen addresses")
-
-            # find first not loopback since we're using docker network
-            for addr in listen_addrs:
-                if "/127.0.0.1/" not in addr:
-                    logger.debug(f"Selected multiaddr for {node.id}: {addr}")
-                    return addr
-
-            raise Exception(f"Could not find a non-loopback multiaddr for {node.id}")
+        with self._profiler.span("fetch_multiaddr", "node", node=node.id):
+            with WakuClient(
+                ip_address=node.api_host,
+                rest_port=node.rest_port,
+                metrics_port=node.metrics_port,
+            ) as client:
+                info = client.get_info()
+                listen_addrs = info.get("listenAddresses", [])
+                if not listen_addrs:
+                    raise Exception(f"Node {node.id} reported no listen addresses")
+
+                # find first not loopback since nodes are on their own network
+                for addr in listen_addrs:
+                    if "/127.0.0.1/" not in addr:
+                        logger.debug(f"Selected multiaddr for {node.id}: {addr}")
+                        return addr
+
+                raise Exception(
+                    f"Could not find a non-loopback multiaddr for {node.id}"
+                )
@@ -0,0 +1,325 @@
+import ipaddress
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import IO, Iterator
+
+from .resources import NodeResources
+from .runtime import (
+    OWNER_PID_LABEL,
+    OWNER_START_LABEL,
+    NodeContainer,
+    NodeRuntime,
+    Teardown,
+    _is_orphan,
+    _owner_labels,
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+NWAKU_BINARY = "wakunode2"
+BRIDGE_NAME = "p2p-eval-br"
+SUBNET = "10.77.0.0/16"
+# Prefix of everything created on the host, so leftovers are easy to find
+NETNS_PREFIX = "p2p-eval-"
+LOG_FOLLOW_INTERVAL_S = 0.1
+
+
+class NetnsError(Exception):
+    """Raised when setting up the namespaces or bridge fails."""
+
+
+@dataclass
+class NodeProcess:
+    """A node's process, and the namespace and log file it owns."""
+
+    process: subprocess.Popen
+    netns: str
+    log_path: str
+    log_file: IO[bytes]
+
+
+class _LogFollower:
+    """Follows a log file as it grows (`tail -f`), until closed."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._closed = threading.Event()
+
+    def __iter__(self) -> "_LogFollower":
+        return self
+
+    def __next__(self) -> bytes:
+        while not self._closed.is_set():
+            chunk = self._file.read(64 * 1024)
+            if chunk:
+                return chunk
+            self._closed.wait(LOG_FOLLOW_INTERVAL_S)
+        self._file.close()
+        raise StopIteration
+
+    def close(self):
+        self._closed.set()
+
+
+def _ip(*args: str, stdin: str | None = None):
+    result = subprocess.run(["ip", *args], input=stdin, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise NetnsError(f"`ip {' '.join(args)}` failed: {result.stderr.strip()}")
+
+
+def _require_root():
+    if os.geteuid() != 0:
+        raise PermissionError("ProcessRuntime needs root to create network namespaces")
+
+
+class ProcessRuntime(NodeRuntime):
+    """
+    Runs every node as a plain process in its own network namespace.
+
+    Each namespace gets a veth pair plugged into a host bridge, so nodes
+    reach each other (and the host reaches their APIs) on the bridge
+    subnet, like on a Docker network, but without per-node container
+    create/start overhead. Needs root (CAP_NET_ADMIN) and the `ip`
+    tool (iproute2), and `binary` installed on the host.
+
+    `binary` can be a local nwaku build or any app whose flags are
+    described by the `NodeApp` the mesh runs.
+
+    Nodes can be pinned to cores (with `taskset`), but not limited in
+    CPU time or memory, which would need a cgroup per node.
+
+    Everything it creates is named with `NETNS_PREFIX`, and carries the
+    pid and start time of the process that created it: in the
+    namespace's name (`p2p-eval-<pid>-<start>-<node>`) and in the
+    bridge's alias. `reap` only removes the ones whose process is gone
+    (and kills what runs in them), like the Docker runtime. As the bridge name is fixed, a
+    single process mesh runs per host.
+    """
+
+    def __init__(
+        self,
+        binary: str = NWAKU_BINARY,
+        bridge_name: str = BRIDGE_NAME,
+        subnet: str = SUBNET,
+    ):
+        self._binary = binary
+        self._bridge_name = bridge_name
+        self._network = ipaddress.ip_network(subnet)
+        self._hosts = self._network.hosts()
+        # the first address of the subnet is the bridge's
+        self._gateway = str(next(self._hosts))
+        self._lock = threading.Lock()
+        self._num_nodes = 0
+        self._binary_path: str | None = None
+        self._log_dir: str | None = None
+
+    @property
+    def image_id(self) -> str | None:
+        return self._binary_path
+
+    @property
+    def bridge_interface(self) -> str | None:
+        return self._bridge_name
+
+    def prepare_image(self):
+        self._binary_path = shutil.which(self._binary)
+        if not self._binary_path:
+            raise FileNotFoundError(f"App binary {self._binary} not found")
+
+    def reap(self) -> int:
+        _require_root()
+        netns_list = subprocess.run(
+            ["ip", "netns", "list"], capture_output=True, text=True
+        ).stdout
+        removed = 0
+        for line in netns_list.splitlines():
+            netns = line.split(" ", 1)[0]
+            if not netns.startswith(NETNS_PREFIX):
+                continue
+            owner_pid, owner_start, _ = (
+                netns[len(NETNS_PREFIX) :].split("-", 2) + ["", ""]
+            )[:3]
+            owner = {OWNER_PID_LABEL: owner_pid, OWNER_START_LABEL: owner_start}
+            if not _is_orphan(owner):
+                continue
+            pids = subprocess.run(
+                ["ip", "netns", "pids", netns], capture_output=True, text=True
+            ).stdout.split()
+            for pid in pids:
+                try:
+                    os.kill(int(pid), signal.SIGKILL)
+                except (ProcessLookupError, ValueError):
+                    pass
+            subprocess.run(["ip", "netns", "del", netns], capture_output=True)
+            removed += 1
+
+        if self._bridge_is_orphan():
+            bridge = subprocess.run(
+                ["ip", "link", "del", self._bridge_name], capture_output=True
+            )
+            if bridge.returncode == 0:
+                removed += 1
+        if removed:
+            logger.warning(f"Removed {removed} namespaces/bridges left by crashed runs")
+        return removed
+
+    def _bridge_is_orphan(self) -> bool:
+        try:
+            with open(f"/sys/class/net/{self._bridge_name}/ifalias") as f:
+                alias = f.read().strip()
+        except OSError:
+            return False  # no bridge
+        owner = {}
+        for label in alias.split(","):
+            key, _, value = label.partition("=")
+            owner[key] = value
+        return _is_orphan(owner)
+
+    def create_network(self, session_id: str):
+        _require_root()
+        prefix_len = self._network.prefixlen
+        owner_alias = ",".join(f"{k}={v}" for k, v in _owner_labels().items())
+        _ip(
+            "-batch",
+            "-",
+            stdin=(
+                f"link add name {self._bridge_name} type bridge\n"
+                f"addr add {self._gateway}/{prefix_len} dev {self._bridge_name}\n"
+                f"link set {self._bridge_name} alias {owner_alias}\n"
+                f"link set {self._bridge_name} up\n"
+            ),
+        )
+        self._log_dir = tempfile.mkdtemp(prefix=f"{NETNS_PREFIX}{session_id}-")
+        logger.info(f"Created bridge {self._bridge_name} ({self._network})")
+
+    def remove_network(self):
+        try:
+            _ip("link", "del", self._bridge_name)
+            logger.info(f"Removed bridge: {self._bridge_name}")
+        except NetnsError as e:
+            logger.error(f"Error removing bridge {self._bridge_name}: {e}")
+
+        if self._log_dir:
+            shutil.rmtree(self._log_dir, ignore_errors=True)
+            self._log_dir = None
+
+    def start_node(
+        self,
+        name: str,
+        command: list[str],
+        ports: list[int],
+        resources: NodeResources | None = None,
+    ) -> NodeContainer:
+        if not self._binary_path or not self._log_dir:
+            raise ValueError("Runtime not initialized.")
+        resources = resources or NodeResources()
+        if resources.cpus is not None or resources.memory_bytes is not None:
+            # would need a cgroup per node, Docker makes them
+            raise ValueError(
+                "ProcessRuntime only supports pinning (cpuset), not CPU or memory limits."
+            )
+
+        with self._lock:
+            index = self._num_nodes
+            self._num_nodes += 1
+            ip_address = str(next(self._hosts))
+
+        owner = _owner_labels()
+        netns = (
+            f"{NETNS_PREFIX}{owner[OWNER_PID_LABEL]}-"
+            f"{owner.get(OWNER_START_LABEL, '')}-{name}"
+        )
+        # interface names are limited to 15 chars
+        host_veth, node_veth = f"p2pe{index}h", f"p2pe{index}n"
+        _ip(
+            "-batch",
+            "-",
+            stdin=(
+                f"netns add {netns}\n"
+                f"link add {host_veth} type veth peer name {node_veth} netns {netns}\n"
+                f"link set {host_veth} master {self._bridge_name} up\n"
+            ),
+        )
+        _ip(
+            "-n",
+            netns,
+            "-batch",
+            "-",
+            stdin=(
+                f"addr add {ip_address}/{self._network.prefixlen} dev {node_veth}\n"
+                f"link set {node_veth} up\n"
+                f"link set lo up\n"
+            ),
+        )
+
+        log_path = os.path.join(self._log_dir, f"{name}.log")
+        log_file = open(log_path, "wb")
+        pinning = []
+        if resources.cpuset is not None:
+            # set before the app starts its threads, which inherit it
+            cores = ",".join(str(core) for core in resources.cpuset)
+            pinning = ["taskset", "--cpu-list", cores]
+        # `taskset` and `ip netns exec` exec the app, so the pid is the app's
+        process = subprocess.Popen(
+            [*pinning, "ip", "netns", "exec", netns, self._binary_path, *command],
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+        rest_port, metrics_port = ports
+        return NodeContainer(
+            name,
+            NodeProcess(process, netns, log_path, log_file),
+            rest_port,
+            metrics_port,
+            self,
+            api_host=ip_address,
+            ip_address=ip_address,
+        )
+
+    def stop_node(self, node: NodeContainer, teardown: Teardown):
+        node_process: NodeProcess = node.handle
+        process = node_process.process
+        try:
+            if process.poll() is None and teardown.graceful:
+                # a paused process only handles SIGTERM once resumed
+                os.killpg(process.pid, signal.SIGCONT)
+                process.terminate()
+                try:
+                    process.wait(teardown.stop_timeout_s)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+            elif process.poll() is None:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+            # deleting the namespace deletes the veth pair too
+            _ip("netns", "del", node_process.netns)
+            logger.info(f"Stopped process and removed namespace of: {node.id}")
+        except (NetnsError, OSError) as e:
+            logger.error(f"Error cleaning up node {node.id}: {e}")
+        finally:
+            node_process.log_file.close()
+
+    def pause_node(self, node: NodeContainer):
+        os.killpg(node.handle.process.pid, signal.SIGSTOP)
+
+    def unpause_node(self, node: NodeContainer):
+        os.killpg(node.handle.process.pid, signal.SIGCONT)
+
+    def logs(self, node: NodeContainer) -> Iterator[bytes]:
+        return _LogFollower(node.handle.log_path)
+
+    def memory_bytes(self, node: NodeContainer) -> int:
+        with open(f"/proc/{node.handle.process.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import pandas as pd
+
+
+@dataclass
+class Span:
+    """A timed section of work, e.g.: a setup phase or a single node's start."""
+
+    name: str
+    category: str
+    start: float  # unix seconds, same clock as metric samples and log events
+    end: float
+    node: str | None = None
+    thread: str | None = None
+
+    @property
+    def duration_s(self) -> float:
+        return self.end - self.start
+
+
+class Profiler:
+    """
+    Records timing spans from any thread.
+
+    Spans are structured (name, category and optionally the node they
+    belong to) so they can be aggregated as a DataFrame, or inspected as
+    a timeline in a Chrome trace viewer (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: list[Span] = []
+
+    @contextmanager
+    def span(self, name: str, category: str = "phase", node: str | None = None):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(Span(name, category, start, time.time(), node))
+
+    def record(self, span: Span):
+        if span.thread is None:
+            span.thread = threading.current_thread().name
+        with self._lock:
+            self._spans.append(span)
+
+    @property
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        columns = ["name", "category", "start", "end", "node", "thread"]
+        spans = self.spans
+        if not spans:
+            return pd.DataFrame(columns=columns + ["duration_s"])
+
+        df = pd.DataFrame([asdict(span) for span in spans], columns=columns)
+        df["duration_s"] = df["end"] - df["start"]
+        return df.sort_values("start", ignore_index=True)
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """
+        Converts the spans to the Chrome trace event format.
+
+        Per-node spans get one lane per node, the other spans one lane
+        per recording thread.
+        """
+        spans = sorted(self.spans, key=lambda span: span.start)
+        origin = spans[0].start if spans else 0.0
+        lanes: dict[str, int] = {}
+        events = []
+        for span in spans:
+            lane = span.node or span.thread or "main"
+            tid = lanes.setdefault(lane, len(lanes) + 1)
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": (span.start - origin) * 1e6,
+                    "dur": span.duration_s * 1e6,
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"node": span.node} if span.node else {},
+                }
+            )
+        for lane, tid in lanes.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"name": lane},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
@@ -0,0 +1,136 @@
+import functools
+import logging
+import os
+from dataclasses import dataclass, field, fields
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Roles of the nodes, as keys of `ResourcePlan.groups`
+ROLE_BOOTSTRAP = "bootstrap"
+ROLE_REGULAR = "regular"
+
+
+@functools.cache
+def host_cores() -> list[int]:
+    """
+    Cores this process could run on when first asked, i.e.: before any
+    `ResourcePlan` pinned it. All of the host's cores where the affinity
+    can't be read (e.g.: macOS).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+@dataclass
+class NodeResources:
+    """
+    Resources of a node, None being unlimited.
+
+    `cpuset` pins the node to those cores, `cpus` caps the CPU time it
+    gets (e.g.: 0.5 is half a core, spread over its cores) and
+    `memory_bytes` its memory: the node is OOM-killed above it, it
+    doesn't swap.
+    """
+
+    cpuset: list[int] | None = None
+    cpus: float | None = None
+    memory_bytes: int | None = None
+
+    def override(self, other: "NodeResources") -> "NodeResources":
+        """Returns these resources, with the ones set in `other` replacing them."""
+        return NodeResources(
+            **{
+                f.name: (
+                    getattr(other, f.name)
+                    if getattr(other, f.name) is not None
+                    else getattr(self, f.name)
+                )
+                for f in fields(self)
+            }
+        )
+
+
+@dataclass
+class ResourcePlan:
+    """
+    How the host's cores and memory are split between the harness and
+    the nodes of a mesh.
+
+    The first `harness_cores` cores (of `host_cores()`) are kept for the
+    harness: `pin_harness` pins its threads to them, and no node is
+    pinned on them. With `pin_nodes`, every node is pinned to
+    `cores_per_node` of the other cores, handed out round-robin in start
+    order, so a node keeps running on the same cores instead of
+    migrating with the scheduler's load balancing.
+
+    `limits` sets the CPU quota and memory limit of every node, and
+    `groups` overrides them (and the pinning) for a role (`bootstrap`,
+    `regular`) or a node name, the node name winning.
+    """
+
+    harness_cores: int = 0
+    pin_nodes: bool = False
+    cores_per_node: int = 1
+    limits: NodeResources = field(default_factory=NodeResources)
+    groups: dict[str, NodeResources] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.harness_cores >= len(host_cores()):
+            raise ValueError(
+                f"Can't keep {self.harness_cores} of {len(host_cores())} cores "
+                "for the harness, none would be left for the nodes."
+            )
+        if self.pin_nodes and self.cores_per_node > len(self.node_cores):
+            raise ValueError(
+                f"Can't pin nodes to {self.cores_per_node} cores, "
+                f"only {len(self.node_cores)} are left for them."
+            )
+
+    @property
+    def harness_cpus(self) -> list[int]:
+        """Cores kept for the harness, empty if it isn't pinned."""
+        return host_cores()[: self.harness_cores]
+
+    @property
+    def node_cores(self) -> list[int]:
+        """Cores the nodes run on."""
+        return host_cores()[self.harness_cores :]
+
+    def for_node(self, name: str, role: str, index: int) -> NodeResources:
+        """Resources of the `index`-th node started (from 0), called `name`."""
+        resources = self.limits
+        if self.pin_nodes:
+            first = index * self.cores_per_node
+            cores = self.node_cores
+            resources = resources.override(
+                NodeResources(
+                    cpuset=sorted(
+                        cores[(first + i) % len(cores)]
+                        for i in range(self.cores_per_node)
+                    )
+                )
+            )
+        elif self.harness_cores:
+            # even unpinned, nodes stay off the harness' cores
+            resources = resources.override(NodeResources(cpuset=self.node_cores))
+        for key in (role, name):
+            if key in self.groups:
+                resources = resources.override(self.groups[key])
+        return resources
+
+    def pin_harness(self):
+        """
+        Pins every thread of this process to the harness' cores. Threads
+        started afterwards inherit it. Does nothing without harness cores.
+        """
+        if not self.harness_cores:
+            return
+        for task in os.listdir("/proc/self/task"):
+            try:
+                os.sched_setaffinity(int(task), self.harness_cpus)
+            except ProcessLookupError:
+                # the thread exited meanwhile
+                pass
+        logger.info(f"Pinned the harness to cores {self.harness_cpus}")
@@ -0,0 +1,435 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+import docker
+from docker import errors
+from docker.models.images import Image
+from docker.models.networks import Network
+
+from .resources import NodeResources
+from .utils import get_local_docker_image, new_docker_net, pull_docker_image
+
+DOCKER_NET_NAME = "p2p-eval-test"
+# Every resource a mesh creates carries its session id in this label...
+SESSION_LABEL = "p2p-eval.session"
+# ...and the pid and start time (unix) of the process that created it,
+# to tell orphans apart even once the pid is reused (e.g.: after a reboot)
+OWNER_PID_LABEL = "p2p-eval.owner-pid"
+OWNER_START_LABEL = "p2p-eval.owner-start"
+# Slack when comparing start times, read from clock ticks
+OWNER_START_TOLERANCE_S = 1.0
+# Orphan containers removed at the same time, at most
+REAP_MAX_WORKERS = 32
+
+DEFAULT_STOP_TIMEOUT_S = 10
+DEFAULT_TEARDOWN_MAX_WORKERS = 32
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+@dataclass
+class NodeApp:
+    """
+    A p2p app the mesh can run on its nodes.
+
+    `args` are passed to every node. The port flags are formatted with
+    the node's ports (`{port}`), and `bootstrap_flag` with the multiaddr
+    of every bootstrap node (`{addr}`). The app's REST API has to serve
+    `/info` for the mesh to find the bootstrap multiaddrs.
+    """
+
+    args: list[str]
+    rest_port_flag: str
+    metrics_port_flag: str
+    bootstrap_flag: str
+
+    def command(
+        self,
+        rest_port: int,
+        metrics_port: int,
+        bootstrap_multiaddrs: list[str] | None = None,
+    ) -> list[str]:
+        command = [
+            *self.args,
+            self.rest_port_flag.format(port=rest_port),
+            self.metrics_port_flag.format(port=metrics_port),
+        ]
+        for addr in bootstrap_multiaddrs or []:
+            if addr:
+                command.append(self.bootstrap_flag.format(addr=addr))
+        return command
+
+
+NWAKU_APP = NodeApp(
+    args=[
+        "--listen-address=0.0.0.0",
+        "--rest=true",
+        "--rest-admin=true",
+        "--rest-address=0.0.0.0",
+        "--metrics-server=true",
+        "--metrics-server-address=0.0.0.0",
+    ],
+    rest_port_flag="--rest-port={port}",
+    metrics_port_flag="--metrics-server-port={port}",
+    bootstrap_flag="--staticnode={addr}",
+)
+
+
+@dataclass
+class Teardown:
+    """
+    How the nodes of a mesh are torn down.
+
+    With `graceful`, each node is asked to stop and is only killed after
+    `stop_timeout_s`. Otherwise it is killed and removed right away,
+    which is all a run that already collected its data needs: Docker's
+    graceful stop alone takes up to 10s per container. At most
+    `max_workers` nodes are torn down at the same time, so hundreds of
+    nodes don't flood the Docker daemon.
+    """
+
+    graceful: bool = False
+    stop_timeout_s: float = DEFAULT_STOP_TIMEOUT_S
+    max_workers: int = DEFAULT_TEARDOWN_MAX_WORKERS
+
+
+@dataclass
+class NodeContainer:
+    """
+    Holds state for a running node.
+
+    `handle` is whatever the runtime runs the node with (a Docker
+    container, a process...). The node's APIs are reachable from the
+    host at `api_host`, and `ip_address` is its address in the mesh
+    network, if known.
+    """
+
+    id: str
+    handle: Any
+    rest_port: int
+    metrics_port: int
+    runtime: "NodeRuntime" = field(repr=False)
+    api_host: str = "localhost"
+    ip_address: str | None = None
+
+    def cleanup(self, teardown: Teardown | None = None):
+        self.runtime.stop_node(self, teardown or Teardown())
+
+    def pause(self):
+        self.runtime.pause_node(self)
+
+    def unpause(self):
+        self.runtime.unpause_node(self)
+
+    def logs(self) -> Iterator[bytes]:
+        return self.runtime.logs(self)
+
+
+class NodeRuntime(ABC):
+    """
+    Backend running the nodes of a `Mesh`.
+
+    The mesh calls `reap`, `prepare_image` and `create_network` once,
+    then `start_node` concurrently for every node, and `stop_node` and
+    `remove_network` on teardown.
+
+    Everything a runtime creates on the host must be findable again by
+    `reap`, e.g.: with labels or a name prefix, so the leftovers of a
+    crashed run don't pile up.
+    """
+
+    @property
+    def image_id(self) -> str | None:
+        """Identifies the exact app build the nodes run, if known."""
+        return None
+
+    @property
+    def bridge_interface(self) -> str | None:
+        """
+        The host interface every frame between two nodes goes through
+        (e.g.: to capture per-link traffic, see `mesh.capture`), if any.
+        """
+        return None
+
+    @abstractmethod
+    def prepare_image(self):
+        """Makes sure the app can be run (e.g.: pulls the image)."""
+
+    @abstractmethod
+    def reap(self) -> int:
+        """
+        Removes the leftovers (nodes, networks...) of runs whose process
+        is gone. Returns how many resources were removed.
+        """
+
+    @abstractmethod
+    def create_network(self, session_id: str):
+        """
+        Creates the network all nodes are attached to. Everything created
+        from now on belongs to the mesh session `session_id`.
+        """
+
+    @abstractmethod
+    def remove_network(self):
+        pass
+
+    @abstractmethod
+    def start_node(
+        self,
+        name: str,
+        command: list[str],
+        ports: list[int],
+        resources: NodeResources | None = None,
+    ) -> NodeContainer:
+        """
+        Starts the app with `command`, exposing `ports` (rest, metrics) to
+        the host, limited to `resources` (unlimited by default).
+        """
+
+    @abstractmethod
+    def stop_node(self, node: NodeContainer, teardown: Teardown):
+        """Stops the node as set by `teardown` and frees everything it was using."""
+
+    @abstractmethod
+    def pause_node(self, node: NodeContainer):
+        pass
+
+    @abstractmethod
+    def unpause_node(self, node: NodeContainer):
+        pass
+
+    @abstractmethod
+    def logs(self, node: NodeContainer) -> Iterator[bytes]:
+        """
+        Follows the node's output from its first line. The returned
+        stream must have a `close()` that unblocks readers.
+        """
+
+    @abstractmethod
+    def memory_bytes(self, node: NodeContainer) -> int:
+        """Returns the memory currently used by the node."""
+
+
+class DockerRuntime(NodeRuntime):
+    """Runs every node in its own container, attached to a Docker network."""
+
+    def __init__(self, image_name: str, pull_image: bool = True):
+        """
+        `image_name` may be a tag, a pinned digest (`repo@sha256:...`) or an
+        image id. With `pull_image=False` the image must already be in the
+        local Docker image store and no network access is needed.
+        """
+        self._image_name = image_name
+        self._pull_image = pull_image
+        self._client = docker.from_env()
+        self._image: Image | None = None
+        self._network: Network | None = None
+        self._labels: dict[str, str] = {}
+
+    @property
+    def image_id(self) -> str | None:
+        return self._image.id if self._image else None
+
+    @property
+    def bridge_interface(self) -> str | None:
+        if not self._network or not self._network.id:
+            return None
+        options = self._network.attrs.get("Options") or {}
+        # Docker names the bridge of a user network after the network's id
+        return options.get(
+            "com.docker.network.bridge.name", f"br-{self._network.id[:12]}"
+        )
+
+    def prepare_image(self):
+        if self._pull_image:
+            self._image = pull_docker_image(self._client, self._image_name)
+        else:
+            self._image = get_local_docker_image(self._client, self._image_name)
+
+    def reap(self) -> int:
+        orphans = [
+            container
+            for container in self._client.containers.list(
+                all=True, filters={"label": SESSION_LABEL}
+            )
+            if _is_orphan(container.labels)
+        ]
+        if orphans:
+            logger.warning(f"Removing {len(orphans)} containers left by crashed runs")
+            with ThreadPoolExecutor(max_workers=REAP_MAX_WORKERS) as executor:
+                list(executor.map(_force_remove, orphans))
+
+        networks = [
+            network
+            for network in self._client.networks.list(filters={"label": SESSION_LABEL})
+            if _is_orphan(network.attrs.get("Labels") or {})
+        ]
+        for network in networks:
+            try:
+                network.remove()
+                logger.warning(f"Removed network left by a crashed run: {network.name}")
+            except errors.APIError as e:
+                logger.error(f"Error removing orphan network {network.name}: {e}")
+
+        return len(orphans) + len(networks)
+
+    def create_network(self, session_id: str):
+        self._labels = {SESSION_LABEL: session_id, **_owner_labels()}
+        self._network = new_docker_net(self._client, DOCKER_NET_NAME, self._labels)
+
+    def remove_network(self):
+        if not self._network:
+            return
+
+        try:
+            self._network.remove()
+            logger.info(f"Removed network: {self._network.name}")
+        except errors.APIError as e:
+            logger.error(f"Error removing network {self._network.name}: {e}")
+        self._network = None
+
+    def start_node(
+        self,
+        name: str,
+        command: list[str],
+        ports: list[int],
+        resources: NodeResources | None = None,
+    ) -> NodeContainer:
+        if not self._network:
+            raise ValueError("Network not initialized.")
+
+        if not self._image:
+            raise ValueError("Image not initialized.")
+
+        rest_port, metrics_port = ports
+        container = self._client.containers.run(
+            self._image,
+            command=command,
+            name=name,
+            detach=True,
+            # make node's APIs accessible to host, and therefore to this script'
+            ports={f"{port}/tcp": port for port in ports},
+            network=self._network.name,
+            labels=self._labels,
+            **_resource_options(resources or NodeResources()),
+        )
+        # the address is only assigned once the container is attached
+        container.reload()
+        networks = container.attrs["NetworkSettings"]["Networks"]
+        ip_address = networks.get(self._network.name, {}).get("IPAddress") or None
+        return NodeContainer(
+            name, container, rest_port, metrics_port, self, ip_address=ip_address
+        )
+
+    def stop_node(self, node: NodeContainer, teardown: Teardown):
+        container = node.handle
+        try:
+            if teardown.graceful:
+                container.stop(timeout=int(teardown.stop_timeout_s))
+                container.remove()
+            else:
+                # SIGKILL and removal in a single API call
+                container.remove(force=True)
+            logger.info(f"Stopped and removed container: {container.name}")
+        except errors.NotFound:
+            logger.warning(
+                f"Container {container.name} not found for cleanup, already removed."
+            )
+        except Exception as e:
+            logger.error(f"Error cleaning up container {container.name}: {e}")
+
+    def pause_node(self, node: NodeContainer):
+        node.handle.pause()
+
+    def unpause_node(self, node: NodeContainer):
+        node.handle.unpause()
+
+    def logs(self, node: NodeContainer) -> Iterator[bytes]:
+        return node.handle.logs(stream=True, follow=True)
+
+    def memory_bytes(self, node: NodeContainer) -> int:
+        memory_stats = node.handle.stats(stream=False)["memory_stats"]
+        # same as `docker stats`: page cache that can be reclaimed isn't counted
+        inactive_file = memory_stats.get("stats", {}).get("inactive_file", 0)
+        return memory_stats.get("usage", 0) - inactive_file
+
+
+def _resource_options(resources: NodeResources) -> dict[str, Any]:
+    """Docker's options for `resources`, unset ones are left out."""
+    options: dict[str, Any] = {}
+    if resources.cpuset is not None:
+        options["cpuset_cpus"] = ",".join(str(core) for core in resources.cpuset)
+    if resources.cpus is not None:
+        options["nano_cpus"] = int(resources.cpus * 1e9)
+    if resources.memory_bytes is not None:
+        # the same limit with swap included: no swap
+        options["mem_limit"] = resources.memory_bytes
+        options["memswap_limit"] = resources.memory_bytes
+    return options
+
+
+def _process_start_time(pid: int) -> float | None:
+    """Unix time the process `pid` started, None if unknown (e.g.: not on Linux)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+        with open("/proc/stat") as f:
+            boot_time = next(line for line in f if line.startswith("btime"))
+    except (OSError, StopIteration):
+        return None
+    # the command name may hold spaces, the fields after it don't: the
+    # start time (in ticks since boot) is the 22nd field
+    start_ticks = int(stat.rsplit(")", 1)[1].split()[19])
+    return int(boot_time.split()[1]) + start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def _owner_labels() -> dict[str, str]:
+    """Labels telling this process apart, for `_is_orphan`."""
+    labels = {OWNER_PID_LABEL: str(os.getpid())}
+    start = _process_start_time(os.getpid())
+    if start is not None:
+        labels[OWNER_START_LABEL] = f"{start:.0f}"
+    return labels
+
+
+def _is_orphan(labels: dict[str, str]) -> bool:
+    """
+    Whether the process that created a labelled resource is gone: its pid
+    isn't alive, or is now another process' (started at another time).
+    """
+    try:
+        pid = int(labels.get(OWNER_PID_LABEL, ""))
+    except ValueError:
+        return True
+    if pid <= 0:
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass  # alive, run by another user
+
+    if not labels.get(OWNER_START_LABEL):
+        return False
+    start = _process_start_time(pid)
+    try:
+        owner_start = float(labels[OWNER_START_LABEL])
+    except ValueError:
+        return True
+    return start is not None and abs(start - owner_start) > OWNER_START_TOLERANCE_S
+
+
+def _force_remove(container):
+    try:
+        container.remove(force=True)
+    except errors.NotFound:
+        pass
+    except errors.APIError as e:
+        logger.error(f"Error removing orphan container {container.name}: {e}")
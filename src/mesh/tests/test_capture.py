@@ -0,0 +1,55 @@
+import socket
+import struct
+
+from mesh.capture import LinkAggregator, parse_frame
+
+
+def _tcp_frame(src: str, dst: str, payload_bytes: int, snaplen: int = 128) -> bytes:
+    """An Ethernet/IPv4/TCP frame, truncated like a header snapshot."""
+    ip_header = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,  # IPv4, 20 byte header
+        0,
+        20 + 32 + payload_bytes,
+        0,
+        0,
+        64,
+        6,  # TCP
+        0,
+        socket.inet_aton(src),
+        socket.inet_aton(dst),
+    )
+    tcp_header = struct.pack("!HHIIBBHHH", 1, 2, 0, 0, 8 << 4, 0, 0, 0, 0)
+    tcp_header += b"\0" * 12  # options: 32 byte header
+    frame = b"\0" * 12 + b"\x08\x00" + ip_header + tcp_header + b"a" * payload_bytes
+    return frame[:snaplen]
+
+
+def test_parse_frame_gets_sizes_from_truncated_headers():
+    frame = _tcp_frame("10.0.0.2", "10.0.0.3", 1000)
+    assert len(frame) == 128
+    assert parse_frame(frame) == ("10.0.0.2", "10.0.0.3", 14 + 20 + 32 + 1000, 1000)
+
+    arp = b"\0" * 12 + b"\x08\x06" + b"\0" * 28
+    assert parse_frame(arp) is None
+
+
+def test_link_aggregator_sums_pairs_per_window():
+    aggregator = LinkAggregator({"10.0.0.2": "a", "10.0.0.3": "b"}, window_s=1.0)
+    aggregator.add(10.1, _tcp_frame("10.0.0.2", "10.0.0.3", 100))
+    aggregator.add(10.5, _tcp_frame("10.0.0.2", "10.0.0.3", 200))
+    aggregator.add(10.6, _tcp_frame("10.0.0.3", "10.0.0.2", 0))
+    # the harness polling a node through the bridge
+    aggregator.add(10.7, _tcp_frame("10.0.0.1", "10.0.0.3", 50))
+    assert aggregator.pop_closed() == []
+
+    aggregator.add(11.2, _tcp_frame("10.0.0.2", "10.0.0.3", 100))
+    closed = {(r["src"], r["dst"]): r for r in aggregator.pop_closed()}
+    assert closed[("a", "b")]["window_start"] == 10.0
+    assert closed[("a", "b")]["payload_bytes"] == 300
+    assert closed[("a", "b")]["packets"] == 2
+    assert closed[("b", "a")]["bytes"] == 14 + 20 + 32
+    assert aggregator.unmapped_bytes == 14 + 20 + 32 + 50
+
+    (last,) = aggregator.pop_closed(flush=True)
+    assert last["window_start"] == 11.0 and last["payload_bytes"] == 100
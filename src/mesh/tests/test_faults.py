@@ -0,0 +1,42 @@
+from typing import cast
+
+import pytest
+
+from mesh.faults import PARTITION_RULE_PREFIX, FaultError, NetworkPartition
+from mesh.runtime import NodeContainer, NodeRuntime
+
+
+def _node(node_id: str, ip_address: str | None) -> NodeContainer:
+    return NodeContainer(
+        node_id,
+        None,
+        8645,
+        8008,
+        runtime=cast(NodeRuntime, None),
+        ip_address=ip_address,
+    )
+
+
+def test_partition_drops_both_directions_and_heals_what_it_added():
+    calls = []
+    group = [_node("node-0", "10.0.0.2")]
+    rest = [_node("node-1", "10.0.0.3"), _node("node-2", "10.0.0.4")]
+
+    with NetworkPartition(group, rest, run=lambda *args: calls.append(args)):
+        assert len(calls) == 2
+    inserted, healed = calls[:2], calls[2:]
+
+    assert all(call[:3] == ("-I", "FORWARD", "1") for call in inserted)
+    assert [call[3:] for call in inserted] == [call[2:] for call in healed]
+    assert all(call[:2] == ("-D", "FORWARD") for call in healed)
+    rules = [dict(zip(call[3::2], call[4::2])) for call in inserted]
+    assert {(r["-s"], r["-d"]) for r in rules} == {
+        ("10.0.0.2", "10.0.0.3,10.0.0.4"),
+        ("10.0.0.3,10.0.0.4", "10.0.0.2"),
+    }
+    assert all(r["--comment"].startswith(PARTITION_RULE_PREFIX) for r in rules)
+
+
+def test_partition_needs_node_addresses():
+    with pytest.raises(FaultError, match="node-1"):
+        NetworkPartition([_node("node-0", "10.0.0.2")], [_node("node-1", None)])
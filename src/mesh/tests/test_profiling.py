@@ -0,0 +1,44 @@
+import pytest
+
+from mesh.profiling import Profiler, Span
+
+
+def test_span_records_duration_and_node():
+    profiler = Profiler()
+    with profiler.span("start_node", "node", node="node-0"):
+        pass
+    with pytest.raises(RuntimeError):
+        with profiler.span("failing_phase"):
+            raise RuntimeError("boom")
+
+    df = profiler.to_dataframe()
+    assert df["name"].tolist() == ["start_node", "failing_phase"]
+    assert df["node"].iloc[0] == "node-0"
+    assert df["node"].isna().iloc[1]
+    assert (df["duration_s"] >= 0).all()
+
+
+def test_chrome_trace_lanes():
+    profiler = Profiler()
+    profiler.record(Span("mesh_start", "mesh", 100.0, 102.0, thread="MainThread"))
+    profiler.record(Span("start_node", "node", 100.5, 101.0, node="node-0"))
+    profiler.record(Span("start_node", "node", 100.5, 101.5, node="node-1"))
+
+    trace = profiler.to_chrome_trace()
+    spans = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    lanes = [event for event in trace["traceEvents"] if event["ph"] == "M"]
+
+    assert [event["ts"] for event in spans] == [0.0, 500000.0, 500000.0]
+    assert spans[0]["dur"] == pytest.approx(2e6)
+    assert {event["args"]["name"] for event in lanes} == {
+        "MainThread",
+        "node-0",
+        "node-1",
+    }
+    assert len({event["tid"] for event in spans}) == 3
+
+
+def test_empty_profiler():
+    profiler = Profiler()
+    assert profiler.to_dataframe().empty
+    assert profiler.to_chrome_trace()["traceEvents"] == []
@@ -0,0 +1,52 @@
+import pytest
+
+from mesh.resources import ROLE_BOOTSTRAP, ROLE_REGULAR, NodeResources, ResourcePlan
+
+
+@pytest.fixture(autouse=True)
+def _eight_cores(monkeypatch):
+    monkeypatch.setattr("mesh.resources.host_cores", lambda: list(range(8)))
+
+
+def test_nodes_are_pinned_round_robin_off_the_harness_cores():
+    plan = ResourcePlan(harness_cores=2, pin_nodes=True, cores_per_node=2)
+
+    assert plan.harness_cpus == [0, 1]
+    assert plan.node_cores == [2, 3, 4, 5, 6, 7]
+    cpusets = [plan.for_node(f"node-{i}", ROLE_REGULAR, i).cpuset for i in range(4)]
+    assert cpusets == [[2, 3], [4, 5], [6, 7], [2, 3]]
+
+
+def test_unpinned_nodes_still_stay_off_the_harness_cores():
+    assert ResourcePlan(harness_cores=2).for_node("node-0", ROLE_REGULAR, 0) == (
+        NodeResources(cpuset=[2, 3, 4, 5, 6, 7])
+    )
+    assert ResourcePlan().for_node("node-0", ROLE_REGULAR, 0) == NodeResources()
+
+
+def test_groups_override_limits_by_role_then_node_name():
+    plan = ResourcePlan(
+        pin_nodes=True,
+        limits=NodeResources(cpus=0.5, memory_bytes=512),
+        groups={
+            ROLE_BOOTSTRAP: NodeResources(cpus=2.0),
+            "bootstrap-node-1": NodeResources(cpuset=[7], memory_bytes=1024),
+        },
+    )
+
+    assert plan.for_node("node-0", ROLE_REGULAR, 2) == NodeResources(
+        cpuset=[2], cpus=0.5, memory_bytes=512
+    )
+    assert plan.for_node("bootstrap-node-0", ROLE_BOOTSTRAP, 0) == NodeResources(
+        cpuset=[0], cpus=2.0, memory_bytes=512
+    )
+    assert plan.for_node("bootstrap-node-1", ROLE_BOOTSTRAP, 1) == NodeResources(
+        cpuset=[7], cpus=2.0, memory_bytes=1024
+    )
+
+
+def test_plan_must_leave_cores_for_the_nodes():
+    with pytest.raises(ValueError, match="none would be left"):
+        ResourcePlan(harness_cores=8)
+    with pytest.raises(ValueError, match="only 2 are left"):
+        ResourcePlan(harness_cores=6, pin_nodes=True, cores_per_node=3)
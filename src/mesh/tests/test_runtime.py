@@ -0,0 +1,147 @@
+import os
+import subprocess
+import threading
+import time
+
+from mesh.mesh import Mesh
+from mesh.runtime import (
+    NWAKU_APP,
+    OWNER_PID_LABEL,
+    OWNER_START_LABEL,
+    NodeApp,
+    NodeContainer,
+    NodeRuntime,
+    Teardown,
+    _is_orphan,
+    _owner_labels,
+    _resource_options,
+)
+from mesh.resources import ROLE_REGULAR, NodeResources, ResourcePlan
+
+
+def test_nwaku_app_command_sets_ports_and_static_nodes():
+    command = NWAKU_APP.command(8645, 8008, ["/ip4/10.0.0.2/tcp/60000/p2p/a", ""])
+    assert "--rest-port=8645" in command
+    assert "--metrics-server-port=8008" in command
+    # empty multiaddrs (e.g.: a bootstrap node that failed) are skipped
+    assert [arg for arg in command if arg.startswith("--staticnode")] == [
+        "--staticnode=/ip4/10.0.0.2/tcp/60000/p2p/a"
+    ]
+
+
+def test_custom_app_declares_its_own_port_flags():
+    app = NodeApp(
+        args=["--relay"],
+        rest_port_flag="--api-port={port}",
+        metrics_port_flag="--prometheus={port}",
+        bootstrap_flag="--peer={addr}",
+    )
+    assert app.command(1, 2, ["addr"]) == [
+        "--relay",
+        "--api-port=1",
+        "--prometheus=2",
+        "--peer=addr",
+    ]
+
+
+class _FakeRuntime(NodeRuntime):
+    def __init__(self):
+        self.stopped: list[tuple[str, Teardown]] = []
+        self.resources: dict[str, NodeResources | None] = {}
+        self.max_concurrent_stops = 0
+        self._stopping = 0
+        self._lock = threading.Lock()
+
+    def reap(self) -> int:
+        return 0
+
+    def prepare_image(self):
+        pass
+
+    def create_network(self, session_id: str):
+        pass
+
+    def remove_network(self):
+        pass
+
+    def start_node(self, name, command, ports, resources=None) -> NodeContainer:
+        self.resources[name] = resources
+        return NodeContainer(name, None, *ports, runtime=self)
+
+    def stop_node(self, node: NodeContainer, teardown: Teardown):
+        with self._lock:
+            self._stopping += 1
+            self.max_concurrent_stops = max(self.max_concurrent_stops, self._stopping)
+        time.sleep(0.01)
+        with self._lock:
+            self._stopping -= 1
+            self.stopped.append((node.id, teardown))
+
+    def pause_node(self, node):
+        pass
+
+    def unpause_node(self, node):
+        pass
+
+    def logs(self, node):
+        return iter([])
+
+    def memory_bytes(self, node) -> int:
+        return 0
+
+
+def test_mesh_teardown_is_bounded_and_configurable():
+    runtime = _FakeRuntime()
+    teardown = Teardown(graceful=True, max_workers=3)
+    mesh = Mesh(20, 1, runtime=runtime, teardown=teardown)
+    mesh._nodes = [runtime.start_node(f"node-{i}", [], [i, i]) for i in range(20)]
+
+    mesh.stop()
+
+    assert len(runtime.stopped) == 20
+    assert all(node_teardown is teardown for _, node_teardown in runtime.stopped)
+    assert runtime.max_concurrent_stops <= 3
+    assert mesh.all_nodes == []
+
+
+def test_only_resources_of_dead_processes_are_orphans():
+    exited = subprocess.Popen(["true"])
+    exited.wait()
+
+    assert not _is_orphan({OWNER_PID_LABEL: str(os.getpid())})
+    assert _is_orphan({OWNER_PID_LABEL: str(exited.pid)})
+    # labelled by a mesh, but with no (valid) owner
+    assert _is_orphan({})
+    assert _is_orphan({OWNER_PID_LABEL: "0"})
+
+
+def test_a_reused_pid_is_an_orphan():
+    owner = _owner_labels()
+    assert not _is_orphan(owner)
+    # same pid, but the process that labelled it started earlier (e.g.:
+    # before a reboot)
+    started_earlier = float(owner[OWNER_START_LABEL]) - 3600
+    assert _is_orphan({**owner, OWNER_START_LABEL: f"{started_earlier:.0f}"})
+
+
+def test_mesh_starts_nodes_with_their_planned_resources(monkeypatch):
+    monkeypatch.setattr("mesh.resources.host_cores", lambda: list(range(4)))
+    runtime = _FakeRuntime()
+    plan = ResourcePlan(harness_cores=1, pin_nodes=True)
+    mesh = Mesh(5, 1, runtime=runtime, resources=plan)
+
+    mesh._start_node("node-3", ROLE_REGULAR, 4, 1, 2)
+
+    assert runtime.resources["node-3"] == NodeResources(cpuset=[2])
+
+
+def test_docker_options_leave_unset_resources_out():
+    assert _resource_options(NodeResources()) == {}
+    assert _resource_options(
+        NodeResources(cpuset=[2, 3], cpus=0.5, memory_bytes=256 * 1024 * 1024)
+    ) == {
+        "cpuset_cpus": "2,3",
+        "nano_cpus": 500_000_000,
+        "mem_limit": 256 * 1024 * 1024,
+        "memswap_limit": 256 * 1024 * 1024,
+    }
@@ -8,7 +8,9 @@ from docker.models.images import Image
 from docker.models.networks import Network
 
 
-def new_docker_net(client: docker.DockerClient, name: str) -> Network:
+def new_docker_net(
+    client: docker.DockerClient, name: str, labels: dict[str, str] | None = None
+) -> Network:
     try:
         existing_network = client.networks.get(name)
         logging.info(f"Removing existing network: {name}")
@@ -17,7 +19,7 @@ def new_docker_net(client: docker.DockerClient, name: str) -> Network:
         pass
 
     logging.info(f"Creating Docker network: {name}")
-    return client.networks.create(name, driver="bridge")
+    return client.networks.create(name, driver="bridge", labels=labels)
 
 
 def pull_docker_image(client: docker.DockerClient, image_name: str) -> Image | None:
@@ -30,6 +32,49 @@ def pull_docker_image(client: docker.DockerClient, image_name: str) -> Image | N
         return None
 
 
+def get_local_docker_image(
+    client: docker.DockerClient, image_name: str
+) -> Image | None:
+    """
+    Gets an image from the local Docker image store, without any network access.
+
+    `image_name` can be a tag (`repo:tag`), a digest (`repo@sha256:...`) or
+    an image id. Images have to be preloaded (e.g.: `docker pull` or
+    `docker load`) before running offline.
+    """
+    try:
+        image = client.images.get(image_name)
+        print(f"Using local image {image_name} ({image.id})")
+        return image
+    except errors.ImageNotFound:
+        print(
+            f"Image {image_name} not found in the local image store, "
+            "preload it with `docker pull` or `docker load`"
+        )
+        return None
+
+
+def resolve_image_digest(client: docker.DockerClient, image_name: str) -> str:
+    """
+    Pins a local image to an immutable reference.
+
+    Returns the repo digest (`repo@sha256:...`) of the image if it was
+    pulled from a registry, otherwise its image id (e.g.: images created
+    with `docker load`). Both can be used as image names afterwards.
+    """
+    image = client.images.get(image_name)
+    repo = image_name.split("@", 1)[0]
+    name, _, tag = repo.rpartition(":")
+    if name and "/" not in tag:  # strip the tag, not a registry port
+        repo = name
+
+    for repo_digest in image.attrs.get("RepoDigests", []):
+        if repo_digest.split("@", 1)[0] == repo:
+            return repo_digest
+
+    return image.id or image_name
+
+
 def get_free_ports(num: int) -> list[int]:
     """Finds a specified number of free TCP ports on the host."""
     # TODO: analyze if that is reliable
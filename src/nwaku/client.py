@@ -1,9 +1,11 @@
 import base64
 import functools
+import threading
 import urllib.parse
 import logging
 import time
-from typing import Any
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Protocol, TypeVar
 
 import requests
 
@@ -15,24 +17,176 @@ class WakuClientException(Exception):
     pass
 
 
-def with_retry(attempts: int = 10, delay: float = 1.0):
-    def decorator(func):
+class CircuitOpenError(WakuClientException):
+    """Raised, without sending anything, while a node's circuit breaker is open."""
+
+
+# Consecutive failed requests before a node's circuit opens
+BREAKER_FAILURE_THRESHOLD = 3
+# Time an open circuit fails fast before a probe request is let through
+BREAKER_RESET_TIMEOUT_S = 5.0
+# Requests (original + hedge) in flight at the same time, per client
+HEDGE_MAX_WORKERS = 8
+
+R = TypeVar("R")
+R_co = TypeVar("R_co", covariant=True)
+
+
+class CircuitBreaker:
+    """
+    Fails fast on a node that stopped answering.
+
+    After `failure_threshold` consecutive failed requests the circuit
+    opens: calls fail right away with `CircuitOpenError` instead of
+    waiting for timeouts and retries. After `reset_timeout_s` a single
+    request is let through as a probe: the circuit closes if it
+    succeeds, and stays open for another `reset_timeout_s` otherwise.
+
+    Only transport failures (connection errors, timeouts) count: an
+    HTTP error status means the node is up and answering.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout_s: float = BREAKER_RESET_TIMEOUT_S,
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout_s = reset_timeout_s
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Returns whether a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing:
+                return False
+            if time.monotonic() - self._opened_at < self._reset_timeout_s:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self._failure_threshold:
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class Request(Protocol[R_co]):
+    """A request decorated by `with_retry`: it takes `attempts` and `deadline_s`."""
+
+    def __call__(
+        self,
+        *args: Any,
+        attempts: int = ...,
+        deadline_s: float | None = ...,
+        **kwargs: Any,
+    ) -> R_co: ...
+
+
+def with_retry(
+    attempts: int = 10, delay: float = 1.0
+) -> Callable[[Callable[..., R]], Request[R]]:
+    """
+    Retries the decorated request on failure.
+
+    The number of attempts can be overridden per call with the `attempts`
+    keyword argument (e.g.: `attempts=1` to fail on the first error).
+
+    A `deadline_s` keyword argument caps the whole call, retries and
+    timeouts included: each attempt's timeout is cut to the time left,
+    and no retry is started once it would end past the deadline.
+
+    The decorated method takes the `timeout` of each attempt as a
+    keyword argument; it's filled in here, callers don't pass it.
+
+    If the client has a `breaker`, calls fail fast with
+    `CircuitOpenError` while it is open.
+    """
+
+    def decorator(func: Callable[..., R]) -> Request[R]:
         @functools.wraps(func)
-        def wrapper(self, *args, **kwargs):
+        def wrapper(
+            self,
+            *args,
+            attempts: int = attempts,
+            deadline_s: float | None = None,
+            **kwargs,
+        ) -> R:
+            deadline = None if deadline_s is None else time.monotonic() + deadline_s
             last_exception = None
+            tried = 0
             for i in range(attempts):
+                timeout = self.timeout
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        break
+                if self.breaker and not self.breaker.allow():
+                    raise CircuitOpenError(
+                        f"Request {func.__name__} not sent, circuit open for "
+                        f"{self.base_url}"
+                    ) from last_exception
+
+                tried += 1
                 try:
-                    return func(self, *args, **kwargs)
+                    result = func(self, *args, timeout=timeout, **kwargs)
                 except (
                     requests.exceptions.RequestException,
                     WakuClientException,
                 ) as e:
                     logger.debug(f"Attempt {i + 1} failed: {e}")
                     last_exception = e
+                    if self.breaker:
+                        if isinstance(e, requests.exceptions.RequestException):
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.record_success()
+                        if self.breaker.is_open:
+                            # no point in retrying until it's probed again
+                            raise CircuitOpenError(
+                                f"Request {func.__name__} failed and opened the "
+                                f"circuit for {self.base_url}: {e}"
+                            ) from e
                     if i < attempts - 1:
+                        if (
+                            deadline is not None
+                            and time.monotonic() + delay >= deadline
+                        ):
+                            break
                         time.sleep(delay)
+                    continue
+                except BaseException:
+                    # neither a transport failure nor an answer (e.g.: the
+                    # hedge executor was shut down): the probe, if this
+                    # was one, must still end, or the circuit never closes
+                    if self.breaker:
+                        self.breaker.record_failure()
+                    raise
+
+                if self.breaker:
+                    self.breaker.record_success()
+                return result
+
             raise WakuClientException(
-                f"Request {func.__name__} failed after {attempts} attempts: {last_exception}"
+                f"Request {func.__name__} failed after {tried} attempts: {last_exception}"
             ) from last_exception
 
         return wrapper
@@ -43,6 +197,15 @@ def with_retry(attempts: int = 10, delay: float = 1.0):
 class WakuClient:
     """
     A HTTP client for a NWaku node's REST API and metrics API.
+
+    `breaker` (a `CircuitBreaker`) makes calls fail fast once the node
+    stopped answering; it can also be set later, e.g.: once the node is
+    known to be up, so that its startup doesn't open the circuit.
+
+    With `hedge_after_s`, the idempotent GETs (`get_info`, `get_metrics`)
+    are sent a second time if the first request didn't answer within
+    that delay, and the first answer wins. It trades a bit of load for tail latency on a node that
+    is slow only now and then.
     """
 
     def __init__(
@@ -51,17 +214,28 @@ class WakuClient:
         rest_port: int,
         metrics_port: int,
         timeout: int = 10,
+        breaker: CircuitBreaker | None = None,
+        hedge_after_s: float | None = None,
     ):
         self.base_url = f"http://{ip_address}:{rest_port}"
         self.metrics_url = f"http://{ip_address}:{metrics_port}/metrics"
         self.session = requests.Session()
         self.timeout = timeout
+        self.breaker = breaker
+        self.hedge_after_s = hedge_after_s
+        self._hedge_executor = (
+            ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS)
+            if hedge_after_s is not None
+            else None
+        )
         logger.debug(
             f"WakuClient initialized for REST API at {self.base_url} "
             f"and metrics at {self.metrics_url}"
         )
 
     def close(self):
+        if self._hedge_executor:
+            self._hedge_executor.shutdown(wait=False, cancel_futures=True)
         self.session.close()
 
     def __enter__(self):
@@ -80,30 +254,80 @@ class WakuClient:
             logger.error(f"Response body: {e.response.text}")
             raise WakuClientException(f"HTTP Error: {e}") from e
 
+    def _get(
+        self, url: str, headers: dict[str, str], timeout: float
+    ) -> requests.Response:
+        """
+        GET, hedged after `hedge_after_s` if enabled. Only for idempotent
+        requests: the answer of the losing request is thrown away.
+        """
+        hedge_after_s = self.hedge_after_s
+        if (
+            self._hedge_executor is None
+            or hedge_after_s is None
+            or timeout <= hedge_after_s
+        ):
+            return self.session.get(url, headers=headers, timeout=timeout)
+
+        sent_at = time.monotonic()
+        pending = {
+            self._hedge_executor.submit(
+                self.session.get, url, headers=headers, timeout=timeout
+            )
+        }
+        done, pending = wait(pending, timeout=hedge_after_s)
+        if not done:
+            logger.debug(f"Hedging GET {url} after {hedge_after_s}s")
+            pending.add(
+                self._hedge_executor.submit(
+                    self.session.get,
+                    url,
+                    headers=headers,
+                    timeout=timeout - (time.monotonic() - sent_at),
+                )
+            )
+
+        error: BaseException | None = None
+        while done or pending:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        if error is None:
+            raise WakuClientException(f"GET {url} got no answer")
+        raise error
+
     @with_retry()
-    def get_info(self) -> dict[str, Any]:
+    def get_info(self, *, timeout: float) -> dict[str, Any]:
         """
         GET /info.
         """
         url = f"{self.base_url}/info"
         headers = {"accept": "application/json"}
-        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response = self._get(url, headers, timeout)
         return self._handle_response(response).json()
 
     @with_retry()
-    def subscribe_to_pubsub_topic(self, pubsub_topics: list[str]) -> requests.Response:
+    def subscribe_to_pubsub_topic(
+        self, pubsub_topics: list[str], *, timeout: float
+    ) -> requests.Response:
         """
         POST /relay/v1/subscriptions.
         """
         url = f"{self.base_url}/relay/v1/subscriptions"
         headers = {"accept": "text/plain", "content-type": "application/json"}
         response = self.session.post(
-            url, headers=headers, json=pubsub_topics, timeout=self.timeout
+            url, headers=headers, json=pubsub_topics, timeout=timeout
         )
         return self._handle_response(response)
 
     @with_retry()
-    def publish_message(self, topic: str, message: dict[str, Any]) -> requests.Response:
+    def publish_message(
+        self, topic: str, message: dict[str, Any], *, timeout: float
+    ) -> requests.Response:
         """
         POST /relay/v1/messages/{pubsubTopic}.
         """
@@ -111,30 +335,31 @@ class WakuClient:
         url = f"{self.base_url}/relay/v1/messages/{encoded_topic}"
         headers = {"content-type": "application/json"}
         response = self.session.post(
-            url, headers=headers, json=message, timeout=self.timeout
+            url, headers=headers, json=message, timeout=timeout
         )
         return self._handle_response(response)
 
     @with_retry()
-    def get_messages(self, topic: str) -> list[dict[str, Any]]:
+    def get_messages(self, topic: str, *, timeout: float) -> list[dict[str, Any]]:
         """
         GET /relay/v1/messages/{pubsubTopic}.
+
+        Never hedged: the node empties its message cache on every call,
+        so the messages of a thrown away answer would be lost.
         """
         encoded_topic = urllib.parse.quote_plus(topic)
         url = f"{self.base_url}/relay/v1/messages/{encoded_topic}"
         headers = {"accept": "application/json"}
-        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response = self.session.get(url, headers=headers, timeout=timeout)
         return self._handle_response(response).json()
 
     @with_retry(attempts=3, delay=0.5)
-    def get_metrics(self) -> str:
+    def get_metrics(self, *, timeout: float) -> str:
         """
         GET /metrics
         """
         headers = {"accept": "text/plain"}
-        response = self.session.get(
-            self.metrics_url, headers=headers, timeout=self.timeout
-        )
+        response = self._get(self.metrics_url, headers, timeout)
         return self._handle_response(response).text
 
 
@@ -159,7 +384,16 @@ def create_waku_message(
     return message
 
 
-def scrape_metrics(metrics_raw: str, metric_name: str) -> list[dict]:
+def parse_metrics(
+    metrics_raw: str, name_filter: Callable[[str], bool] | None = None
+) -> list[dict]:
+    """
+    Parses the samples of a Prometheus text exposition.
+
+    Each sample is returned as `{"name": ..., "labels": {...}, "value": ...}`.
+    If `name_filter` is given, only samples whose metric name passes the
+    filter are parsed.
+    """
     parsed_results = []
     for line in metrics_raw.splitlines():
         if line.startswith("#") or not line.strip():
@@ -172,13 +406,15 @@ def scrape_metrics(metrics_raw: str, metric_name: str) -> list[dict]:
 
             brace_pos = name_part.find("{")
             if brace_pos == -1:  # Metric has no labels
-                if name_part == metric_name:
-                    parsed_results.append({"labels": {}, "value": value})
+                if name_part and (name_filter is None or name_filter(name_part)):
+                    parsed_results.append(
+                        {"name": name_part, "labels": {}, "value": value}
+                    )
             else:
                 # Metric has labels
                 # Check if the part before the brace is our metric
                 actual_name = name_part[:brace_pos]
-                if actual_name == metric_name:
+                if actual_name and (name_filter is None or name_filter(actual_name)):
                     labels = {}
                     # Get the string inside the braces
                     label_str = name_part[brace_pos + 1 : -1]
@@ -186,10 +422,19 @@ def scrape_metrics(metrics_raw: str, metric_name: str) -> list[dict]:
                         key, val_str = pair.split("=", 1)
                         # Remove quotes from the value string
                         labels[key.strip()] = val_str.strip().strip('"')
-                    parsed_results.append({"labels": labels, "value": value})
+                    parsed_results.append(
+                        {"name": actual_name, "labels": labels, "value": value}
+                    )
         except ValueError:
             # This can happen if rsplit fails or float conversion fails.
             # We can safely ignore these lines.
             logger.debug(f"Could not parse metric line: '{line}'")
             continue
     return parsed_results
+
+
+def scrape_metrics(metrics_raw: str, metric_name: str) -> list[dict]:
+    return [
+        {"labels": metric["labels"], "value": metric["value"]}
+        for metric in parse_metrics(metrics_raw, lambda name: name == metric_name)
+    ]
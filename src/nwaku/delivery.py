@@ -0,0 +1,221 @@
+import base64
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import pandas as pd
+
+from .client import WakuClient, WakuClientException, create_waku_message
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DELIVERY_ID_PREFIX = "delivery-id:"
+DEFAULT_POLL_INTERVAL_S = 0.1
+
+
+def decode_delivery_id(message: dict[str, Any]) -> str | None:
+    """Returns the delivery id carried in a received message's `meta` field."""
+    meta = message.get("meta")
+    if not meta:
+        return None
+
+    try:
+        decoded = base64.b64decode(meta).decode("utf-8")
+    except ValueError:
+        return None
+
+    if not decoded.startswith(DELIVERY_ID_PREFIX):
+        return None
+    return decoded[len(DELIVERY_ID_PREFIX) :]
+
+
+class DeliveryTracker:
+    """
+    Tracks which nodes received which published messages, and when.
+
+    Every message published through the tracker carries a unique id in
+    its `meta` field. A background thread polls
+    `GET /relay/v1/messages/{pubsubTopic}` on all nodes concurrently
+    (nwaku returns the messages received since the previous call) and
+    records the first time each node saw each id.
+
+    The delay resolution is bounded by `poll_interval_s`, and bursts
+    bigger than nwaku's per topic message cache between two polls can be
+    missed (they show up as undelivered).
+
+    `on_publish` and `on_delivery` (called with the delay of every new
+    delivery) let live consumers follow the counters while tracking.
+    """
+
+    def __init__(
+        self,
+        waku_clients: Dict[str, WakuClient],
+        pubsub_topic: str,
+        poll_interval_s: float = DEFAULT_POLL_INTERVAL_S,
+        on_publish: Callable[[], None] | None = None,
+        on_delivery: Callable[[float], None] | None = None,
+    ):
+        self._waku_clients = waku_clients
+        self._pubsub_topic = pubsub_topic
+        self._poll_interval_s = poll_interval_s
+        self._on_publish = on_publish
+        self._on_delivery = on_delivery
+        self._lock = threading.Lock()
+        # delivery id -> (publisher node id, publish timestamp)
+        self._published: dict[str, tuple[str, float]] = {}
+        # (delivery id, receiver node id) -> first seen timestamp
+        self._received: dict[tuple[str, str], float] = {}
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        # drop whatever the nodes received before tracking started
+        self._poll_once()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def publish(
+        self,
+        node_id: str,
+        payload: str,
+        content_topic: str,
+        attempts: int | None = None,
+    ):
+        """
+        Publishes a tracked message from `node_id`. `attempts` overrides
+        the client's retries, e.g.: `attempts=1` for open-loop traffic,
+        where a retried publish would be late and hold a worker up.
+        """
+        retry = {} if attempts is None else {"attempts": attempts}
+        delivery_id = uuid.uuid4().hex
+        message = create_waku_message(
+            payload=payload,
+            content_topic=content_topic,
+            meta=f"{DELIVERY_ID_PREFIX}{delivery_id}",
+        )
+        # registered before publishing: a node may relay it, and the
+        # poller see it, before the publish call returns
+        with self._lock:
+            self._published[delivery_id] = (node_id, time.time())
+        try:
+            self._waku_clients[node_id].publish_message(
+                self._pubsub_topic, message, **retry
+            )
+        except BaseException:
+            with self._lock:
+                del self._published[delivery_id]
+            raise
+        if self._on_publish:
+            self._on_publish()
+
+    def pending(self) -> int:
+        """Returns how many (message, receiver) deliveries are still missing."""
+        num_receivers = len(self._waku_clients) - 1
+        with self._lock:
+            num_delivered = sum(
+                1
+                for delivery_id, receiver in self._received
+                if delivery_id in self._published
+                and self._published[delivery_id][0] != receiver
+            )
+            return len(self._published) * num_receivers - num_delivered
+
+    def wait_for_delivery(self, timeout_s: float) -> bool:
+        """
+        Waits until every node other than the publisher received every
+        published message. Returns False if `timeout_s` runs out first.
+        """
+        deadline = time.monotonic() + timeout_s
+        while self.pending() > 0:
+            if time.monotonic() >= deadline:
+                logger.warning(f"{self.pending()} deliveries missing after timeout")
+                return False
+            time.sleep(self._poll_interval_s)
+        return True
+
+    def delivery_ratio(self) -> float:
+        num_expected = len(self._published) * (len(self._waku_clients) - 1)
+        if num_expected == 0:
+            return 1.0
+        return 1.0 - self.pending() / num_expected
+
+    def delays_df(self) -> pd.DataFrame:
+        """
+        Returns one row per expected delivery. Undelivered messages have
+        no `received_at` and `delay_s`.
+        """
+        with self._lock:
+            published = dict(self._published)
+            received = dict(self._received)
+
+        records = []
+        for delivery_id, (publisher, published_at) in published.items():
+            for receiver in self._waku_clients:
+                if receiver == publisher:
+                    continue
+                received_at = received.get((delivery_id, receiver))
+                records.append(
+                    {
+                        "delivery_id": delivery_id,
+                        "publisher": publisher,
+                        "receiver": receiver,
+                        "published_at": published_at,
+                        "received_at": received_at,
+                        "delay_s": (
+                            received_at - published_at
+                            if received_at is not None
+                            else None
+                        ),
+                    }
+                )
+        return pd.DataFrame(records)
+
+    def _poll(self):
+        while not self._stop_event.wait(self._poll_interval_s):
+            self._poll_once()
+
+    def _poll_once(self):
+        def _poll_single_node(node_info: tuple[str, WakuClient]):
+            node_id, waku_client = node_info
+            try:
+                messages = waku_client.get_messages(self._pubsub_topic, attempts=1)
+            except WakuClientException as e:
+                logger.debug(f"Error polling messages of {node_id}: {e}")
+                return
+
+            seen_at = time.time()
+            delays = []
+            with self._lock:
+                for message in messages:
+                    delivery_id = decode_delivery_id(message)
+                    if delivery_id is None or (delivery_id, node_id) in self._received:
+                        continue
+                    self._received[(delivery_id, node_id)] = seen_at
+                    published = self._published.get(delivery_id)
+                    if published is not None and published[0] != node_id:
+                        delays.append(seen_at - published[1])
+
+            if self._on_delivery:
+                for delay in delays:
+                    self._on_delivery(delay)
+
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(_poll_single_node, self._waku_clients.items()))
@@ -0,0 +1,258 @@
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# e.g.: `INF 2025-07-09 14:00:09.998+00:00 relay mounted successfully topics="waku node" tid=1 file=waku_node.nim:469`
+LOG_LINE_RE = re.compile(
+    r"^(?P<level>TRC|DBG|INF|NTC|WRN|ERR|FTL) "
+    r"(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+[+-]\d{2}:\d{2}) "
+    r"(?P<rest>.*)$"
+)
+LOG_FIELD_RE = re.compile(r'(?:^|\s)([A-Za-z_]\w*)=("(?:[^"\\]|\\.)*"|\S*)')
+
+ERROR_LEVELS = {"ERR", "FTL"}
+
+# Startup phases, in the order nwaku goes through them
+STARTUP_PHASES = {
+    "REST service started": "rest_started",
+    "Initializing networking": "networking_initialized",
+    "relay mounted successfully": "relay_mounted",
+    "relay started successfully": "relay_started",
+    "Node started successfully": "node_started",
+    "REST services are installed": "rest_installed",
+    "Metrics HTTP server started": "metrics_started",
+    "Node setup complete": "setup_complete",
+}
+
+# Field of the peer manager's periodic `Relay peer connections` report
+# (INFO level), e.g.: `totalConnections=1/50` (connections/max)
+TOTAL_CONNECTIONS_FIELD = "totalConnections"
+
+
+@dataclass
+class LogEvent:
+    """A single parsed nwaku log line."""
+
+    node: str
+    timestamp: float  # unix seconds, same clock as the metric samples
+    level: str
+    kind: str
+    message: str
+    topics: str | None = None
+    file: str | None = None
+    fields: dict[str, str] = field(default_factory=dict)
+
+
+def classify_event(level: str, message: str) -> str:
+    """Returns the kind of event a log message describes."""
+    if message in STARTUP_PHASES:
+        return STARTUP_PHASES[message]
+
+    lowered = message.lower()
+    if lowered.startswith("received relay message"):
+        return "message_received"
+    if lowered.startswith("relay peer connections"):
+        return "peer_connections"
+    if level in ERROR_LEVELS:
+        return "error"
+    return "other"
+
+
+def parse_log_line(node: str, line: str) -> LogEvent | None:
+    """
+    Parses a nwaku log line.
+
+    Returns None for lines not following the nwaku log format (e.g.: the
+    continuation of a multi-line message).
+    """
+    match = LOG_LINE_RE.match(line.rstrip("\r\n"))
+    if not match:
+        return None
+
+    try:
+        timestamp = datetime.fromisoformat(match["timestamp"]).timestamp()
+    except ValueError:
+        logger.debug(f"Could not parse log timestamp: '{line}'")
+        return None
+
+    rest = match["rest"]
+    fields = {}
+    message_end = len(rest)
+    for field_match in LOG_FIELD_RE.finditer(rest):
+        message_end = min(message_end, field_match.start())
+        value = field_match.group(2)
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            value = value[1:-1].replace('\\"', '"')
+        fields[field_match.group(1)] = value
+
+    message = rest[:message_end].strip()
+    level = match["level"]
+    return LogEvent(
+        node=node,
+        timestamp=timestamp,
+        level=level,
+        kind=classify_event(level, message),
+        message=message,
+        topics=fields.pop("topics", None),
+        file=fields.pop("file", None),
+        fields=fields,
+    )
+
+
+class LogStreamParser:
+    """
+    Incrementally parses a node's log stream.
+
+    Chunks can split lines (and UTF-8 characters) anywhere, so the
+    incomplete tail is buffered until the next chunk arrives.
+    """
+
+    def __init__(self, node: str):
+        self._node = node
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> list[LogEvent]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        return self._parse(lines)
+
+    def flush(self) -> list[LogEvent]:
+        lines, self._buffer = [self._buffer], b""
+        return self._parse(lines)
+
+    def _parse(self, lines: list[bytes]) -> list[LogEvent]:
+        events = []
+        for line in lines:
+            event = parse_log_line(self._node, line.decode("utf-8", errors="replace"))
+            if event:
+                events.append(event)
+        return events
+
+
+def events_df(events: list[LogEvent]) -> pd.DataFrame:
+    """
+    Builds the typed event table. `fields` is serialized as JSON so the
+    table can be archived as CSV.
+    """
+    columns = ["node", "timestamp", "level", "kind", "message", "topics", "file"]
+    if not events:
+        return pd.DataFrame(columns=columns + ["fields"])
+
+    df = pd.DataFrame(
+        {
+            **{column: [getattr(e, column) for e in events] for column in columns},
+            "fields": [json.dumps(e.fields) for e in events],
+        }
+    )
+    df["level"] = df["level"].astype("category")
+    df["kind"] = df["kind"].astype("category")
+    return df.sort_values("timestamp", ignore_index=True)
+
+
+def startup_timeline(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns, per node, the seconds from its first log line to each
+    startup phase (one column per phase, NaN if not seen).
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    nodes = df.groupby("node").agg(first_line=("timestamp", "min"))
+    phases = df.loc[df["kind"].isin(list(STARTUP_PHASES.values()))]
+    timeline = phases.pivot_table(
+        index="node",
+        columns="kind",
+        values="timestamp",
+        aggfunc="min",
+        observed=True,
+    )
+    timeline = timeline.sub(nodes["first_line"], axis=0)
+    ordered = [p for p in STARTUP_PHASES.values() if p in timeline.columns]
+    return timeline.reindex(index=nodes.index).loc[:, ordered]
+
+
+def connection_churn(df: pd.DataFrame, bucket_s: float = 1.0) -> pd.DataFrame:
+    """
+    Counts, per node in `bucket_s` windows, the connections gained
+    (`peer_connected`) and lost (`peer_disconnected`).
+
+    nwaku doesn't log every connection at its default (INFO) level, but
+    its peer manager periodically reports its `totalConnections`
+    (`Relay peer connections` lines). The churn is the change between
+    consecutive reports of a node, the first one counting from 0 as the
+    logs are followed from the node's start. A peer that connects and
+    leaves between two reports isn't seen, so it is a lower bound.
+    """
+    kinds = ["peer_connected", "peer_disconnected"]
+    reports = df.loc[df["kind"] == "peer_connections"]
+    if reports.empty:
+        return pd.DataFrame(columns=["node", "bucket_start"] + kinds)
+
+    connections = [
+        json.loads(fields).get(TOTAL_CONNECTIONS_FIELD, "").split("/")[0]
+        for fields in reports["fields"]
+    ]
+    reports = reports.assign(
+        connections=pd.to_numeric(pd.Series(connections, index=reports.index))
+    ).dropna(subset=["connections"])
+    reports = reports.sort_values("timestamp")
+    change = reports.groupby("node")["connections"].diff()
+    change = change.fillna(reports["connections"])
+
+    counts = (
+        pd.DataFrame(
+            {
+                "node": reports["node"],
+                "bucket_start": (reports["timestamp"] // bucket_s) * bucket_s,
+                "peer_connected": change.clip(lower=0).astype(int),
+                "peer_disconnected": (-change).clip(lower=0).astype(int),
+            }
+        )
+        .groupby(["node", "bucket_start"])
+        .agg(
+            peer_connected=("peer_connected", "sum"),
+            peer_disconnected=("peer_disconnected", "sum"),
+        )
+    )
+    return counts.reset_index()
+
+
+def align_to_samples(
+    events: pd.DataFrame, samples: pd.DataFrame, tolerance_s: float = 5.0
+) -> pd.DataFrame:
+    """
+    Lines up each event with the first metric sample of the same node
+    taken at or after it (`sample_timestamp`), so events can be read
+    next to the metrics they affected.
+    """
+    sample_times = (
+        samples.loc[:, ["node", "timestamp"]]
+        .drop_duplicates()
+        .rename(columns={"timestamp": "sample_timestamp"})
+        .sort_values("sample_timestamp")
+    )
+    aligned = pd.merge_asof(
+        events.sort_values("timestamp"),
+        sample_times,
+        left_on="timestamp",
+        right_on="sample_timestamp",
+        by="node",
+        direction="forward",
+    )
+    # the tolerance of merge_asof is typed for int or timedelta keys only
+    too_late = aligned["sample_timestamp"] - aligned["timestamp"] > tolerance_s
+    aligned.loc[too_late, "sample_timestamp"] = float("nan")
+    return aligned
+
+
+def event_fields(df: pd.DataFrame) -> list[dict[str, Any]]:
+    """Decodes the `fields` column of an event table."""
+    return [json.loads(fields) for fields in df["fields"]]
@@ -1,6 +1,17 @@
+import threading
+import time
+
 import pytest
+import requests
 
-from nwaku.client import scrape_metrics
+from nwaku.client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    WakuClient,
+    WakuClientException,
+    parse_metrics,
+    scrape_metrics,
+)
 
 METRICS_DUMP_PATH = "src/nwaku/tests/metrics_dump.txt"
 
@@ -54,3 +65,151 @@ metric_no_space_or_value
 """
     results = scrape_metrics(malformed_metrics, "some_metric")
     assert results == []
+
+
+def test_parse_metrics_with_name_filter(metrics_dump: str):
+    results = parse_metrics(
+        metrics_dump, lambda name: name.startswith("presto_server_")
+    )
+    names = {result["name"] for result in results}
+    assert names == {
+        "presto_server_processed_request_count",
+        "presto_server_missing_requests_count",
+        "presto_server_invalid_requests_count",
+    }
+    assert all(result["labels"] == {} for result in results)
+
+
+def test_parse_metrics_without_filter_keeps_names(metrics_dump: str):
+    results = parse_metrics(metrics_dump)
+    peers = [result for result in results if result["name"] == "libp2p_peers"]
+    assert peers == [{"name": "libp2p_peers", "labels": {}, "value": 1.0}]
+
+
+class _FakeResponse:
+    text = "metrics"
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {}
+
+
+def _client_with_get(get, **kwargs) -> WakuClient:
+    waku_client = WakuClient("localhost", 8645, 8008, **kwargs)
+    waku_client.session.get = get
+    return waku_client
+
+
+def test_deadline_caps_retries_and_timeouts():
+    timeouts = []
+
+    def _unreachable(url, headers, timeout):
+        timeouts.append(timeout)
+        raise requests.exceptions.ConnectionError("refused")
+
+    waku_client = _client_with_get(_unreachable)
+    start = time.monotonic()
+    with pytest.raises(WakuClientException):
+        # 3 attempts 0.5s apart would take 1s without the deadline
+        waku_client.get_metrics(deadline_s=0.3)
+    assert time.monotonic() - start < 0.3
+    assert len(timeouts) == 1 and timeouts[0] <= 0.3
+
+
+def test_circuit_breaker_fails_fast_then_probes():
+    calls = []
+    healthy = threading.Event()
+
+    def _get(url, headers, timeout):
+        calls.append(url)
+        if not healthy.is_set():
+            raise requests.exceptions.ConnectTimeout("timeout")
+        return _FakeResponse()
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=0.1)
+    waku_client = _client_with_get(_get, breaker=breaker)
+
+    with pytest.raises(CircuitOpenError):
+        waku_client.get_info(attempts=5)
+    # opened after 2 failures, the other attempts weren't sent
+    assert len(calls) == 2 and breaker.is_open
+
+    with pytest.raises(CircuitOpenError):
+        waku_client.get_info(attempts=1)
+    assert len(calls) == 2
+
+    time.sleep(0.1)
+    healthy.set()
+    assert waku_client.get_info(attempts=1) == {}
+    assert not breaker.is_open
+
+
+def test_unexpected_errors_end_the_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=0.05)
+    breaker.record_failure()
+
+    def _closed_client(url, headers, timeout):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    waku_client = _client_with_get(_closed_client, breaker=breaker)
+    time.sleep(0.06)
+    with pytest.raises(RuntimeError):
+        waku_client.get_metrics()
+    # the failed probe reopened the circuit, the next probe is let through
+    assert breaker.is_open and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_http_errors_dont_open_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    class _ServerError(_FakeResponse):
+        url = "http://localhost/info"
+        status_code = 500
+
+        def raise_for_status(self):
+            raise requests.exceptions.HTTPError("500", response=self)
+
+    waku_client = _client_with_get(
+        lambda url, headers, timeout: _ServerError(), breaker=breaker
+    )
+    with pytest.raises(WakuClientException):
+        waku_client.get_info(attempts=1)
+    assert not breaker.is_open
+
+
+def test_hedged_get_returns_the_first_answer():
+    calls = []
+
+    def _first_one_stalls(url, headers, timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            time.sleep(1)
+        return _FakeResponse()
+
+    with _client_with_get(_first_one_stalls, hedge_after_s=0.05) as waku_client:
+        start = time.monotonic()
+        assert waku_client.get_metrics(attempts=1) == "metrics"
+        assert time.monotonic() - start < 0.5
+    assert len(calls) == 2
+
+
+def test_get_messages_is_never_hedged():
+    calls = []
+
+    def _slow(url, headers, timeout):
+        calls.append(url)
+        time.sleep(0.2)
+        return _FakeResponse()
+
+    with _client_with_get(_slow, hedge_after_s=0.05) as waku_client:
+        waku_client.get_messages("/waku/2/rs/0/0", attempts=1)
+    assert len(calls) == 1
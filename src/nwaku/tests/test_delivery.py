@@ -0,0 +1,96 @@
+from typing import cast
+
+import pytest
+
+from nwaku.client import WakuClient, WakuClientException, create_waku_message
+from nwaku.delivery import DELIVERY_ID_PREFIX, DeliveryTracker, decode_delivery_id
+
+
+def test_decode_delivery_id_roundtrip():
+    message = create_waku_message(
+        payload="a", content_topic="topic", meta=f"{DELIVERY_ID_PREFIX}abc123"
+    )
+    assert decode_delivery_id(message) == "abc123"
+
+
+def test_decode_delivery_id_ignores_untracked_messages():
+    assert decode_delivery_id(create_waku_message("a", "topic")) is None
+    assert decode_delivery_id(create_waku_message("a", "topic", meta="other")) is None
+    assert decode_delivery_id({"meta": "not base64!"}) is None
+
+
+class _PublishingClient:
+    def __init__(self):
+        self.calls = []
+
+    def publish_message(self, topic, message, **kwargs):
+        self.calls.append(kwargs)
+
+
+def test_publish_passes_attempts_through():
+    waku_client = _PublishingClient()
+    tracker = DeliveryTracker(
+        {"node-0": cast(WakuClient, waku_client)}, "/waku/2/test/proto"
+    )
+
+    tracker.publish("node-0", "a", "topic")
+    tracker.publish("node-0", "a", "topic", attempts=1)
+
+    # the client's own retries, unless overridden
+    assert waku_client.calls == [{}, {"attempts": 1}]
+
+
+class _InboxClient:
+    """Returns what was put in its `inbox` since the previous poll."""
+
+    def __init__(self, publish=None):
+        self.inbox = []
+        self.publish = publish
+
+    def publish_message(self, topic, message, **kwargs):
+        if self.publish is not None:
+            self.publish(message)
+
+    def get_messages(self, topic, **kwargs):
+        messages, self.inbox = self.inbox, []
+        return messages
+
+
+def test_deliveries_seen_before_the_publish_returns_count():
+    delays = []
+
+    def _relay_and_poll(message):
+        receiver.inbox.append(message)
+        tracker._poll_once()
+
+    receiver = _InboxClient()
+    tracker = DeliveryTracker(
+        {
+            "node-0": cast(WakuClient, _InboxClient(_relay_and_poll)),
+            "node-1": cast(WakuClient, receiver),
+        },
+        "/waku/2/test/proto",
+        on_delivery=delays.append,
+    )
+    tracker.publish("node-0", "a", "topic")
+
+    assert tracker.pending() == 0
+    assert len(delays) == 1 and delays[0] >= 0
+
+
+def test_failed_publishes_are_not_tracked():
+    def _fail(message):
+        raise WakuClientException("publish failed")
+
+    tracker = DeliveryTracker(
+        {
+            "node-0": cast(WakuClient, _InboxClient(_fail)),
+            "node-1": cast(WakuClient, _InboxClient()),
+        },
+        "/waku/2/test/proto",
+    )
+
+    with pytest.raises(WakuClientException):
+        tracker.publish("node-0", "a", "topic")
+    assert tracker.pending() == 0
+    assert tracker.delays_df().empty
@@ -0,0 +1,125 @@
+import pandas as pd
+import pytest
+
+from nwaku.logs import (
+    LogStreamParser,
+    align_to_samples,
+    connection_churn,
+    event_fields,
+    events_df,
+    parse_log_line,
+    startup_timeline,
+)
+
+LOGS_PATH = "testdata/logs.md"
+
+
+@pytest.fixture(scope="session")
+def log_lines() -> list[str]:
+    with open(LOGS_PATH, "r") as f:
+        return f.read().splitlines()
+
+
+def test_parse_log_line():
+    line = (
+        "INF 2025-07-09 14:00:10.012+00:00 Finished dialing multiple peers "
+        "tid=1 file=peer_manager.nim:372 successfulConns=1 attempted=1"
+    )
+    event = parse_log_line("node-0", line)
+    assert event is not None
+    assert event.level == "INF"
+    assert event.message == "Finished dialing multiple peers"
+    assert event.file == "peer_manager.nim:372"
+    assert event.fields == {"tid": "1", "successfulConns": "1", "attempted": "1"}
+    assert event.timestamp == pytest.approx(1752069610.012)
+
+
+def test_parse_log_line_quoted_fields():
+    line = (
+        "ERR 2025-07-09 14:00:09.998+00:00 rendezvous failed initial requests "
+        'topics="waku node" tid=1 file=waku_node.nim:1424 '
+        'error="could not get a peer supporting RendezVousCodec"'
+    )
+    event = parse_log_line("node-0", line)
+    assert event is not None
+    assert event.kind == "error"
+    assert event.topics == "waku node"
+    assert event.fields["error"] == "could not get a peer supporting RendezVousCodec"
+
+
+def test_parse_log_line_ignores_non_log_lines():
+    assert parse_log_line("node-0", "bSubscribeShards: none(seq[uint16])") is None
+    assert parse_log_line("node-0", "") is None
+
+
+def test_parse_logs_dump(log_lines: list[str]):
+    events = [parse_log_line("node-0", line) for line in log_lines]
+    events = [event for event in events if event]
+    kinds = [event.kind for event in events]
+
+    assert len(events) == len(log_lines) - 1
+    assert kinds.count("message_received") == 10
+    for phase in ["rest_started", "relay_mounted", "node_started", "setup_complete"]:
+        assert phase in kinds
+
+    received = next(e for e in events if e.kind == "message_received")
+    assert received.fields["payloadSizeBytes"] == "20"
+
+
+def test_stream_parser_handles_split_chunks(log_lines: list[str]):
+    data = ("\n".join(log_lines) + "\n").encode("utf-8")
+    parser = LogStreamParser("node-0")
+    events = []
+    for i in range(0, len(data), 7):
+        events.extend(parser.feed(data[i : i + 7]))
+    events.extend(parser.flush())
+
+    assert len(events) == len(log_lines) - 1
+    assert events[0].message.startswith("whether to mount storeSync")
+
+
+def test_startup_timeline(log_lines: list[str]):
+    parser = LogStreamParser("node-0")
+    df = events_df(parser.feed(("\n".join(log_lines) + "\n").encode("utf-8")))
+    timeline = startup_timeline(df)
+
+    assert list(timeline.index) == ["node-0"]
+    assert timeline.loc["node-0", "rest_started"] == pytest.approx(0.0)
+    assert timeline.loc["node-0", "setup_complete"] == pytest.approx(9.03)
+    assert event_fields(df.head(1)) == [{"tid": "1"}]
+
+
+def test_connection_churn_and_alignment(log_lines: list[str]):
+    report = next(line for line in log_lines if "Relay peer connections" in line)
+    # the same node's later reports: 3 connections, then 2
+    lines = [
+        report,
+        report.replace("14:00:15.013", "14:00:45.013").replace(
+            "totalConnections=1/50", "totalConnections=3/50"
+        ),
+        report.replace("14:00:15.013", "14:01:15.013").replace(
+            "totalConnections=1/50", "totalConnections=2/50"
+        ),
+    ]
+    events = [parse_log_line("node-0", line) for line in lines]
+    df = events_df([event for event in events if event is not None])
+
+    churn = connection_churn(df, bucket_s=30.0)
+    assert churn["peer_connected"].tolist() == [1, 2, 0]
+    assert churn["peer_disconnected"].tolist() == [0, 0, 1]
+
+    samples = pd.DataFrame(
+        {"node": ["node-0", "node-0"], "timestamp": [1752069616.0, 1752069646.0]}
+    )
+    aligned = align_to_samples(df, samples)
+    assert aligned["sample_timestamp"].tolist()[:2] == [1752069616.0, 1752069646.0]
+    # no sample within the tolerance
+    assert aligned["sample_timestamp"].isna().tolist()[2]
+
+
+def test_connection_churn_from_real_logs(log_lines: list[str]):
+    parser = LogStreamParser("node-0")
+    df = events_df(parser.feed(("\n".join(log_lines) + "\n").encode("utf-8")))
+
+    churn = connection_churn(df)
+    assert churn[["peer_connected", "peer_disconnected"]].values.tolist() == [[1, 0]]